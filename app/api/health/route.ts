@@ -21,12 +21,23 @@ export async function GET() {
       api: true,
       memory: true,
     },
+    memory: {
+      heapUsedMB: 0,
+      heapTotalMB: 0,
+      rssMB: 0,
+    },
     responseTime: 0,
   }
 
   // 内存检查
   const memUsage = process.memoryUsage()
   const memUsedMB = Math.round(memUsage.heapUsed / 1024 / 1024)
+  // 精确到 0.1 MB，供 soak 测试拟合内存增长趋势
+  health.memory = {
+    heapUsedMB: Math.round(memUsage.heapUsed / 1024 / 102.4) / 10,
+    heapTotalMB: Math.round(memUsage.heapTotal / 1024 / 102.4) / 10,
+    rssMB: Math.round(memUsage.rss / 1024 / 102.4) / 10,
+  }
   if (memUsedMB > 512) {
     health.checks.memory = false
     health.status = 'degraded'
@@ -3,60 +3,63 @@
 管理员导航测试 - 验证登录后能看到开发工具
 """
 
-from playwright.sync_api import sync_playwright
+import sys
 
-BASE_URL = "http://localhost:3000"
+import e2e_dom
+from e2e_auth import ensure_auth_state
+from e2e_browser_pool import BrowserPool
+from e2e_readiness import format_timings, goto_ready, print_report
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+BASE_URL = "http://localhost:3000"
 
-    print("1. 登录管理员账号...")
-    page.goto(f"{BASE_URL}/login", timeout=60000)
-    page.wait_for_load_state('networkidle')
-    page.wait_for_timeout(2000)
+def test_admin_nav(pool):
+    """管理员登录后导航栏包含开发工具且页面可访问"""
+    print("1. 载入管理员登录态...")
+    # 登录态缓存有效时直接复用，否则通过 /api/auth/login 登录一次
+    state = ensure_auth_state(pool, BASE_URL)
 
-    # 输入凭证并登录
-    page.fill('input#username', 'admin')
-    page.fill('input#password', 'admin123')
-    page.click('button[type="submit"]')
-    page.wait_for_timeout(3000)
+    with pool.page(storage_state=state) as page:
+        print("2. 检查导航栏...")
+        timings = goto_ready(page, BASE_URL)
+        print(f"   ⏱️  {format_timings(timings)}")
 
-    print("2. 检查导航栏...")
-    page.wait_for_load_state('networkidle')
+        # 一次取回页面文本和链接
+        dom = e2e_dom.snapshot(page)
 
-    # 获取页面内容
-    content = page.content()
+        # 检查导航项
+        nav_items = ['技能广场', '我的店铺', '我的技能', '历史记录', '开发工具', '文档']
 
-    # 检查导航项
-    nav_items = ['技能广场', '我的店铺', '我的技能', '历史记录', '开发工具', '文档']
+        print("\n3. 导航项检查结果:")
+        for item in nav_items:
+            if dom.contains(item):
+                print(f"   ✅ {item}")
+            else:
+                print(f"   ❌ {item}")
 
-    print("\n3. 导航项检查结果:")
-    for item in nav_items:
-        if item in content:
-            print(f"   ✅ {item}")
-        else:
-            print(f"   ❌ {item}")
+        # 截图
+        page.screenshot(path="/tmp/e2e_admin_nav.png", full_page=True)
+        print("\n4. 截图保存到 /tmp/e2e_admin_nav.png")
 
-    # 截图
-    page.screenshot(path="/tmp/e2e_admin_nav.png", full_page=True)
-    print("\n4. 截图保存到 /tmp/e2e_admin_nav.png")
+        # 测试访问开发工具页面
+        print("\n5. 测试访问开发工具页面...")
+        timings = goto_ready(page, f"{BASE_URL}/dev-tools")
+        print(f"   ⏱️  {format_timings(timings)}")
 
-    # 测试访问开发工具页面
-    print("\n5. 测试访问开发工具页面...")
-    page.goto(f"{BASE_URL}/dev-tools", timeout=30000)
-    page.wait_for_load_state('networkidle')
-    page.wait_for_timeout(2000)
-
-    dev_tools_content = page.content()
-    if "开发" in dev_tools_content or "调试" in dev_tools_content or "工具" in dev_tools_content:
-        print("   ✅ 开发工具页面可访问")
-    else:
-        print("   ⚠️  开发工具页面内容可能不正确")
+        dev_tools_ok = e2e_dom.snapshot(page).contains("开发", "调试", "工具")
+        if dev_tools_ok:
+            print("   ✅ 开发工具页面可访问")
+        else:
+            print("   ⚠️  开发工具页面内容可能不正确")
 
-    page.screenshot(path="/tmp/e2e_dev_tools.png", full_page=True)
-    print("   📸 截图保存到 /tmp/e2e_dev_tools.png")
+        page.screenshot(path="/tmp/e2e_dev_tools.png", full_page=True)
+        print("   📸 截图保存到 /tmp/e2e_dev_tools.png")
 
-    browser.close()
+        # 管理员登录后应能看到开发工具入口并打开该页面
+        return dom.contains("开发工具") and dev_tools_ok
 
-print("\n测试完成!")
+if __name__ == "__main__":
+    with BrowserPool() as pool:
+        success = test_admin_nav(pool)
+    print_report()
+    print("\n测试完成!" if success else "\n测试失败!")
+    sys.exit(0 if success else 1)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+AI 掌柜 v2.0 E2E 并发执行模式
+基于 async_playwright，页面测试在同一个浏览器内并发运行，每个测试独占一个 context。
+测试几乎都在等待网络 / networkidle / 截图，并发后总耗时接近最慢的单个测试。
+页面上的断言与顺序模式共用 e2e_test.py 中的 check_* 函数，这里只负责异步取数。
+
+用法: python e2e_test.py --async --concurrency 4
+"""
+
+import asyncio
+
+import e2e_console
+import e2e_dom
+import e2e_replay
+import e2e_screenshots
+import e2e_steps
+import e2e_vitals
+import e2e_warmup
+from e2e_browser_pool import AsyncBrowserPool
+from e2e_test import (
+    BASE_URL,
+    VIEWPORTS,
+    check_homepage,
+    check_login_form,
+    check_navigation,
+    check_requires_login,
+    check_skill_detail,
+    report_shot,
+    test_api_endpoints,
+    viewport_line,
+)
+
+
+class BufferedLog:
+    """按测试缓存输出，测试结束后整块打印，避免并发时日志交错"""
+
+    def __init__(self):
+        self.lines = []
+
+    def __call__(self, *args):
+        self.lines.append(" ".join(str(a) for a in args))
+
+    def flush(self):
+        print("\n".join(self.lines))
+        self.lines = []
+
+
+async def test_homepage(pool, log):
+    """测试首页加载"""
+    log("\n=== 测试首页 ===")
+    async with pool.page() as page:
+        try:
+            await page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
+            await page.wait_for_load_state('networkidle')
+            await e2e_vitals.capture_async(page)
+
+            check_homepage(await page.title(), await page.locator('header nav, header').count(),
+                           await page.locator('main').count(), log)
+
+            report_shot(await e2e_screenshots.capture_async(page, "homepage"), log)
+
+            log("  ✅ 首页测试通过")
+            return True
+        except Exception as e:
+            log(f"  ❌ 首页测试失败: {e}")
+            await e2e_screenshots.capture_failure_async(page, "homepage_error")
+            return False
+
+
+async def test_login_page(pool, log):
+    """测试登录页面"""
+    log("\n=== 测试登录页面 ===")
+    async with pool.page() as page:
+        try:
+            await page.goto(f"{BASE_URL}/login", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/login"))
+            await page.wait_for_load_state('networkidle')
+            await e2e_vitals.capture_async(page)
+
+            check_login_form(
+                await page.locator('input[name="username"], input[type="text"]').first.count(),
+                await page.locator('input[name="password"], input[type="password"]').first.count(),
+                await page.locator('button[type="submit"], button:has-text("登录")').count(),
+                log,
+            )
+
+            report_shot(await e2e_screenshots.capture_async(page, "login"), log)
+
+            log("  ✅ 登录页面测试通过")
+            return True
+        except Exception as e:
+            log(f"  ❌ 登录页面测试失败: {e}")
+            await e2e_screenshots.capture_failure_async(page, "login_error")
+            return False
+
+
+async def test_shops_page(pool, log):
+    """测试店铺列表页面"""
+    log("\n=== 测试店铺列表页面 ===")
+    async with pool.page() as page:
+        try:
+            await page.goto(f"{BASE_URL}/shops", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/shops"))
+            await page.wait_for_load_state('networkidle')
+            await e2e_vitals.capture_async(page)
+
+            if check_requires_login(await e2e_dom.snapshot_async(page), "店铺页面", log):
+                await e2e_screenshots.capture_async(page, "shops_redirect")
+                return True
+
+            report_shot(await e2e_screenshots.capture_async(page, "shops"), log)
+
+            log("  ✅ 店铺列表页面测试通过")
+            return True
+        except Exception as e:
+            log(f"  ❌ 店铺列表页面测试失败: {e}")
+            await e2e_screenshots.capture_failure_async(page, "shops_error")
+            return False
+
+
+async def test_skill_detail_page(pool, log):
+    """测试技能详情页"""
+    log("\n=== 测试技能详情页 ===")
+    async with pool.page() as page:
+        # 测试朋友圈文案技能
+        skill_id = "moments-copywriter"
+        url = f"{BASE_URL}/skill/{skill_id}"
+
+        try:
+            await page.goto(url, timeout=e2e_warmup.nav_timeout(url))
+            await page.wait_for_load_state('networkidle')
+            await e2e_vitals.capture_async(page)
+
+            dom = await e2e_dom.snapshot_async(page)
+            if check_requires_login(dom, "技能详情页", log):
+                return True
+
+            check_skill_detail(dom, await page.locator('textarea').count(), log)
+
+            report_shot(await e2e_screenshots.capture_async(page, "skill_detail"), log)
+
+            log("  ✅ 技能详情页测试通过")
+            return True
+        except Exception as e:
+            log(f"  ❌ 技能详情页测试失败: {e}")
+            await e2e_screenshots.capture_failure_async(page, "skill_detail_error")
+            return False
+
+
+async def test_api_endpoints_async(pool, log):
+    """API 端点测试使用 urllib，放到线程里执行以免阻塞事件循环"""
+    return await asyncio.to_thread(test_api_endpoints, log)
+
+
+async def test_navigation(pool, log):
+    """测试导航功能"""
+    log("\n=== 测试导航功能 ===")
+    async with pool.page() as page:
+        try:
+            await page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
+            await page.wait_for_load_state('networkidle')
+            await e2e_vitals.capture_async(page)
+
+            check_navigation(await e2e_dom.snapshot_async(page), log)
+
+            log("  ✅ 导航测试完成")
+            return True
+        except Exception as e:
+            log(f"  ❌ 导航测试失败: {e}")
+            return False
+
+
+async def test_responsive_design(pool, log):
+    """测试响应式设计；三个视口在本测试占用的并发名额内依次执行，同一时刻只开一个 context"""
+    log("\n=== 测试响应式设计 ===")
+
+    for vp in VIEWPORTS:
+        try:
+            async with pool.page(viewport={"width": vp["width"], "height": vp["height"]}) as page:
+                await page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
+                await page.wait_for_load_state('networkidle')
+                await e2e_vitals.capture_async(page)
+
+                log(viewport_line(vp, await e2e_screenshots.capture_async(page, f"responsive_{vp['name'].lower()}")))
+        except Exception as e:
+            log(f"  ❌ {vp['name']}: {e}")
+
+    log("  ✅ 响应式设计测试完成")
+    return True
+
+
+# 与 e2e_test.main() 汇总表中的顺序保持一致
+TESTS = [
+    ("首页", test_homepage),
+    ("登录页面", test_login_page),
+    ("店铺列表", test_shops_page),
+    ("技能详情页", test_skill_detail_page),
+    ("API 端点", test_api_endpoints_async),
+    ("导航功能", test_navigation),
+    ("响应式设计", test_responsive_design),
+]
+
+
+async def run_async(concurrency=4):
+    """并发执行所有测试，返回与顺序模式相同结构的 results 字典"""
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+
+    async def run_one(pool, name, test):
+        if test is test_api_endpoints_async and e2e_replay.MODE == "replay":
+            return None
+        async with semaphore:
+            log = BufferedLog()
+            test_id = f"e2e_test.py::{test.__name__.removesuffix('_async')}"
+            try:
+                _, record = await e2e_steps.run_test_async(test_id, test, pool, log)
+                if record.error:
+                    log(f"  ❌ {name} 执行出错: {record.error}")
+                return record.passed
+            finally:
+                log.flush()
+
+    async with AsyncBrowserPool(context_hooks=[e2e_vitals.install, e2e_replay.install, e2e_console.install]) as pool:
+        outcomes = await asyncio.gather(*(run_one(pool, name, test) for name, test in TESTS))
+        print(f"\n🌐 浏览器启动 {pool.stats['launches']} 次, 借出 context {pool.stats['checkouts']} 次 (并发 {concurrency})")
+
+    return {name: outcome for (name, _), outcome in zip(TESTS, outcomes)}
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+E2E 登录态缓存
+只登录一次，把 cookies / localStorage 保存成 Playwright storage state 文件，
+之后的测试（包括其他进程）直接把该文件加载进 context，跳过 UI 登录。
+缓存在 /api/auth/me 不再返回 200 + 有效用户时失效并自动重新登录。
+
+用法:
+    with BrowserPool() as pool:
+        state = ensure_auth_state(pool)
+        with pool.page(storage_state=state) as page:
+            ...
+"""
+
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import e2e_warmup
+
+BASE_URL = "http://localhost:3000"
+
+AUTH_STATE_PATH = os.environ.get("E2E_AUTH_STATE", "/tmp/e2e_auth_state.json")
+ADMIN_USERNAME = os.environ.get("E2E_USERNAME", "admin")
+ADMIN_PASSWORD = os.environ.get("E2E_PASSWORD", "admin123")
+
+# 同一进程内校验过的缓存文件 (path, mtime)，避免每个测试都请求 /api/auth/me
+_validated = set()
+
+
+@contextmanager
+def _file_lock(path):
+    """跨进程互斥，防止多个进程同时发现缓存失效后各自登录"""
+    with open(f"{path}.lock", "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def _write_atomic(path, state):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def save_storage_state(context, path=AUTH_STATE_PATH):
+    """把已登录 context 的 cookies / localStorage 写入缓存文件"""
+    _write_atomic(path, context.storage_state())
+    _validated.add((path, os.path.getmtime(path)))
+    return path
+
+
+def is_auth_state_valid(playwright, base_url=BASE_URL, path=AUTH_STATE_PATH):
+    """缓存文件存在且 /api/auth/me 返回 200 + 用户信息时视为有效"""
+    if not os.path.exists(path):
+        return False
+    if (path, os.path.getmtime(path)) in _validated:
+        return True
+
+    request = playwright.request.new_context(base_url=base_url, storage_state=path)
+    try:
+        response = request.get("/api/auth/me", timeout=10000)
+        # 未登录时该接口同样返回 200，只是 user 为 null
+        valid = response.status == 200 and bool(response.json().get("user"))
+    except Exception:
+        valid = False
+    finally:
+        request.dispose()
+
+    if valid:
+        _validated.add((path, os.path.getmtime(path)))
+    return valid
+
+
+def login_via_api(playwright, base_url=BASE_URL, path=AUTH_STATE_PATH,
+                  username=ADMIN_USERNAME, password=ADMIN_PASSWORD):
+    """调用 /api/auth/login 登录并保存 cookies"""
+    request = playwright.request.new_context(base_url=base_url)
+    try:
+        response = request.post("/api/auth/login", data={"username": username, "password": password}, timeout=30000)
+        if not response.ok:
+            raise RuntimeError(f"登录失败: {response.status} {response.text()[:200]}")
+        _write_atomic(path, request.storage_state())
+    finally:
+        request.dispose()
+    _validated.add((path, os.path.getmtime(path)))
+    return path
+
+
+def login_via_ui(pool, base_url=BASE_URL, path=AUTH_STATE_PATH,
+                 username=ADMIN_USERNAME, password=ADMIN_PASSWORD):
+    """通过登录页面登录，同时保存 cookies 和 localStorage"""
+    with pool.page() as page:
+        page.goto(f"{base_url}/login", timeout=e2e_warmup.nav_timeout(f"{base_url}/login", 60000))
+        page.fill('input#username', username)
+        page.fill('input#password', password)
+        page.click('button[type="submit"]')
+        page.wait_for_url(lambda url: "/login" not in url, timeout=30000)
+        return save_storage_state(page.context, path)
+
+
+def ensure_auth_state(pool, base_url=BASE_URL, path=AUTH_STATE_PATH, via="api"):
+    """返回可直接传给 new_context(storage_state=...) 的登录态文件路径
+
+    缓存有效则直接复用，否则按 via ("api" / "ui") 重新登录一次。
+    """
+    if is_auth_state_valid(pool.playwright, base_url, path):
+        return path
+
+    with _file_lock(path):
+        # 拿到锁后再检查一次，可能其他进程已经刷新了缓存
+        if is_auth_state_valid(pool.playwright, base_url, path):
+            return path
+
+        started = time.monotonic()
+        if via == "ui":
+            login_via_ui(pool, base_url, path)
+        else:
+            login_via_api(pool.playwright, base_url, path)
+        print(f"  🔑 已重新登录 ({via})，登录态缓存到 {path} ({(time.monotonic() - started) * 1000:.0f}ms)")
+    return path
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+AI 掌柜 v2.0 性能基准入口
+各基准以子命令形式注册，实现放在 e2e_bench_<name>.py 中，
+每个模块提供 DESCRIPTION、add_arguments(parser) 和 async run(args) -> dict。
+
+用法:
+    python e2e_bench.py load --concurrency 32 --duration 60
+    python e2e_bench.py --json /tmp/bench.json load --rps 200
+    python e2e_bench.py soak --duration 7200 --users 4
+    python e2e_bench.py upload --resolution 4032x3024 --format png --concurrency 1,8,32
+    python e2e_bench.py content --lengths 1000,10000 --batch 1,50 --mode forbidden
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+import e2e_bench_content
+import e2e_bench_knowledge
+import e2e_bench_load
+import e2e_bench_ratelimit
+import e2e_bench_soak
+import e2e_bench_stream
+import e2e_bench_upload
+import e2e_bench_users
+from e2e_http import BASE_URL
+
+BENCHMARKS = {
+    "load": e2e_bench_load,
+    "soak": e2e_bench_soak,
+    "knowledge": e2e_bench_knowledge,
+    "ratelimit": e2e_bench_ratelimit,
+    "stream": e2e_bench_stream,
+    "upload": e2e_bench_upload,
+    "users": e2e_bench_users,
+    "content": e2e_bench_content,
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 掌柜 v2.0 性能基准")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"被测服务地址 (默认 {BASE_URL})")
+    parser.add_argument("--json", dest="json_path", help="把结果写入 JSON 文件")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, module in BENCHMARKS.items():
+        module.add_arguments(subparsers.add_parser(name, help=module.DESCRIPTION, description=module.DESCRIPTION))
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print(f"AI 掌柜 v2.0 性能基准: {args.command}")
+    print("=" * 60)
+
+    report = asyncio.run(BENCHMARKS[args.command].run(args))
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\n📄 结果已写入 {args.json_path}")
+
+    return 1 if report.get("failed") else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+内容检测吞吐基准 (e2e_bench.py content)
+为每个平台（douyin / xiaohongshu / weixin / general）生成合成文案语料，对 POST /api/v2/content/check
+扫描三个维度:
+  长度    每篇文案的字符数 (--lengths)
+  密度    每千字插入的违禁词个数 (--densities)，违禁词取自 GET /api/v2/content/check 返回的该平台词库
+  批量    一批同时在途的文档数 (--batch)，模拟把整份内容日历一次送检
+每个组合按 --mode 分别只做违禁词检测、只做质量评分或两者都做，报告每秒文档数、每篇延迟分位数，
+并用对数坐标下的斜率判断延迟随文本长度的增长阶数，用各平台词库大小对比判断与词库规模的关系。
+
+checkForbiddenWords 对词库中每个词各建一个正则扫全文，预期延迟 ∝ 文本长度 × 词库大小；
+斜率明显大于 1 说明存在超线性的部分（如上下文截取或排序）。
+"""
+
+import asyncio
+import math
+import random
+import time
+
+from e2e_auth import ADMIN_PASSWORD, ADMIN_USERNAME
+from e2e_http import HttpClient, LatencyStats
+
+DESCRIPTION = "内容检测（违禁词 + 质量评分）在不同文本长度、违禁词密度和批量下的吞吐"
+
+PLATFORMS = ("douyin", "xiaohongshu", "weixin", "general")
+
+# 各平台对应的质量评分内容类型
+CONTENT_TYPES = {
+    "douyin": "video_script",
+    "xiaohongshu": "xiaohongshu",
+    "weixin": "moments",
+    "general": "general",
+}
+
+MODES = {
+    "forbidden": ["forbidden"],
+    "quality": ["quality"],
+    "both": ["forbidden", "quality"],
+}
+
+# 干净的文案片段；生成语料时会再用词库过滤一遍，含违禁词的片段不会使用
+SENTENCES = {
+    "douyin": ("家人们今天带大家探店", "这家小店藏在老城区的巷子里", "招牌拿铁奶香很足", "周末下午来坐坐刚刚好",
+               "镜头里这款蛋糕是现烤的", "店主说豆子每周烘一次", "记得收藏这条视频", "下期带你们去吃早茶"),
+    "xiaohongshu": ("姐妹们这家咖啡店真的很出片", "靠窗的位置阳光很好", "抹茶拿铁甜度可以选", "甜品颜值和口味都在线",
+                    "人均五十左右", "工作日下午人不多", "适合一个人看书发呆", "店里的杯子也很好看"),
+    "weixin": ("本周六门店举办手冲体验课", "欢迎老朋友带新朋友来玩", "新到的云南豆子风味很干净",
+               "下午茶套餐包含一杯饮品和一份甜点", "活动名额有限请提前预约", "感谢大家一直以来的支持",
+               "门口新摆了几盆绿植", "晚上八点后饮品打八折"),
+    "general": ("门店位于地铁站出口附近", "营业时间为早上八点到晚上十点", "提供堂食和外带服务",
+                "饮品可以选择冰量和甜度", "店内有插座和无线网络", "支持提前线上点单", "节假日正常营业",
+                "欢迎到店品尝"),
+}
+
+
+def add_arguments(parser):
+    parser.add_argument("--platforms", default=",".join(PLATFORMS), help=f"平台，逗号分隔 (默认 {','.join(PLATFORMS)})")
+    parser.add_argument("--lengths", default="200,1000,5000,20000", help="文案字符数，逗号分隔 (默认 200,1000,5000,20000)")
+    parser.add_argument("--densities", default="0,5,20", help="每千字违禁词个数，逗号分隔 (默认 0,5,20)")
+    parser.add_argument("--batch", default="1,10,50", help="一批同时在途的文档数，逗号分隔 (默认 1,10,50)")
+    parser.add_argument("--rounds", type=int, default=5, help="每个组合发送的批数 (默认 5)")
+    parser.add_argument("--mode", default="forbidden,both",
+                        help=f"检测项，逗号分隔，可选 {' / '.join(MODES)} (默认 forbidden,both)")
+    parser.add_argument("--max-error-rate", type=float, default=0.0, help="错误率超过该值判为失败 (默认 0)")
+    parser.add_argument("--random-seed", type=int, default=42, help="语料随机种子 (默认 42)")
+
+
+def _numbers(text, cast=int):
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+
+async def load_dictionary(client, platform):
+    """该平台生效的违禁词列表（GET /api/v2/content/check?platform=...）"""
+    response = await client.request("GET", f"/api/v2/content/check?platform={platform}", timeout=30)
+    if not response.ok:
+        raise RuntimeError(f"获取 {platform} 违禁词库失败: {response.status} {response.text()[:200]}")
+    return sorted({word for category in response.json()["categories"] for word in category["words"]})
+
+
+def clean_sentences(platform, dictionary):
+    words = [w.lower() for w in dictionary]
+    sentences = [s for s in SENTENCES[platform] if not any(w in s.lower() for w in words)]
+    if not sentences:
+        raise RuntimeError(f"{platform} 的文案片段全部含有违禁词，无法生成干净语料")
+    return sentences
+
+
+def generate(rng, sentences, dictionary, length, density):
+    """生成约 length 字的文案，每千字插入 density 个违禁词；返回 (文本, 插入个数)"""
+    inserts = round(length * density / 1000)
+    parts = []
+    size = 0
+    while size < length:
+        sentence = rng.choice(sentences) + rng.choice("，。！")
+        parts.append(sentence)
+        size += len(sentence)
+    for _ in range(inserts):
+        parts.insert(rng.randrange(len(parts) + 1), rng.choice(dictionary))
+    return "".join(parts), inserts
+
+
+class Cell:
+    """一个 (平台, 长度, 密度, 批量, 检测项) 组合的统计"""
+
+    def __init__(self):
+        self.stats = LatencyStats("check")
+        self.matches = 0
+        self.inserted = 0
+        self.missed = 0
+
+    def record(self, response, elapsed_ms, inserted):
+        self.stats.record(elapsed_ms, response.status, len(response.body))
+        if not response.ok:
+            return
+        forbidden = response.json().get("forbidden")
+        if forbidden is not None:
+            self.matches += forbidden["count"]
+            self.inserted += inserted
+            # 插入了违禁词却没有检出，说明检测结果不可信，不只是慢
+            self.missed += inserted > 0 and not forbidden["hasForbidden"]
+
+
+async def run_cell(client, docs, platform, mode, batch, rounds):
+    cell = Cell()
+
+    async def check(text, inserted):
+        started = time.monotonic()
+        try:
+            response = await client.request("POST", "/api/v2/content/check", timeout=120, json_body={
+                "content": text, "platform": platform, "contentType": CONTENT_TYPES[platform],
+                "checkTypes": MODES[mode]})
+        except Exception as e:
+            cell.stats.record_error(e)
+            return
+        cell.record(response, (time.monotonic() - started) * 1000, inserted)
+
+    started = time.monotonic()
+    for r in range(rounds):
+        await asyncio.gather(*(check(*docs[(r * batch + i) % len(docs)]) for i in range(batch)))
+    elapsed = time.monotonic() - started
+    summary = cell.stats.summary()
+    attempts = summary["count"] + summary["errors"]
+    ok = sum(n for status, n in summary["statuses"].items() if status.startswith("2"))
+    return {
+        "docs": batch * rounds,
+        "elapsed": elapsed,
+        "docs_per_second": batch * rounds / elapsed if elapsed else 0.0,
+        "latency": summary,
+        "error_rate": (attempts - ok) / attempts if attempts else 0.0,
+        "mean_matches": cell.matches / summary["count"] if summary["count"] else 0.0,
+        "inserted": cell.inserted,
+        "missed": cell.missed,
+    }
+
+
+def slope(points):
+    """对数坐标下的最小二乘斜率：延迟 ∝ 长度^slope"""
+    points = [(math.log(x), math.log(y)) for x, y in points if x > 0 and y > 0]
+    if len(points) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    denominator = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / denominator if denominator else None
+
+
+async def run(args):
+    platforms = [p for p in args.platforms.split(",") if p.strip()]
+    lengths = _numbers(args.lengths)
+    densities = _numbers(args.densities, float)
+    batches = _numbers(args.batch)
+    modes = [m for m in args.mode.split(",") if m.strip()]
+    for mode in modes:
+        if mode not in MODES:
+            raise ValueError(f"未知检测项: {mode}，可选 {', '.join(MODES)}")
+    rng = random.Random(args.random_seed)
+    rows = []
+    dictionaries = {}
+
+    async with HttpClient(args.base_url, max_connections=max(batches)) as client:
+        await client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+        for platform in platforms:
+            dictionary = dictionaries[platform] = await load_dictionary(client, platform)
+            sentences = clean_sentences(platform, dictionary)
+            print(f"\n📝 {platform}: 词库 {len(dictionary)} 个词, 内容类型 {CONTENT_TYPES[platform]}")
+            for length in lengths:
+                for density in densities:
+                    # 每个组合的文档在各批量、检测项之间复用，差异只来自请求方式
+                    docs = [generate(rng, sentences, dictionary, length, density)
+                            for _ in range(min(max(batches) * args.rounds, 200))]
+                    for mode in modes:
+                        for batch in batches:
+                            result = await run_cell(client, docs, platform, mode, batch, args.rounds)
+                            rows.append({"platform": platform, "dictionary_size": len(dictionary), "length": length,
+                                         "density": density, "mode": mode, "batch": batch, **result})
+                            _print_row(rows[-1])
+
+    _print_scaling(rows)
+    return {
+        "benchmark": "content",
+        "config": {"platforms": platforms, "lengths": lengths, "densities": densities, "batch": batches,
+                   "rounds": args.rounds, "mode": modes},
+        "dictionary_sizes": {p: len(words) for p, words in dictionaries.items()},
+        "results": rows,
+        "scaling": scaling(rows),
+        "failed": any(r["error_rate"] > args.max_error_rate or r["missed"] for r in rows),
+    }
+
+
+def scaling(rows):
+    """各 (平台, 检测项) 下批量为 1 时 p50 随长度的对数斜率（各密度取平均）"""
+    result = {}
+    for platform in sorted({r["platform"] for r in rows}):
+        for mode in sorted({r["mode"] for r in rows}):
+            singles = [r for r in rows if r["platform"] == platform and r["mode"] == mode
+                       and r["batch"] == min(x["batch"] for x in rows)]
+            fits = [slope([(r["length"], r["latency"]["p50"]) for r in singles if r["density"] == d])
+                    for d in sorted({r["density"] for r in singles})]
+            fits = [f for f in fits if f is not None]
+            if fits:
+                result[f"{platform}/{mode}"] = sum(fits) / len(fits)
+    return result
+
+
+def _print_row(row):
+    latency = row["latency"]
+    missed = f"  ⚠️ 漏检 {row['missed']} 篇" if row["missed"] else ""
+    print(f"  {row['length']:>6} 字  密度 {row['density']:>4g}‰  {row['mode']:<9} 批量 {row['batch']:>3}  "
+          f"{row['docs_per_second']:>7.1f} 篇/秒  p50 {latency['p50']:>7.1f}ms  p95 {latency['p95']:>7.1f}ms  "
+          f"平均检出 {row['mean_matches']:.1f}  错误率 {row['error_rate']:.1%}{missed}")
+
+
+def _print_scaling(rows):
+    """延迟随长度的增长阶数，以及同长度下延迟与词库大小的关系"""
+    fits = scaling(rows)
+    if not fits:
+        return
+    print("\n" + "=" * 60)
+    print("延迟随文本长度的增长阶数 (p50 ∝ 长度^k，k≈1 为线性)")
+    print("=" * 60)
+    sizes = {r["platform"]: r["dictionary_size"] for r in rows}
+    for key, k in fits.items():
+        platform = key.split("/")[0]
+        flag = "  ⚠️ 超线性" if k > 1.2 else ""
+        print(f"  {key:<24} 词库 {sizes[platform]:>3}  k = {k:.2f}{flag}")
+
+    longest = max(r["length"] for r in rows)
+    batch = min(r["batch"] for r in rows)
+    for mode in sorted({r["mode"] for r in rows}):
+        by_platform = {}
+        for r in rows:
+            if r["length"] == longest and r["batch"] == batch and r["mode"] == mode:
+                by_platform.setdefault(r["platform"], []).append(r["latency"]["p50"])
+        if len(by_platform) < 2:
+            continue
+        print(f"\n  {longest} 字 / {mode}: 每词每千字耗时（与词库大小无关时各平台接近）")
+        for platform, values in sorted(by_platform.items(), key=lambda kv: sizes[kv[0]]):
+            p50 = sum(values) / len(values)
+            print(f"    {platform:<12} 词库 {sizes[platform]:>3}  p50 {p50:>7.1f}ms  "
+                  f"{p50 / sizes[platform] / (longest / 1000) * 1000:>6.1f}µs")
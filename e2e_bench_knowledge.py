@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+知识检索基准 (e2e_bench.py knowledge)
+通过 POST /api/v2/shops/[shopId]/knowledge 分阶段灌入合成文档，语料每增长到 --sizes 中的一个切片数，
+就用固定查询集在不同 topK / minSimilarity / 并发度下请求 /knowledge/search:
+  - 冷: 该语料规模下每条查询的第一次请求
+  - 热: 之后 --repeat 轮的重复请求
+报告每个组合的延迟分位数、平均返回条数和命中质量。
+
+合成文档按主题生成，标题带 [主题] 前缀，查询也按主题出题，因此可以统计:
+  命中率  至少返回一条同主题来源的查询占比
+  精确率  返回来源中同主题的占比
+
+注意: 每个切片在入库时都要生成一次嵌入向量，灌入大语料会产生相应的模型调用。
+"""
+
+import asyncio
+import random
+import time
+
+from e2e_auth import ADMIN_PASSWORD, ADMIN_USERNAME
+from e2e_http import HttpClient, LatencyStats, format_summary
+
+DESCRIPTION = "知识库检索在不同语料规模下的延迟与命中质量"
+
+# rag.ts 默认 chunkSize 为 500 字符，段落控制在其以内即一段一个切片
+PARAGRAPH_CHARS = 450
+
+TOPICS = {
+    "咖啡": ("手冲咖啡的水温建议在九十二度左右", "拿铁和澳白的区别在于奶泡厚度", "新鲜烘焙的咖啡豆需要养豆三到七天",
+             "冷萃咖啡需要冷藏浸泡十二小时以上", "意式浓缩的萃取时间一般在二十五到三十秒"),
+    "会员": ("会员储值满五百元赠送五十元", "会员生日当月享受八折优惠", "积分可以在下次消费时抵扣现金",
+             "金卡会员每月赠送一杯饮品", "会员等级按照近一年的累计消费计算"),
+    "营业": ("门店营业时间为早上八点到晚上十点", "节假日营业时间会提前在公众号通知", "周一上午十点前暂停堂食",
+             "外卖配送范围为门店三公里以内", "雨天外卖配送时间可能延长二十分钟"),
+    "甜品": ("招牌提拉米苏每天限量三十份", "芝士蛋糕使用新西兰进口奶油奶酪", "可颂每天早上七点新鲜出炉",
+             "季节限定的草莓塔只在春季供应", "所有甜品都可以提供无糖版本"),
+    "售后": ("饮品口味不满意可以在三十分钟内免费重做", "外卖洒漏请拍照联系客服补送", "预订的蛋糕需提前二十四小时取消",
+             "发票可以在小程序订单详情中申请", "过敏原信息可以向店员索取配料表"),
+}
+
+QUERIES = {
+    "咖啡": ("手冲咖啡用多少度的水", "咖啡豆烘焙后多久可以喝", "冷萃怎么做"),
+    "会员": ("储值有什么优惠", "生日有折扣吗", "积分怎么用"),
+    "营业": ("几点开门", "外卖送多远", "节假日营业吗"),
+    "甜品": ("提拉米苏每天有多少", "有没有无糖的蛋糕", "可颂几点出炉"),
+    "售后": ("饮品不好喝可以重做吗", "外卖洒了怎么办", "怎么开发票"),
+}
+
+
+def add_arguments(parser):
+    parser.add_argument("--shop-id", help="使用已有店铺；默认新建一个基准专用店铺")
+    parser.add_argument("--sizes", default="100,1000,10000",
+                        help="依次增长到的语料切片数，逗号分隔 (默认 100,1000,10000)")
+    parser.add_argument("--chunks-per-doc", type=int, default=50, help="每篇合成文档的段落数 (默认 50)")
+    parser.add_argument("--seed-concurrency", type=int, default=4, help="灌入文档的并发数 (默认 4)")
+    parser.add_argument("--no-seed", dest="seed", action="store_false",
+                        help="不灌入文档，只对现有语料跑一轮查询")
+    parser.add_argument("--top-k", default="5,20", help="topK 取值，逗号分隔 (默认 5,20)")
+    parser.add_argument("--min-similarity", default="0.5,0.7", help="minSimilarity 取值，逗号分隔 (默认 0.5,0.7)")
+    parser.add_argument("--concurrency", default="1,8", help="查询并发度，逗号分隔 (默认 1,8)")
+    parser.add_argument("--repeat", type=int, default=3, help="热请求轮数 (默认 3)")
+    parser.add_argument("--random-seed", type=int, default=42, help="合成文本随机种子 (默认 42)")
+
+
+def _numbers(text, cast):
+    return [cast(v) for v in text.split(",") if v.strip()]
+
+
+def synthetic_document(rng, topic, index, paragraphs):
+    """生成一篇单主题文档，每段接近 PARAGRAPH_CHARS 字符"""
+    sentences = TOPICS[topic]
+    body = []
+    for p in range(paragraphs):
+        parts = [f"第{index}篇第{p + 1}段。"]
+        while sum(len(s) for s in parts) < PARAGRAPH_CHARS - 40:
+            parts.append(rng.choice(sentences) + "。")
+        body.append("".join(parts))
+    return f"[{topic}] 合成知识文档 {index}", "\n\n".join(body)
+
+
+class Corpus:
+    def __init__(self, client, shop_id, chunks_per_doc, concurrency, rng):
+        self.client = client
+        self.shop_id = shop_id
+        self.chunks_per_doc = chunks_per_doc
+        self.concurrency = concurrency
+        self.rng = rng
+        self.chunks = 0
+        self.documents = 0
+        self.seed_stats = LatencyStats("seed")
+
+    async def grow_to(self, target):
+        """按主题轮流灌入文档，直到累计切片数达到 target"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        topics = list(TOPICS)
+
+        async def upload(index):
+            topic = topics[index % len(topics)]
+            title, content = synthetic_document(self.rng, topic, index, self.chunks_per_doc)
+            async with semaphore:
+                started = time.monotonic()
+                response = await self.client.request(
+                    "POST", f"/api/v2/shops/{self.shop_id}/knowledge", timeout=600,
+                    json_body={"title": title, "content": content, "category": "benchmark", "tags": [topic]})
+            self.seed_stats.record((time.monotonic() - started) * 1000, response.status, len(content.encode()))
+            if not response.ok:
+                raise RuntimeError(f"上传文档失败: {response.status} {response.text()[:200]}")
+            self.chunks += response.json().get("chunkCount", 0)
+
+        while self.chunks < target:
+            missing = target - self.chunks
+            batch = max(1, min(self.concurrency * 4, -(-missing // self.chunks_per_doc)))
+            await asyncio.gather(*(upload(self.documents + i) for i in range(batch)))
+            self.documents += batch
+            print(f"    已灌入 {self.documents} 篇 / {self.chunks} 个切片", end="\r")
+        print()
+
+
+def judge(topic, sources):
+    relevant = sum(1 for s in sources if str(s.get("title", "")).startswith(f"[{topic}]"))
+    return relevant, len(sources)
+
+
+async def run_queries(client, shop_id, top_k, min_similarity, concurrency, repeat):
+    """冷请求跑一遍查询集，热请求再跑 repeat 遍"""
+    queries = [(topic, q) for topic, items in QUERIES.items() for q in items]
+    semaphore = asyncio.Semaphore(concurrency)
+    cold, warm = LatencyStats("cold"), LatencyStats("warm")
+    quality = {"hits": 0, "queries": 0, "relevant": 0, "returned": 0}
+
+    async def search(topic, query, stats, score):
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                response = await client.request(
+                    "POST", f"/api/v2/shops/{shop_id}/knowledge/search", timeout=60,
+                    json_body={"query": query, "topK": top_k, "minSimilarity": min_similarity})
+            except Exception as e:
+                stats.record_error(e)
+                return
+            stats.record((time.monotonic() - started) * 1000, response.status, len(response.body))
+        if score and response.ok:
+            relevant, returned = judge(topic, response.json().get("sources", []))
+            quality["queries"] += 1
+            quality["hits"] += relevant > 0
+            quality["relevant"] += relevant
+            quality["returned"] += returned
+
+    await asyncio.gather(*(search(topic, q, cold, True) for topic, q in queries))
+    for _ in range(repeat):
+        await asyncio.gather(*(search(topic, q, warm, False) for topic, q in queries))
+    return cold.summary(), warm.summary(), {
+        "hit_rate": quality["hits"] / quality["queries"] if quality["queries"] else 0.0,
+        "precision": quality["relevant"] / quality["returned"] if quality["returned"] else 0.0,
+        "mean_results": quality["returned"] / quality["queries"] if quality["queries"] else 0.0,
+    }
+
+
+async def run(args):
+    sizes = _numbers(args.sizes, int) if args.seed else [0]
+    top_ks = _numbers(args.top_k, int)
+    similarities = _numbers(args.min_similarity, float)
+    concurrencies = _numbers(args.concurrency, int)
+    rows = []
+    failed = False
+
+    async with HttpClient(args.base_url, max_connections=max(concurrencies + [args.seed_concurrency])) as client:
+        await client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+        shop_id = args.shop_id
+        if not shop_id:
+            response = await client.request("POST", "/api/v2/shops", json_body={
+                "name": f"知识检索基准 {time.strftime('%Y%m%d-%H%M%S')}", "industry": "餐饮",
+                "description": "e2e_bench.py knowledge 自动创建"})
+            if not response.ok:
+                raise RuntimeError(f"创建店铺失败: {response.status} {response.text()[:200]}")
+            shop_id = response.json()["shop"]["id"]
+            print(f"\n🏪 已创建基准店铺 {shop_id}")
+
+        corpus = Corpus(client, shop_id, args.chunks_per_doc, args.seed_concurrency, random.Random(args.random_seed))
+        for size in sizes:
+            if args.seed:
+                print(f"\n📚 灌入语料到 {size} 个切片...")
+                started = time.monotonic()
+                await corpus.grow_to(size)
+                print(f"    耗时 {time.monotonic() - started:.1f}s, 单篇 {format_summary(corpus.seed_stats.summary())}")
+
+            print(f"\n🔎 语料 {corpus.chunks if args.seed else '现有'} 个切片:")
+            for top_k in top_ks:
+                for min_similarity in similarities:
+                    for concurrency in concurrencies:
+                        cold, warm, quality = await run_queries(
+                            client, shop_id, top_k, min_similarity, concurrency, args.repeat)
+                        bad = set(cold["statuses"]) | set(warm["statuses"])
+                        failed |= bool(cold["errors"] or warm["errors"] or any(not s.startswith("2") for s in bad))
+                        rows.append({"chunks": corpus.chunks, "top_k": top_k, "min_similarity": min_similarity,
+                                     "concurrency": concurrency, "cold": cold, "warm": warm, **quality})
+                        print(f"  topK={top_k:<3} minSim={min_similarity:<4} 并发 {concurrency:<3} "
+                              f"冷 p50 {cold['p50']:>6.0f}ms p95 {cold['p95']:>6.0f}ms  "
+                              f"热 p50 {warm['p50']:>6.0f}ms p95 {warm['p95']:>6.0f}ms p99 {warm['p99']:>6.0f}ms  "
+                              f"平均 {quality['mean_results']:.1f} 条  命中率 {quality['hit_rate']:.0%}  "
+                              f"精确率 {quality['precision']:.0%}")
+
+        seed_summary = corpus.seed_stats.summary()
+
+    _print_scaling(rows)
+    return {
+        "benchmark": "knowledge",
+        "shop_id": shop_id,
+        "config": {"sizes": sizes, "top_k": top_ks, "min_similarity": similarities,
+                   "concurrency": concurrencies, "repeat": args.repeat, "chunks_per_doc": args.chunks_per_doc},
+        "seed": seed_summary,
+        "results": rows,
+        "failed": failed,
+    }
+
+
+def _print_scaling(rows):
+    """按语料规模汇总热请求 p95，看检索延迟随切片数的增长趋势"""
+    by_size = {}
+    for row in rows:
+        by_size.setdefault(row["chunks"], []).append(row["warm"]["p95"])
+    if len(by_size) < 2:
+        return
+    print("\n" + "=" * 60)
+    print("语料规模与热请求 p95（各组合最大值）")
+    print("=" * 60)
+    peak = max(max(v) for v in by_size.values()) or 1
+    for size, values in sorted(by_size.items()):
+        worst = max(values)
+        print(f"  {size:>8} 切片 | {'█' * max(1, round(worst / peak * 40))} {worst:.0f}ms")
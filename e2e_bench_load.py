@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+API 端点压测 (e2e_bench.py load)
+对 e2e_test.py 中检查的 API 端点（e2e_endpoints.py）施加持续负载：
+  - 默认闭环模式：--concurrency 个 worker 各自循环请求
+  - --rps 开环模式：按目标速率发出请求，延迟从计划发送时刻算起（避免协调遗漏）
+输出吞吐、p50/p95/p99、延迟直方图和逐个状态码计数（401/405 等预期状态单独计数）。
+"""
+
+import asyncio
+import time
+
+from e2e_http import HttpClient, LatencyStats, format_summary
+from e2e_endpoints import API_ENDPOINTS, V2_API_ENDPOINTS
+
+DESCRIPTION = "API 端点吞吐与延迟压测"
+
+# 与 test_api_endpoints 的判定一致: 401=未认证, 405=GET 访问仅支持 POST 的接口
+EXPECTED_STATUSES = {path: {401} for path, _ in API_ENDPOINTS}
+EXPECTED_STATUSES.update({path: {401, 405} for path, _ in V2_API_ENDPOINTS})
+
+
+def add_arguments(parser):
+    parser.add_argument("--concurrency", type=int, default=16, help="并发连接数 (默认 16)")
+    parser.add_argument("--rps", type=float, default=0, help="目标每秒请求数，0 表示闭环满负载 (默认 0)")
+    parser.add_argument("--duration", type=float, default=30, help="压测时长秒数 (默认 30)")
+    parser.add_argument("--warmup", type=float, default=3, help="预热秒数，不计入统计 (默认 3)")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="只压测指定路径，可重复；默认全部")
+
+
+def is_expected(path, status):
+    return 200 <= status < 400 or status in EXPECTED_STATUSES.get(path, set())
+
+
+async def run(args):
+    targets = [path for path, _ in API_ENDPOINTS + V2_API_ENDPOINTS]
+    if args.endpoints:
+        targets = [path for path in targets if path in args.endpoints] or args.endpoints
+
+    stats = {path: LatencyStats(path) for path in targets}
+    unexpected = {path: 0 for path in targets}
+
+    async with HttpClient(args.base_url, max_connections=args.concurrency) as client:
+        async def hit(path, scheduled, record):
+            try:
+                response = await client.request("GET", path)
+            except Exception as e:
+                if record:
+                    stats[path].record_error(e)
+                return
+            if record:
+                stats[path].record((time.monotonic() - scheduled) * 1000, response.status, len(response.body))
+                if not is_expected(path, response.status):
+                    unexpected[path] += 1
+
+        if args.warmup > 0:
+            print(f"\n🔥 预热 {args.warmup:g}s...")
+            await _closed_loop(hit, targets, args.concurrency, args.warmup, record=False)
+
+        mode = f"开环 {args.rps:g} rps" if args.rps else f"闭环 {args.concurrency} 并发"
+        print(f"\n🚀 压测 {args.duration:g}s ({mode})，端点: {', '.join(targets)}")
+        started = time.monotonic()
+        if args.rps:
+            await _open_loop(hit, targets, args.rps, args.concurrency, args.duration)
+        else:
+            await _closed_loop(hit, targets, args.concurrency, args.duration, record=True)
+        elapsed = time.monotonic() - started
+        pool_stats = dict(client.stats)
+
+    return _report(stats, unexpected, elapsed, pool_stats, args)
+
+
+async def _closed_loop(hit, targets, concurrency, duration, record):
+    deadline = time.monotonic() + duration
+
+    async def worker(offset):
+        i = offset
+        while time.monotonic() < deadline:
+            await hit(targets[i % len(targets)], time.monotonic(), record)
+            i += 1
+
+    await asyncio.gather(*(worker(n) for n in range(concurrency)))
+
+
+async def _open_loop(hit, targets, rps, concurrency, duration):
+    started = time.monotonic()
+    total = int(rps * duration)
+    in_flight = asyncio.Semaphore(concurrency * 4)
+    tasks = []
+
+    async def fire(path, scheduled):
+        async with in_flight:
+            await hit(path, scheduled, True)
+
+    for i in range(total):
+        scheduled = started + i / rps
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(targets[i % len(targets)], scheduled)))
+    await asyncio.gather(*tasks)
+
+
+def _report(stats, unexpected, elapsed, pool_stats, args):
+    overall = LatencyStats("overall")
+    endpoints = {}
+
+    print("\n" + "=" * 60)
+    print("压测结果")
+    print("=" * 60)
+    for path, s in stats.items():
+        overall.merge(s)
+        summary = s.summary()
+        summary["rps"] = summary["count"] / elapsed if elapsed else 0.0
+        summary["unexpected"] = unexpected[path]
+        endpoints[path] = summary
+        statuses = ", ".join(f"{code}×{n}" for code, n in summary["statuses"].items()) or "无"
+        mark = "✅" if not unexpected[path] and not summary["errors"] else "❌"
+        print(f"  {mark} {path}")
+        print(f"      {summary['count']} 次  {summary['rps']:.1f} rps  状态码: {statuses}  错误: {summary['errors']}")
+        print(f"      {format_summary(summary)}")
+
+    total = overall.summary()
+    total["rps"] = total["count"] / elapsed if elapsed else 0.0
+    print("-" * 60)
+    print(f"总计: {total['count']} 次请求, {total['rps']:.1f} rps, 非预期状态 {sum(unexpected.values())}, 错误 {total['errors']}")
+    print(f"      {format_summary(total)}")
+    print(f"连接: 新建 {pool_stats['connections']}, 复用 {pool_stats['reused']}")
+    print("\n延迟分布:")
+    overall.print_histogram()
+
+    return {
+        "benchmark": "load",
+        "config": {"concurrency": args.concurrency, "rps": args.rps, "duration": args.duration},
+        "elapsed": elapsed,
+        "overall": total,
+        "endpoints": endpoints,
+        "histogram": [[str(bound), n] for bound, n in overall.histogram()],
+        "connections": pool_stats,
+        "failed": bool(sum(unexpected.values()) or total["errors"]),
+    }
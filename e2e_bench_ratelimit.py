@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+限流容量探测 (e2e_bench.py ratelimit)
+对接入了 lib/middleware/rateLimit.ts 的路由发送受控的突发和持续爬坡流量，
+用 X-Forwarded-For 模拟多个客户端 IP（getClientIP 取该头的第一个地址），记录:
+  - 每个 IP 在第几个请求开始收到 429，与 RATE_LIMIT_CONFIG 中的配置对比
+  - X-RateLimit-Limit / X-RateLimit-Reset / Retry-After 与实际窗口的偏差
+  - 爬坡时 429 出现的时刻和当时的发送速率
+  - 限流开销：429 短路响应、放行响应与不经过限流的 /api/health 的延迟对比，以及限流表变大后的延迟变化
+
+默认请求体是非法 JSON：/api/claude/chat 在限流检查之后先解析请求体，解析失败立即返回，
+放行的请求不会真正调用模型。
+"""
+
+import asyncio
+import ipaddress
+import math
+import os
+import random
+import re
+import time
+
+from e2e_http import HttpClient, LatencyStats, format_summary
+
+DESCRIPTION = "限流中间件的触发点、响应头准确性与开销探测"
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+RATE_LIMIT_SOURCE = os.path.join(ROOT, "lib", "middleware", "rateLimit.ts")
+
+BENCH_NETWORK = ipaddress.ip_network("198.18.0.0/15")
+
+CONFIG_PATTERN = re.compile(r"'([^']+)':\s*\{\s*requests:\s*(\d+),\s*windowMs:\s*([\d\s*]+),")
+CALL_PATTERN = re.compile(r"^(?!\s*//).*checkRateLimit\([^,]+,\s*'([^']+)'\)", re.MULTILINE)
+
+
+def load_config(path=RATE_LIMIT_SOURCE):
+    """从 rateLimit.ts 解析 RATE_LIMIT_CONFIG，返回 {路由键: (请求数, 窗口毫秒)}"""
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    return {key: (int(requests), math.prod(int(n) for n in window.split("*")))
+            for key, requests, window in CONFIG_PATTERN.findall(source)}
+
+
+def limited_routes(root=ROOT):
+    """扫描 app/api 下未被注释掉的 checkRateLimit 调用，返回 {URL 路径: 路由键}"""
+    routes = {}
+    api_root = os.path.join(root, "app", "api")
+    for directory, _, files in os.walk(api_root):
+        if "route.ts" not in files:
+            continue
+        with open(os.path.join(directory, "route.ts"), encoding="utf-8") as f:
+            keys = CALL_PATTERN.findall(f.read())
+        if keys:
+            routes["/" + os.path.relpath(directory, root).replace(os.sep, "/").removeprefix("app/")] = keys[0]
+    return routes
+
+
+def add_arguments(parser):
+    parser.add_argument("--route", default="/api/claude/chat", help="探测的路由 (默认 /api/claude/chat)")
+    parser.add_argument("--method", default="POST", help="请求方法 (默认 POST)")
+    parser.add_argument("--body", default="{not-json", help="请求体，默认为非法 JSON 以便放行后立即返回")
+    parser.add_argument("--mode", choices=("burst", "ramp", "all"), default="all", help="探测模式 (默认 all)")
+    parser.add_argument("--ips", type=int, default=8, help="突发模式模拟的客户端 IP 数 (默认 8)")
+    parser.add_argument("--burst", type=int, default=0, help="每个 IP 的突发请求数，默认为配置上限的 2 倍")
+    parser.add_argument("--ramp-from", type=float, default=0.1, help="爬坡起始速率 rps (默认 0.1)")
+    parser.add_argument("--ramp-to", type=float, default=2.0, help="爬坡结束速率 rps (默认 2)")
+    parser.add_argument("--ramp-duration", type=float, default=60, help="爬坡时长秒数 (默认 60)")
+    parser.add_argument("--table-sizes", default="0,1000,10000",
+                        help="测量开销前先用多少个不同 IP 填充限流表，逗号分隔 (默认 0,1000,10000)")
+    parser.add_argument("--verify-reset", action="store_true",
+                        help="等待 Retry-After 后再请求一次，确认窗口确实已重置（会等待一个窗口）")
+
+
+def fake_ip(prefix, index):
+    """在 198.18.0.0/15（基准测试保留网段）内取地址，不会与真实客户端冲突"""
+    return str(BENCH_NETWORK[1 + (prefix + index) % (BENCH_NETWORK.num_addresses - 2)])
+
+
+class Probe:
+    def __init__(self, client, args, limit, window_ms):
+        self.client = client
+        self.args = args
+        self.limit = limit
+        self.window_ms = window_ms
+        # 每次运行使用不同的 IP 段，避免命中上一次运行留下的窗口
+        self.prefix = random.randrange(BENCH_NETWORK.num_addresses)
+        self.allowed = LatencyStats("allowed")
+        self.limited = LatencyStats("429")
+        self.header_errors = {"limit": [], "reset_ms": [], "retry_after_s": []}
+
+    async def send(self, ip):
+        sent = time.time() * 1000
+        started = time.monotonic()
+        response = await self.client.request(self.args.method, self.args.route, body=self.args.body,
+                                             headers={"X-Forwarded-For": ip, "Content-Type": "application/json"})
+        latency = (time.monotonic() - started) * 1000
+        received = time.time() * 1000
+        (self.limited if response.status == 429 else self.allowed).record(latency, response.status, len(response.body))
+        return response, sent, received
+
+    def check_headers(self, response, window, received):
+        """对照期望值记录响应头偏差；没有相应头时跳过
+
+        服务端的窗口起点只能确定在 [第一个请求发出, 第一个放行响应收到] 之间，
+        Reset 落在该区间 + windowMs 内记为 0 偏差，否则记到区间边界的距离。
+        """
+        headers = response.headers
+        if "x-ratelimit-limit" in headers:
+            self.header_errors["limit"].append(int(headers["x-ratelimit-limit"]) - self.limit)
+        if "x-ratelimit-reset" in headers and window is not None:
+            reset = int(headers["x-ratelimit-reset"]) - self.window_ms
+            low, high = window
+            self.header_errors["reset_ms"].append(round(reset - low if reset < low else reset - high if reset > high else 0))
+        if "retry-after" in headers and "x-ratelimit-reset" in headers:
+            expected = math.ceil((int(headers["x-ratelimit-reset"]) - received) / 1000)
+            self.header_errors["retry_after_s"].append(int(headers["retry-after"]) - expected)
+
+    async def burst(self, ip, count):
+        """同一 IP 一次性并发 count 个请求，返回放行数和首个 429 的发送序号"""
+        results = await asyncio.gather(*(self.send(ip) for _ in range(count)))
+        window = (min(sent for _, sent, _ in results),
+                  min((received for r, _, received in results if r.status != 429), default=None))
+        window = window if window[1] is not None else None
+        allowed = 0
+        first_429 = None
+        for i, (response, _, received) in enumerate(results):
+            if response.status == 429:
+                first_429 = i + 1 if first_429 is None else first_429
+                self.check_headers(response, window, received)
+            else:
+                allowed += 1
+        last = next((r for r, _, _ in reversed(results) if r.status == 429), None)
+        return allowed, first_429, last
+
+    async def ramp(self, ip):
+        """单 IP 线性提升发送速率，记录第一个 429 出现的时刻与当时速率"""
+        duration = self.args.ramp_duration
+        low, high = self.args.ramp_from, self.args.ramp_to
+        started = time.monotonic()
+        timeline = []
+        tasks = []
+        elapsed = 0.0
+        while elapsed < duration:
+            rate = low + (high - low) * elapsed / duration
+            tasks.append(asyncio.create_task(self._timed(ip, started, rate, timeline)))
+            await asyncio.sleep(1 / rate)
+            elapsed = time.monotonic() - started
+        await asyncio.gather(*tasks)
+        timeline.sort()
+        first = next(((t, rate, n) for n, (t, rate, status) in enumerate(timeline, 1) if status == 429), None)
+        return timeline, first
+
+    async def _timed(self, ip, started, rate, timeline):
+        response, _, _ = await self.send(ip)
+        timeline.append((time.monotonic() - started, rate, response.status))
+
+
+async def run(args):
+    config = load_config()
+    routes = limited_routes()
+    key = routes.get(args.route)
+    if key is None:
+        print(f"\n⚠️  {args.route} 没有调用 checkRateLimit（当前接入限流的路由: {', '.join(routes) or '无'}），按 default 配置比对")
+    limit, window_ms = config.get(key, config["default"])
+    burst = args.burst or limit * 2
+    print(f"\n📏 {args.route} → 配置 {key or 'default'}: 每 {window_ms / 1000:g}s {limit} 次")
+
+    report = {"benchmark": "ratelimit", "route": args.route, "config_key": key,
+              "limit": limit, "window_ms": window_ms}
+    failed = False
+
+    async with HttpClient(args.base_url, max_connections=max(16, burst)) as client:
+        probe = Probe(client, args, limit, window_ms)
+
+        if args.mode in ("burst", "all"):
+            print(f"\n💥 突发: {args.ips} 个 IP，各并发 {burst} 个请求")
+            bursts = await asyncio.gather(*(probe.burst(fake_ip(probe.prefix, i), burst) for i in range(args.ips)))
+            allowed_counts = [allowed for allowed, _, _ in bursts]
+            exact = sum(1 for n in allowed_counts if n == limit)
+            print(f"   放行数: 最少 {min(allowed_counts)}, 最多 {max(allowed_counts)}, 与配置 {limit} 一致的 IP {exact}/{args.ips}")
+            failed |= exact != args.ips
+            report["burst"] = {"ips": args.ips, "per_ip": burst, "allowed": allowed_counts,
+                               "first_429": [first for _, first, _ in bursts]}
+
+            if args.verify_reset and bursts[0][2] is not None:
+                retry_after = int(bursts[0][2].headers.get("retry-after", window_ms / 1000))
+                print(f"   ⏳ 等待 Retry-After {retry_after}s 后验证窗口重置...")
+                await asyncio.sleep(retry_after + 0.5)
+                response, _, _ = await probe.send(fake_ip(probe.prefix, 0))
+                reset_ok = response.status != 429
+                print(f"   {'✅' if reset_ok else '❌'} 重置后请求状态 {response.status}")
+                report["burst"]["reset_verified"] = reset_ok
+                failed |= not reset_ok
+
+        if args.mode in ("ramp", "all"):
+            print(f"\n📈 爬坡: 单 IP 从 {args.ramp_from:g} 到 {args.ramp_to:g} rps，持续 {args.ramp_duration:g}s")
+            timeline, first = await probe.ramp(fake_ip(probe.prefix, 10_000))
+            sustainable = limit / (window_ms / 1000)
+            if first:
+                t, rate, n = first
+                print(f"   第 {n} 个请求 (t={t:.1f}s, 速率 {rate:.2f} rps) 开始收到 429；"
+                      f"固定窗口下持续可用速率 {sustainable:.2f} rps")
+            else:
+                print(f"   整个爬坡未触发 429（持续可用速率 {sustainable:.2f} rps）")
+            report["ramp"] = {"requests": len(timeline), "first_429": first, "sustainable_rps": sustainable,
+                              "limited": sum(1 for _, _, status in timeline if status == 429)}
+
+        print("\n🧾 响应头偏差 (实际 - 期望):")
+        headers_report = {}
+        for name, errors in probe.header_errors.items():
+            if not errors:
+                print(f"   {name:<14} 无样本")
+                continue
+            headers_report[name] = {"samples": len(errors), "min": min(errors), "max": max(errors)}
+            print(f"   {name:<14} {len(errors)} 个样本, 范围 {min(errors)} ~ {max(errors)}")
+        # limit 必须精确；reset 受客户端与服务端时钟及请求排队影响，允许 1s 误差；Retry-After 向上取整允许 ±1
+        failed |= any(e != 0 for e in probe.header_errors["limit"])
+        failed |= any(abs(e) > 1000 for e in probe.header_errors["reset_ms"])
+        failed |= any(abs(e) > 1 for e in probe.header_errors["retry_after_s"])
+        report["headers"] = headers_report
+
+        report["overhead"] = await _measure_overhead(probe, args)
+
+    report["allowed"] = probe.allowed.summary()
+    report["limited"] = probe.limited.summary()
+    report["failed"] = failed
+    return report
+
+
+async def _measure_overhead(probe, args):
+    """对比 /api/health、放行和 429 的延迟；再用大量 IP 填充限流表，观察 429 路径延迟的变化"""
+    print("\n⏱️  限流开销:")
+    baseline = LatencyStats("health")
+    for _ in range(50):
+        started = time.monotonic()
+        response = await probe.client.request("GET", "/api/health")
+        baseline.record((time.monotonic() - started) * 1000, response.status)
+    rows = {"health": baseline.summary(), "allowed": probe.allowed.summary(), "limited": probe.limited.summary()}
+    for name, summary in rows.items():
+        if summary["count"]:
+            print(f"   {name:<8} {summary['count']:>5} 次  {format_summary(summary)}")
+
+    hot_ip = fake_ip(probe.prefix, 20_000)
+    # 先把这个 IP 打到限流，之后的请求都走 429 短路路径
+    await asyncio.gather(*(probe.send(hot_ip) for _ in range(probe.limit)))
+    filled = 0
+    table = {}
+    for size in [int(v) for v in args.table_sizes.split(",") if v.strip()]:
+        semaphore = asyncio.Semaphore(32)
+
+        async def touch(i):
+            async with semaphore:
+                await probe.send(fake_ip(probe.prefix, 30_000 + i))
+
+        await asyncio.gather(*(touch(i) for i in range(filled, size)))
+        filled = max(filled, size)
+        stats = LatencyStats(f"table-{size}")
+        for _ in range(50):
+            started = time.monotonic()
+            response = await probe.client.request(args.method, args.route, body=args.body,
+                                                  headers={"X-Forwarded-For": hot_ip, "Content-Type": "application/json"})
+            stats.record((time.monotonic() - started) * 1000, response.status)
+        summary = stats.summary()
+        table[size] = summary
+        print(f"   限流表 ≥{size:>6} 个 IP 时 429 路径  {format_summary(summary)}")
+    rows["by_table_size"] = table
+    return rows
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+长时间浸泡测试 (e2e_bench.py soak)
+--users 个浏览器页面长时间循环执行「打开技能页 → 发送一条对话 → 离开技能页」，
+每隔 --interval 秒采样一次 /api/health 的服务端内存和各页面的 JS 堆（采样前先强制 GC），
+对预热之后的样本做最小二乘拟合，增长斜率超过 --max-growth 且后段内存下限高于前段时判定为泄漏。
+
+页面在整个测试期间不重新加载，技能页之间用客户端路由切换，
+对话 UI 卸载后仍未释放的状态会体现在浏览器堆的增长上；服务端的 MemoryCache / globalCache
+等进程内缓存泄漏体现在 heapUsedMB 上。
+
+对话接口按 IP 限流，每个页面的 context 带上 198.18.0.0/15 中不同的 X-Forwarded-For；
+对话返回 429 或其他非 2xx 时按状态码计数，这一轮不计入完成轮数。
+流程错误按类型和归一化后的消息计数，只保留最近几条原文，内存不随错误次数增长。
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from contextlib import AsyncExitStack
+
+import e2e_console
+from e2e_bench_ratelimit import BENCH_NETWORK, fake_ip
+from e2e_browser_pool import AsyncBrowserPool
+from e2e_http import HttpClient
+from e2e_readiness import HYDRATED_JS
+
+DESCRIPTION = "长时间循环技能页与对话流程，检测服务端和浏览器内存泄漏"
+
+CHAT_MESSAGE = "写一句简短的朋友圈文案，主题是周末喝咖啡"
+SPARK = "▁▂▃▄▅▆▇█"
+# 每个页面保留的最近错误原文条数
+RECENT_ERRORS = 5
+
+# 客户端路由切换页面，不可用时退回整页跳转
+SOFT_NAVIGATE_JS = """(url) => {
+    const router = window.next && window.next.router
+    if (!router || typeof router.push !== 'function') return false
+    router.push(url)
+    return true
+}"""
+
+
+def add_arguments(parser):
+    parser.add_argument("--duration", type=float, default=3600, help="测试时长秒数 (默认 3600)")
+    parser.add_argument("--interval", type=float, default=30, help="内存采样间隔秒数 (默认 30)")
+    parser.add_argument("--warmup", type=float, default=120, help="预热秒数，期间的样本不参与拟合 (默认 120)")
+    parser.add_argument("--users", type=int, default=2, help="并行循环的浏览器页面数 (默认 2)")
+    parser.add_argument("--skill", default="moments-copywriter", help="循环访问的技能 id (默认 moments-copywriter)")
+    parser.add_argument("--no-chat", dest="chat", action="store_false",
+                        help="只循环访问技能页，不发送对话（不消耗模型调用）")
+    parser.add_argument("--max-growth", type=float, default=50,
+                        help="允许的内存增长斜率 MB/小时，超过判为泄漏 (默认 50)")
+
+
+def fit_trend(points):
+    """最小二乘拟合 [(秒, MB)]，返回 (斜率 MB/小时, 决定系数 r²)"""
+    n = len(points)
+    if n < 2:
+        return 0.0, 0.0
+    mean_t = sum(t for t, _ in points) / n
+    mean_v = sum(v for _, v in points) / n
+    var_t = sum((t - mean_t) ** 2 for t, _ in points)
+    if var_t == 0:
+        return 0.0, 0.0
+    cov = sum((t - mean_t) * (v - mean_v) for t, v in points)
+    slope = cov / var_t
+    ss_tot = sum((v - mean_v) ** 2 for _, v in points)
+    ss_res = sum((v - (mean_v + slope * (t - mean_t))) ** 2 for t, v in points)
+    r2 = 1 - ss_res / ss_tot if ss_tot else 0.0
+    return slope * 3600, r2
+
+
+def detect_leak(points, max_growth, min_points=6):
+    """斜率超限且后 1/3 样本的最小值高于前 1/3 的最小值（GC 锯齿的下沿在抬升）才算泄漏"""
+    if len(points) < min_points:
+        return {"samples": len(points), "verdict": "insufficient"}
+    slope, r2 = fit_trend(points)
+    third = max(1, len(points) // 3)
+    floor_head = min(v for _, v in points[:third])
+    floor_tail = min(v for _, v in points[-third:])
+    leak = slope > max_growth and floor_tail > floor_head
+    return {
+        "samples": len(points),
+        "slope_mb_per_hour": round(slope, 2),
+        "r2": round(r2, 3),
+        "floor_growth_mb": round(floor_tail - floor_head, 2),
+        "start_mb": points[0][1],
+        "end_mb": points[-1][1],
+        "verdict": "leak" if leak else "ok",
+    }
+
+
+def sparkline(values, width=60):
+    if not values:
+        return ""
+    step = max(1, len(values) // width)
+    values = values[::step]
+    low, high = min(values), max(values)
+    span = high - low or 1
+    return "".join(SPARK[int((v - low) / span * (len(SPARK) - 1))] for v in values)
+
+
+class SoakUser:
+    """一个长期存活的页面，循环执行技能页 + 对话流程"""
+
+    def __init__(self, index, page, cdp, base_url, skill, chat):
+        self.index = index
+        self.page = page
+        self.cdp = cdp
+        self.base_url = base_url
+        self.skill = skill
+        self.chat = chat
+        self.iterations = 0
+        # "类型: 归一化消息" -> 次数
+        self.errors = Counter()
+        self.recent_errors = deque(maxlen=RECENT_ERRORS)
+        # 对话接口的非 2xx 状态码 -> 次数
+        self.chat_statuses = Counter()
+
+    async def navigate(self, path):
+        soft = await self.page.evaluate(SOFT_NAVIGATE_JS, path)
+        if soft:
+            await self.page.wait_for_url(f"**{path}", timeout=30000)
+        else:
+            await self.page.goto(f"{self.base_url}{path}", timeout=60000)
+        await self.page.wait_for_function(HYDRATED_JS, timeout=15000)
+
+    async def iteration(self):
+        await self.navigate(f"/skill/{self.skill}")
+        textarea = self.page.locator("textarea").first
+        await textarea.wait_for(timeout=15000)
+        if self.chat:
+            await textarea.fill(CHAT_MESSAGE)
+            async with self.page.expect_response(lambda r: "/api/claude/chat" in r.url, timeout=120000) as info:
+                await textarea.press("Enter")
+            response = await info.value
+            # 流式响应读完才算一轮对话结束
+            await response.finished()
+            if not response.ok:
+                # 被限流或出错的对话没有走完模型调用，不算完成的一轮
+                self.chat_statuses[response.status] += 1
+                await self.navigate("/")
+                return
+        # 离开技能页，让对话组件卸载
+        await self.navigate("/")
+        self.iterations += 1
+
+    async def loop(self, deadline):
+        while time.monotonic() < deadline:
+            try:
+                await self.iteration()
+            except Exception as e:
+                self.errors[f"{type(e).__name__}: {e2e_console.normalize(str(e))}"] += 1
+                self.recent_errors.append(f"{type(e).__name__}: {str(e)[:500]}")
+                try:
+                    await self.page.goto(f"{self.base_url}/", timeout=60000)
+                except Exception:
+                    await asyncio.sleep(5)
+
+    async def heap_mb(self):
+        """强制 GC 后读取 JS 堆占用，非 Chromium 或页面繁忙失败时返回 None"""
+        try:
+            await self.cdp.send("HeapProfiler.collectGarbage")
+            usage = await self.cdp.send("Runtime.getHeapUsage")
+        except Exception:
+            return None
+        return round(usage["usedSize"] / 1024 / 1024, 2)
+
+
+def _auth_state(base_url):
+    """对话需要登录；在线程里用同步 API 取登录态缓存"""
+    from e2e_auth import ensure_auth_state
+    from e2e_browser_pool import BrowserPool
+
+    with BrowserPool() as pool:
+        return ensure_auth_state(pool, base_url)
+
+
+async def run(args):
+    state = None
+    if args.chat:
+        try:
+            state = await asyncio.to_thread(_auth_state, args.base_url)
+        except Exception as e:
+            print(f"\n⚠️  登录失败，改为只循环访问技能页: {e}")
+            args.chat = False
+
+    samples = []
+    e2e_console.start()
+    started = time.monotonic()
+    deadline = started + args.duration
+
+    async with AsyncExitStack() as stack:
+        pool = await stack.enter_async_context(AsyncBrowserPool(context_hooks=[e2e_console.install]))
+        client = await stack.enter_async_context(HttpClient(args.base_url, max_connections=2))
+        users = []
+        # 每个页面一个模拟 IP，每次运行从不同的地址开始，避免命中上一次运行留下的限流窗口
+        prefix = random.randrange(BENCH_NETWORK.num_addresses)
+        for i in range(args.users):
+            options = {"extra_http_headers": {"X-Forwarded-For": fake_ip(prefix, i)}}
+            if state:
+                options["storage_state"] = state
+            context = await stack.enter_async_context(pool.context(**options))
+            page = await context.new_page()
+            cdp = await context.new_cdp_session(page)
+            await page.goto(f"{args.base_url}/", timeout=60000)
+            users.append(SoakUser(i, page, cdp, args.base_url, args.skill, args.chat))
+
+        async def sample():
+            entry = {"t": round(time.monotonic() - started, 1)}
+            try:
+                health = (await client.request("GET", "/api/health", timeout=10)).json()
+                memory = health.get("memory", {})
+                entry.update(status=health.get("status"), server_heap_mb=memory.get("heapUsedMB"),
+                             server_rss_mb=memory.get("rssMB"), uptime=health.get("uptime"))
+            except Exception as e:
+                entry["health_error"] = f"{type(e).__name__}: {e}"
+            entry["browser_heap_mb"] = await asyncio.gather(*(u.heap_mb() for u in users))
+            entry["iterations"] = sum(u.iterations for u in users)
+            samples.append(entry)
+            server = entry.get("server_heap_mb")
+            browsers = ", ".join(f"{v:.1f}" for v in entry["browser_heap_mb"] if v is not None)
+            print(f"  [{entry['t']:>7.0f}s] 服务端堆 {server if server is not None else '-'} MB  "
+                  f"浏览器堆 [{browsers}] MB  累计 {entry['iterations']} 轮  {entry.get('status', entry.get('health_error'))}")
+
+        async def sampler():
+            while time.monotonic() < deadline:
+                await sample()
+                await asyncio.sleep(min(args.interval, max(0.0, deadline - time.monotonic())))
+
+        mode = "技能页 + 对话" if args.chat else "仅技能页"
+        print(f"\n🛁 浸泡测试 {args.duration:g}s ({args.users} 个页面, {mode})，每 {args.interval:g}s 采样一次")
+        await asyncio.gather(sampler(), *(u.loop(deadline) for u in users))
+        await sample()
+
+    return _report(samples, users, time.monotonic() - started, args)
+
+
+def _report(samples, users, elapsed, args):
+    trended = [s for s in samples if s["t"] >= args.warmup] or samples
+    series = {
+        "server_heap": [(s["t"], s["server_heap_mb"]) for s in trended if s.get("server_heap_mb") is not None],
+        "server_rss": [(s["t"], s["server_rss_mb"]) for s in trended if s.get("server_rss_mb") is not None],
+    }
+    for user in users:
+        series[f"browser_heap_{user.index}"] = [(s["t"], s["browser_heap_mb"][user.index]) for s in trended
+                                                if s["browser_heap_mb"][user.index] is not None]
+
+    print("\n" + "=" * 60)
+    print("浸泡测试结果")
+    print("=" * 60)
+    trends = {}
+    for name, points in series.items():
+        trend = detect_leak(points, args.max_growth)
+        trends[name] = trend
+        if trend["verdict"] == "insufficient":
+            print(f"  ⚪ {name}: 样本不足 ({trend['samples']} 个)")
+            continue
+        mark = "❌" if trend["verdict"] == "leak" else "✅"
+        print(f"  {mark} {name}: {trend['start_mb']:.1f} → {trend['end_mb']:.1f} MB, "
+              f"斜率 {trend['slope_mb_per_hour']:+.1f} MB/h (r²={trend['r2']:.2f}), 下沿增长 {trend['floor_growth_mb']:+.1f} MB")
+        print(f"      {sparkline([v for _, v in points])}")
+
+    degraded = [s for s in samples if s.get("status") not in (None, "ok")]
+    errors = sum((u.errors for u in users), Counter())
+    chat_statuses = sum((u.chat_statuses for u in users), Counter())
+    iterations = sum(u.iterations for u in users)
+    print("-" * 60)
+    print(f"共 {iterations} 轮 ({iterations / elapsed * 3600:.0f} 轮/小时), 流程错误 {sum(errors.values())}, "
+          f"health 非 ok 样本 {len(degraded)}")
+    if chat_statuses:
+        print("  ⚠️  对话未完成: " + ", ".join(f"{status} ×{n}" for status, n in sorted(chat_statuses.items()))
+              + (" (429 为被限流)" if 429 in chat_statuses else ""))
+    for error, count in errors.most_common(5):
+        print(f"  ⚠️  {error} (×{count})")
+    # 长时间运行的控制台消息只保留去重计数，内存不随时长增长
+    console = e2e_console.finish()
+    e2e_console.print_summary(console)
+
+    leaks = [name for name, t in trends.items() if t["verdict"] == "leak"]
+    return {
+        "benchmark": "soak",
+        "config": {"duration": args.duration, "interval": args.interval, "warmup": args.warmup,
+                   "users": args.users, "skill": args.skill, "chat": args.chat, "max_growth": args.max_growth},
+        "elapsed": elapsed,
+        "iterations": iterations,
+        "chat_statuses": {str(status): n for status, n in sorted(chat_statuses.items())},
+        "rate_limited": chat_statuses[429],
+        "errors": dict(errors.most_common()),
+        "recent_errors": [e for u in users for e in u.recent_errors],
+        "samples": samples,
+        "trends": trends,
+        "console": console,
+        "leaks": leaks,
+        "failed": bool(leaks or degraded),
+    }
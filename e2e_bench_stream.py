@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+对话 / 生成接口的首字节与流式吞吐基准 (e2e_bench.py stream)
+登录后向 /api/claude/chat 和 /api/v2/generate 发送真实的技能提示词（如 moments-copywriter），
+在不同并发度下记录:
+  TTFB    响应头到达时间
+  TTFT    第一段正文内容到达时间（缓冲响应等于整包到达时间）
+  总耗时  响应读完的时间
+  tok/s   输出 token 数 / 生成时长；token 数优先取响应中的 tokenCount，否则按 rag.ts 的 estimateTokens 估算
+并按分块到达的时间分布判断响应方式:
+  streamed   多个分块且正文到达跨度超过 STREAM_SPREAD_MS，用户能看到逐步输出
+  chunked    使用 chunked 传输但正文几乎同时到达，实际仍是整包
+  buffered   Content-Length 一次性返回
+
+注意: 每个请求都会真实调用模型；返回 isMock 的模拟响应单独计数，不代表模型延迟。
+/api/claude/chat 按 IP 限流 (20 次 / 60s)，每个请求使用 198.18.0.0/15 中不同的 X-Forwarded-For；
+仍被限流的 429 响应单独计数，不计入 TTFB / TTFT / 耗时统计。
+"""
+
+import asyncio
+import json
+import random
+import re
+import time
+
+from e2e_auth import ADMIN_PASSWORD, ADMIN_USERNAME
+from e2e_bench_ratelimit import BENCH_NETWORK, fake_ip
+from e2e_http import HttpClient, LatencyStats, format_summary
+
+DESCRIPTION = "对话与生成接口的 TTFB / 首 token / 流式吞吐基准"
+
+# 正文分块首末到达间隔超过该值才算真正的流式输出
+STREAM_SPREAD_MS = 100
+
+ENDPOINTS = {
+    "chat": ("/api/claude/chat", lambda prompt: {"skillId": "moments-copywriter", "message": prompt}),
+    "generate": ("/api/v2/generate", lambda prompt: {"feature": "moments", "skillId": "moments-copywriter",
+                                                      "message": prompt, "options": {"skipQualityScore": True}}),
+}
+
+PROMPTS = (
+    "帮我写一条朋友圈文案，宣传本周末咖啡买一送一活动，语气轻松",
+    "新品桂花拿铁上市，写一条适合发朋友圈的文案，带两个表情",
+    "写一条朋友圈文案，感谢老顾客一年来的支持，并预告会员日",
+    "下雨天外卖满三十减五，写一条简短的朋友圈文案",
+)
+
+CHINESE = re.compile(r"[\u4e00-\u9fff]")
+
+
+def estimate_tokens(text):
+    """与 lib/ai/rag.ts estimateTokens 一致：中文字符 × 1.5 + 英文词数"""
+    chinese = len(CHINESE.findall(text))
+    words = len(CHINESE.sub(" ", text).split())
+    return -(-int(chinese * 3) // 2) + words
+
+
+def add_arguments(parser):
+    parser.add_argument("--endpoint", choices=tuple(ENDPOINTS), action="append", dest="endpoints",
+                        help="只测指定接口，可重复；默认全部")
+    parser.add_argument("--concurrency", default="1,4,8", help="并发度，逗号分隔 (默认 1,4,8)")
+    parser.add_argument("--requests", type=int, default=8, help="每个并发度下的请求数 (默认 8)")
+    parser.add_argument("--timeout", type=float, default=120, help="单个请求超时秒数 (默认 120)")
+
+
+def parse_output(response):
+    """提取输出文本和 token 数；SSE 响应拼接各 data 事件中的内容"""
+    content_type = response.headers.get("content-type", "")
+    text = response.text()
+    if "event-stream" in content_type:
+        parts = []
+        for line in text.splitlines():
+            if not line.startswith("data:") or line.strip() == "data: [DONE]":
+                continue
+            payload = line[5:].strip()
+            try:
+                event = json.loads(payload)
+                parts.append(str(event.get("content") or event.get("delta") or event.get("text") or ""))
+            except (ValueError, AttributeError):
+                parts.append(payload)
+        output = "".join(parts)
+        return output, estimate_tokens(output), False
+    try:
+        data = response.json()
+    except ValueError:
+        return text, estimate_tokens(text), False
+    if not isinstance(data, dict):
+        return text, estimate_tokens(text), False
+    output = str(data.get("content") or "")
+    return output, data.get("tokenCount") or estimate_tokens(output), bool(data.get("isMock"))
+
+
+def classify(response):
+    chunks = [(t, n) for t, n in response.chunks if n > 0]
+    spread = chunks[-1][0] - chunks[0][0] if len(chunks) > 1 else 0.0
+    if len(chunks) > 1 and spread >= STREAM_SPREAD_MS:
+        return "streamed", spread
+    if "chunked" in response.headers.get("transfer-encoding", "").lower():
+        return "chunked", spread
+    return "buffered", spread
+
+
+class Level:
+    """一个接口在一个并发度下的统计"""
+
+    def __init__(self):
+        self.ttfb = LatencyStats("ttfb")
+        self.ttft = LatencyStats("ttft")
+        self.total = LatencyStats("total")
+        self.rates = []
+        self.modes = {"streamed": 0, "chunked": 0, "buffered": 0}
+        self.mocks = 0
+        self.failures = 0
+        self.limited = 0
+
+    def record(self, response):
+        if response.status == 429:
+            # 被限流的请求没有走到模型，计入延迟统计会拉低各分位数
+            self.limited += 1
+            return
+        if not response.ok:
+            self.failures += 1
+            self.total.record(response.timings["total"], response.status)
+            return
+        output, tokens, mock = parse_output(response)
+        mode, spread = classify(response)
+        first = next((t for t, n in response.chunks if n > 0), response.timings["total"])
+        self.modes[mode] += 1
+        self.mocks += mock
+        self.ttfb.record(response.timings["ttfb"], response.status)
+        self.ttft.record(first)
+        self.total.record(response.timings["total"], response.status, len(response.body))
+        # 流式响应按生成时长算吞吐，缓冲响应只能按端到端时长算
+        duration = spread if mode == "streamed" else response.timings["total"]
+        if tokens and duration > 0:
+            self.rates.append(tokens / (duration / 1000))
+
+    def summary(self):
+        return {
+            "ttfb": self.ttfb.summary(),
+            "ttft": self.ttft.summary(),
+            "total": self.total.summary(),
+            "tokens_per_second": sum(self.rates) / len(self.rates) if self.rates else 0.0,
+            "modes": dict(self.modes),
+            "mocks": self.mocks,
+            "failures": self.failures,
+            "limited": self.limited,
+            "errors": dict(self.total.errors),
+        }
+
+
+async def run(args):
+    endpoints = args.endpoints or list(ENDPOINTS)
+    levels = [int(v) for v in args.concurrency.split(",") if v.strip()]
+    results = {}
+    failed = False
+    # 每次运行从不同的地址开始，避免命中上一次运行留下的限流窗口
+    prefix = random.randrange(BENCH_NETWORK.num_addresses)
+    sent = 0
+
+    async with HttpClient(args.base_url, max_connections=max(levels), timeout=args.timeout) as client:
+        await client.login(ADMIN_USERNAME, ADMIN_PASSWORD)
+        for name in endpoints:
+            path, build = ENDPOINTS[name]
+            results[name] = {}
+            print(f"\n🌊 {path}")
+            for concurrency in levels:
+                level = Level()
+                semaphore = asyncio.Semaphore(concurrency)
+
+                async def send(i, ip):
+                    async with semaphore:
+                        try:
+                            response = await client.request("POST", path, json_body=build(PROMPTS[i % len(PROMPTS)]),
+                                                            headers={"X-Forwarded-For": ip})
+                        except Exception as e:
+                            level.total.record_error(e)
+                            return
+                    level.record(response)
+
+                started = time.monotonic()
+                await asyncio.gather(*(send(i, fake_ip(prefix, sent + i)) for i in range(args.requests)))
+                sent += args.requests
+                summary = level.summary()
+                summary["elapsed"] = time.monotonic() - started
+                results[name][concurrency] = summary
+                failed |= bool(summary["failures"] or summary["errors"] or summary["limited"])
+                modes = ", ".join(f"{k} {v}" for k, v in summary["modes"].items() if v) or "无"
+                print(f"  并发 {concurrency:<3} TTFB p50 {summary['ttfb']['p50']:>7.0f}ms  "
+                      f"TTFT p50 {summary['ttft']['p50']:>7.0f}ms  总耗时 {format_summary(summary['total'])}")
+                print(f"           {summary['tokens_per_second']:>6.1f} tok/s  方式: {modes}  "
+                      f"失败 {summary['failures'] + summary['total']['errors']}"
+                      + (f"  ⚠️  被限流 {summary['limited']}" if summary["limited"] else "")
+                      + (f"  ⚠️  模拟响应 {summary['mocks']}" if summary["mocks"] else ""))
+
+    _print_verdict(results, levels)
+    return {
+        "benchmark": "stream",
+        "config": {"endpoints": endpoints, "concurrency": levels, "requests": args.requests},
+        "results": {name: {str(c): s for c, s in by_level.items()} for name, by_level in results.items()},
+        "failed": failed,
+    }
+
+
+def _print_verdict(results, levels):
+    print("\n" + "=" * 60)
+    print("结论")
+    print("=" * 60)
+    for name, by_level in results.items():
+        modes = {k: sum(s["modes"][k] for s in by_level.values()) for k in ("streamed", "chunked", "buffered")}
+        streaming = "✅ 流式输出" if modes["streamed"] and not modes["buffered"] + modes["chunked"] else \
+            "⚠️  部分流式" if modes["streamed"] else "❌ 未流式，用户需等待整包返回"
+        print(f"  {name}: {streaming} ({', '.join(f'{k} {v}' for k, v in modes.items())})")
+        low, high = by_level.get(levels[0]), by_level.get(levels[-1])
+        if low and high and len(levels) > 1 and low["ttft"]["p50"]:
+            ratio = high["ttft"]["p50"] / low["ttft"]["p50"]
+            print(f"      并发 {levels[0]} → {levels[-1]}: 首 token p50 {low['ttft']['p50']:.0f}ms → "
+                  f"{high['ttft']['p50']:.0f}ms ({ratio:.1f}×)")
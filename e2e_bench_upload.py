@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+"""
+图片上传与照片分析吞吐基准 (e2e_bench.py upload)
+在内存中按 --resolution / --format 生成测试图片，用连接池并发以 multipart/form-data 上传到
+/api/upload/image（可选 /api/analyze-photo），在不同并发度下报告:
+  吞吐    上传字节数 / 该并发度的墙钟时间 (MB/s) 和请求数/秒
+  延迟    p50 / p95 / p99
+  失败率  5xx 与连接错误视为服务端失败，4xx（类型、10MB 上限校验）单独计数
+  存储    响应中 storage 字段的分布（supabase / base64 回退）
+吞吐增长不足 SATURATION_GAIN 时的并发度记为饱和点。
+
+客户端压缩: components/ConversationView.tsx 上传前会调用 lib/utils/image-compression.ts 的 compressImage。
+该函数依赖浏览器 canvas，这里在 Chromium 页面中按同样的步骤（等比缩放 + JPEG 质量逐级下调到 0.3）
+压缩每张测试图片，报告压缩比和耗时，并把压缩后的图片作为独立的一组负载一起上传，便于对比。
+
+PNG 在 Python 中直接编码；JPEG / WebP 由浏览器 canvas 从同一张 PNG 转码。
+像素是逐行的小步长随机游走，压缩率接近实拍照片，而不是纯色（过度可压缩）或白噪声（不可压缩）。
+
+注意: /api/analyze-photo 每个请求都会真实调用视觉模型，默认不测，需要显式 --endpoint analyze。
+"""
+
+import asyncio
+import base64
+import random
+import struct
+import time
+import uuid
+import zlib
+
+from e2e_http import HttpClient, LatencyStats, format_summary
+
+DESCRIPTION = "图片上传 / 照片分析的并发吞吐、失败率与客户端压缩效果"
+
+FORMATS = {"png": "image/png", "jpeg": "image/jpeg", "webp": "image/webp"}
+
+# (路径, multipart 字段名)
+ENDPOINTS = {
+    "upload": ("/api/upload/image", "file"),
+    "analyze": ("/api/analyze-photo", "image"),
+}
+
+# 与 ConversationView.tsx 调用 compressImage 时传入的参数一致
+COMPRESSION = {"maxWidth": 1280, "maxHeight": 720, "quality": 0.7, "maxSizeKB": 300}
+
+# 相机直出 JPEG / WebP 的编码质量
+CAMERA_QUALITY = 0.92
+
+# 并发度翻倍后吞吐增长低于该比例即视为饱和
+SATURATION_GAIN = 0.1
+
+# 浏览器内 canvas 转码，返回 base64
+ENCODE_JS = """async ({data, type, quality}) => {
+    const blob = await (await fetch(`data:image/png;base64,${data}`)).blob()
+    const bitmap = await createImageBitmap(blob)
+    const canvas = document.createElement('canvas')
+    canvas.width = bitmap.width
+    canvas.height = bitmap.height
+    canvas.getContext('2d').drawImage(bitmap, 0, 0)
+    const out = await new Promise(resolve => canvas.toBlob(resolve, type, quality))
+    const url = await new Promise(resolve => {
+        const reader = new FileReader()
+        reader.onload = () => resolve(reader.result)
+        reader.readAsDataURL(out)
+    })
+    return url.slice(url.indexOf(',') + 1)
+}"""
+
+# 逐步复刻 lib/utils/image-compression.ts compressImage
+COMPRESS_JS = """async ({data, type, options}) => {
+    const started = performance.now()
+    const file = await (await fetch(`data:${type};base64,${data}`)).blob()
+    if (file.size <= options.maxSizeKB * 1024) {
+        return {data, type, skipped: true, quality: null, ms: performance.now() - started}
+    }
+    const img = new Image()
+    await new Promise((resolve, reject) => {
+        img.onload = resolve
+        img.onerror = () => reject(new Error('图片加载失败'))
+        img.src = URL.createObjectURL(file)
+    })
+    let { width, height } = img
+    if (width > options.maxWidth) {
+        height = (height * options.maxWidth) / width
+        width = options.maxWidth
+    }
+    if (height > options.maxHeight) {
+        width = (width * options.maxHeight) / height
+        height = options.maxHeight
+    }
+    const canvas = document.createElement('canvas')
+    canvas.width = width
+    canvas.height = height
+    canvas.getContext('2d').drawImage(img, 0, 0, width, height)
+    let quality = options.quality
+    let blob
+    while (true) {
+        blob = await new Promise(resolve => canvas.toBlob(resolve, 'image/jpeg', quality))
+        if (blob.size > options.maxSizeKB * 1024 && quality > 0.3) {
+            quality -= 0.1
+            continue
+        }
+        break
+    }
+    const url = await new Promise(resolve => {
+        const reader = new FileReader()
+        reader.onload = () => resolve(reader.result)
+        reader.readAsDataURL(blob)
+    })
+    return {data: url.slice(url.indexOf(',') + 1), type: 'image/jpeg', skipped: false,
+            quality, width: canvas.width, height: canvas.height, ms: performance.now() - started}
+}"""
+
+
+def add_arguments(parser):
+    parser.add_argument("--resolution", action="append", dest="resolutions",
+                        help="图片尺寸 WxH，可重复 (默认 1280x720, 1920x1080, 4032x3024)")
+    parser.add_argument("--format", choices=tuple(FORMATS), action="append", dest="formats",
+                        help="图片格式，可重复 (默认 jpeg)")
+    parser.add_argument("--endpoint", choices=tuple(ENDPOINTS), action="append", dest="endpoints",
+                        help="被测接口，可重复 (默认只测 upload；analyze 会调用视觉模型)")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="并发度，逗号分隔 (默认 1,4,8,16)")
+    parser.add_argument("--requests", type=int, default=32, help="每个并发度下的请求数 (默认 32)")
+    parser.add_argument("--timeout", type=float, default=120, help="单个请求超时秒数 (默认 120)")
+    parser.add_argument("--no-compress", dest="compress", action="store_false",
+                        help="不测量客户端压缩，也不上传压缩后的图片")
+    parser.add_argument("--random-seed", type=int, default=42, help="图片像素随机种子 (默认 42)")
+
+
+def parse_resolution(text):
+    width, _, height = text.lower().partition("x")
+    return int(width), int(height)
+
+
+def make_png(width, height, rng):
+    """生成 RGB PNG；每行使用 Sub 滤波，滤波后的字节是 -3~+4 的小步长，解码后为随机游走纹理"""
+    deltas = bytes((n % 8 - 3) % 256 for n in range(256))
+    rows = []
+    for _ in range(height):
+        rows.append(b"\x01" + rng.randbytes(width * 3).translate(deltas))
+    raw = b"".join(rows)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header)
+            + chunk(b"IDAT", zlib.compress(raw, 6)) + chunk(b"IEND", b""))
+
+
+def multipart(field, filename, content_type, data):
+    """构造单文件 multipart/form-data 请求体，返回 (body, Content-Type)"""
+    boundary = f"----e2e{uuid.uuid4().hex}"
+    head = (f"--{boundary}\r\n"
+            f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n").encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+    return head + data + tail, f"multipart/form-data; boundary={boundary}"
+
+
+class Payload:
+    """一张待上传的图片"""
+
+    def __init__(self, name, content_type, data, width, height):
+        self.name = name
+        self.content_type = content_type
+        self.data = data
+        self.width = width
+        self.height = height
+
+    @property
+    def filename(self):
+        ext = "jpg" if self.content_type == "image/jpeg" else self.content_type.split("/")[1]
+        return f"bench-{self.name}.{ext}"
+
+
+async def prepare_payloads(resolutions, formats, compress, seed):
+    """生成原图负载，需要时在浏览器中转码并执行客户端压缩；返回 (原图, 压缩后, 压缩统计)"""
+    rng = random.Random(seed)
+    pngs = {}
+    for width, height in resolutions:
+        started = time.monotonic()
+        pngs[(width, height)] = make_png(width, height, rng)
+        print(f"  🖼️  生成 {width}x{height} PNG {len(pngs[(width, height)]) / 1024:.0f}KB "
+              f"({(time.monotonic() - started) * 1000:.0f}ms)")
+
+    originals = [Payload(f"{w}x{h}-png", "image/png", data, w, h)
+                 for (w, h), data in pngs.items() if "png" in formats]
+    needs_browser = compress or any(f != "png" for f in formats)
+    if not needs_browser:
+        return originals, [], []
+
+    from e2e_browser_pool import AsyncBrowserPool
+
+    compressed, stats = [], []
+    async with AsyncBrowserPool() as pool, pool.page() as page:
+        for (width, height), png in pngs.items():
+            encoded = base64.b64encode(png).decode()
+            for fmt in formats:
+                if fmt == "png":
+                    continue
+                data = await page.evaluate(ENCODE_JS, {"data": encoded, "type": FORMATS[fmt],
+                                                       "quality": CAMERA_QUALITY})
+                originals.append(Payload(f"{width}x{height}-{fmt}", FORMATS[fmt],
+                                         base64.b64decode(data), width, height))
+        if compress:
+            for payload in list(originals):
+                result = await page.evaluate(COMPRESS_JS, {
+                    "data": base64.b64encode(payload.data).decode(), "type": payload.content_type,
+                    "options": COMPRESSION})
+                data = base64.b64decode(result["data"])
+                compressed.append(Payload(f"{payload.name}-compressed", result["type"], data,
+                                          result.get("width", payload.width), result.get("height", payload.height)))
+                stats.append({"name": payload.name, "original_bytes": len(payload.data), "compressed_bytes": len(data),
+                              "ratio": len(data) / len(payload.data), "quality": result["quality"],
+                              "skipped": result["skipped"], "ms": result["ms"]})
+    return originals, compressed, stats
+
+
+async def run_level(client, path, field, payloads, concurrency, requests):
+    """以固定并发度轮流上传负载，返回该并发度的汇总"""
+    stats = LatencyStats(f"c{concurrency}")
+    storage = {}
+    semaphore = asyncio.Semaphore(concurrency)
+    sent = [0]
+
+    async def send(i):
+        payload = payloads[i % len(payloads)]
+        body, content_type = multipart(field, payload.filename, payload.content_type, payload.data)
+        async with semaphore:
+            try:
+                response = await client.request("POST", path, body=body, headers={"Content-Type": content_type})
+            except Exception as e:
+                stats.record_error(e)
+                return
+        stats.record(response.timings["total"], response.status, len(payload.data))
+        if response.ok:
+            sent[0] += len(payload.data)
+            try:
+                mode = response.json().get("storage", "-")
+            except (ValueError, AttributeError):
+                mode = "-"
+            storage[mode] = storage.get(mode, 0) + 1
+
+    started = time.monotonic()
+    await asyncio.gather(*(send(i) for i in range(requests)))
+    elapsed = time.monotonic() - started
+    summary = stats.summary()
+    server_failures = summary["errors"] + sum(n for s, n in summary["statuses"].items() if s.startswith("5"))
+    client_rejects = sum(n for s, n in summary["statuses"].items() if s.startswith("4"))
+    return {
+        "latency": summary,
+        "elapsed": elapsed,
+        "bytes_per_second": sent[0] / elapsed if elapsed else 0.0,
+        "requests_per_second": (requests - server_failures - client_rejects) / elapsed if elapsed else 0.0,
+        "server_failure_rate": server_failures / requests if requests else 0.0,
+        "rejected": client_rejects,
+        "storage": storage,
+    }
+
+
+def find_saturation(by_level):
+    """返回吞吐不再随并发明显增长的第一个并发度，未饱和返回 None"""
+    levels = sorted(by_level)
+    for low, high in zip(levels, levels[1:]):
+        before, after = by_level[low]["bytes_per_second"], by_level[high]["bytes_per_second"]
+        if before and after < before * (1 + SATURATION_GAIN):
+            return low
+    return None
+
+
+async def run(args):
+    resolutions = [parse_resolution(r) for r in (args.resolutions or ["1280x720", "1920x1080", "4032x3024"])]
+    formats = args.formats or ["jpeg"]
+    endpoints = args.endpoints or ["upload"]
+    levels = [int(v) for v in args.concurrency.split(",") if v.strip()]
+
+    print("\n📦 准备测试图片...")
+    originals, compressed, compression = await prepare_payloads(resolutions, formats, args.compress, args.random_seed)
+    if compression:
+        _print_compression(compression)
+
+    groups = {"original": originals}
+    if compressed:
+        groups["compressed"] = compressed
+
+    results = {}
+    failed = False
+    async with HttpClient(args.base_url, max_connections=max(levels), timeout=args.timeout) as client:
+        for name in endpoints:
+            path, field = ENDPOINTS[name]
+            results[name] = {}
+            for group, payloads in groups.items():
+                print(f"\n📤 {path} ({group}, {len(payloads)} 种图片, 平均 "
+                      f"{sum(len(p.data) for p in payloads) / len(payloads) / 1024:.0f}KB)")
+                by_level = {}
+                for concurrency in levels:
+                    level = await run_level(client, path, field, payloads, concurrency, args.requests)
+                    by_level[concurrency] = level
+                    failed |= level["server_failure_rate"] > 0
+                    storage = ", ".join(f"{k} {v}" for k, v in level["storage"].items()) or "-"
+                    print(f"  并发 {concurrency:<3} {level['bytes_per_second'] / 1024 / 1024:>7.2f} MB/s  "
+                          f"{level['requests_per_second']:>6.1f} req/s  {format_summary(level['latency'])}")
+                    print(f"           服务端失败 {level['server_failure_rate']:.1%}  拒绝(4xx) {level['rejected']}  "
+                          f"存储: {storage}")
+                saturation = find_saturation(by_level)
+                results[name][group] = {"levels": {str(c): v for c, v in by_level.items()}, "saturation": saturation}
+                if saturation is not None:
+                    print(f"  📈 吞吐在并发 {saturation} 附近饱和 "
+                          f"({by_level[saturation]['bytes_per_second'] / 1024 / 1024:.2f} MB/s)")
+                else:
+                    print(f"  📈 并发 {levels[-1]} 以内吞吐仍在增长")
+
+    return {
+        "benchmark": "upload",
+        "config": {"resolutions": [f"{w}x{h}" for w, h in resolutions], "formats": formats,
+                   "endpoints": endpoints, "concurrency": levels, "requests": args.requests,
+                   "compression": COMPRESSION if args.compress else None},
+        "compression": compression,
+        "results": results,
+        "failed": failed,
+    }
+
+
+def _print_compression(rows):
+    print("\n🗜️  客户端压缩 (compressImage, "
+          + ", ".join(f"{k}={v}" for k, v in COMPRESSION.items()) + ")")
+    for row in rows:
+        detail = "未超过阈值，原样上传" if row["skipped"] else f"质量 {row['quality']:.1f}"
+        print(f"  {row['name']:<18} {row['original_bytes'] / 1024:>8.0f}KB → {row['compressed_bytes'] / 1024:>6.0f}KB "
+              f"({row['ratio']:>6.1%})  {detail}  {row['ms']:.0f}ms")
+    total_before = sum(r["original_bytes"] for r in rows)
+    total_after = sum(r["compressed_bytes"] for r in rows)
+    if total_before:
+        print(f"  合计节省 {(1 - total_after / total_before):.1%} 的上传字节")
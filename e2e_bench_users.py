@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+多用户并发模拟 (e2e_bench.py users)
+在 --browsers 个浏览器进程里为每个虚拟用户开一个独立的 BrowserContext（独立 cookie / 存储，
+开销远小于一个浏览器进程），用户之间互不共享登录态。每个用户:
+  login    在登录页提交表单（每个用户一次）
+  循环     /shops → /skill/[id] → 发送一条对话（可 --no-chat 关闭）→ /history，步骤之间随机思考时间
+按 --users 中的并发数逐级加压，每级持续 --duration 秒，报告:
+  吞吐    每分钟完成的完整循环数
+  错误率  失败步骤 / 全部步骤（被限流的 429 单独计数，不算错误）
+  延迟    每个步骤的 p50 / p95（页面步骤从 goto 到 hydration 完成且加载图标消失）
+  内存    /api/health 的服务端堆、每个用户页面的 JS 堆均值、本进程和浏览器进程树的峰值 RSS
+
+登录和对话接口按 IP 限流，每个用户的 context 带上 198.18.0.0/15 中不同的 X-Forwarded-For；
+--account 可重复指定多个账号，用户按轮询分配，默认全部使用管理员账号。
+"""
+
+import asyncio
+import os
+import random
+import resource
+import time
+from contextlib import AsyncExitStack
+
+from e2e_auth import ADMIN_PASSWORD, ADMIN_USERNAME
+from e2e_bench_ratelimit import BENCH_NETWORK, fake_ip
+from e2e_browser_pool import AsyncBrowserPool
+from e2e_http import HttpClient, LatencyStats
+from e2e_readiness import HYDRATED_JS, LOADER_GONE_JS, LOGIN_FORM_JS
+
+DESCRIPTION = "多个虚拟用户（独立 BrowserContext）并发登录、浏览店铺、使用技能和查看历史"
+
+STEPS = ("login", "shops", "skill", "chat", "history")
+
+CHAT_MESSAGES = (
+    "写一条朋友圈文案，宣传周末咖啡买一送一",
+    "帮我写一句新品甜品上市的朋友圈文案",
+    "写一条感谢老顾客的朋友圈文案，语气温暖",
+)
+
+
+def add_arguments(parser):
+    parser.add_argument("--users", default="1,5,10", help="逐级的并发用户数，逗号分隔 (默认 1,5,10)")
+    parser.add_argument("--browsers", type=int, default=2, help="浏览器进程数，用户按轮询分配 (默认 2)")
+    parser.add_argument("--duration", type=float, default=60, help="每级持续秒数 (默认 60)")
+    parser.add_argument("--ramp", type=float, default=5, help="每级内用户启动的错开时长秒数 (默认 5)")
+    parser.add_argument("--think", default="1,3", help="步骤间思考时间范围秒数 min,max (默认 1,3)")
+    parser.add_argument("--skill", default="moments-copywriter", help="使用的技能 id (默认 moments-copywriter)")
+    parser.add_argument("--no-chat", dest="chat", action="store_false", help="不发送对话（不消耗模型调用）")
+    parser.add_argument("--account", action="append", dest="accounts", metavar="USER:PASSWORD",
+                        help="登录账号，可重复，用户按轮询分配 (默认管理员账号)")
+    parser.add_argument("--max-error-rate", type=float, default=0.05,
+                        help="任一级错误率超过该值判为失败 (默认 0.05)")
+    parser.add_argument("--random-seed", type=int, default=42, help="思考时间随机种子 (默认 42)")
+
+
+def parse_accounts(values):
+    """["user:pass", ...] → [(user, pass), ...]，未指定时使用管理员账号"""
+    accounts = []
+    for value in values or ():
+        username, sep, password = value.partition(":")
+        if not sep or not username:
+            raise ValueError(f"账号格式应为 USER:PASSWORD: {value}")
+        accounts.append((username, password))
+    return accounts or [(ADMIN_USERNAME, ADMIN_PASSWORD)]
+
+
+class RateLimited(Exception):
+    """接口返回 429，单独计数，不计入错误率"""
+
+
+class Level:
+    """一个并发级别下所有用户共享的统计"""
+
+    def __init__(self, users):
+        self.users = users
+        self.steps = {name: LatencyStats(name) for name in STEPS}
+        self.limited = dict.fromkeys(STEPS, 0)
+        self.iterations = 0
+
+    def attempts(self):
+        return sum(s.count + sum(s.errors.values()) for s in self.steps.values())
+
+    def errors(self):
+        return sum(sum(s.errors.values()) for s in self.steps.values())
+
+
+class VirtualUser:
+    def __init__(self, index, page, cdp, args, level, rng, account):
+        self.index = index
+        self.page = page
+        self.cdp = cdp
+        self.username, self.password = account
+        self.base_url = args.base_url
+        self.skill = args.skill
+        self.chat = args.chat
+        self.think = args.think_range
+        self.level = level
+        self.rng = rng
+
+    async def step(self, name, action):
+        started = time.monotonic()
+        try:
+            await action()
+        except RateLimited:
+            self.level.limited[name] += 1
+            raise
+        except Exception as e:
+            self.level.steps[name].record_error(e)
+            raise
+        self.level.steps[name].record((time.monotonic() - started) * 1000)
+
+    async def open(self, path):
+        await self.page.goto(f"{self.base_url}{path}", timeout=60000, wait_until="domcontentloaded")
+        await self.page.wait_for_function(HYDRATED_JS, timeout=30000)
+        await self.page.wait_for_function(LOADER_GONE_JS, timeout=30000)
+
+    async def login(self):
+        await self.page.goto(f"{self.base_url}/login", timeout=60000, wait_until="domcontentloaded")
+        await self.page.wait_for_function(LOGIN_FORM_JS, timeout=30000)
+        await self.page.fill("input#username", self.username)
+        await self.page.fill("input#password", self.password)
+        async with self.page.expect_response(lambda r: "/api/auth/login" in r.url, timeout=30000) as info:
+            await self.page.click('button[type="submit"]')
+        if (await info.value).status == 429:
+            raise RateLimited("/api/auth/login 返回 429")
+        await self.page.wait_for_url(lambda url: "/login" not in url, timeout=30000)
+
+    async def open_skill(self):
+        await self.open(f"/skill/{self.skill}")
+        await self.page.locator("textarea").first.wait_for(timeout=15000)
+
+    async def send_chat(self):
+        textarea = self.page.locator("textarea").first
+        await textarea.fill(self.rng.choice(CHAT_MESSAGES))
+        async with self.page.expect_response(lambda r: "/api/claude/chat" in r.url, timeout=120000) as info:
+            await textarea.press("Enter")
+        response = await info.value
+        await response.finished()
+        if response.status == 429:
+            raise RateLimited("/api/claude/chat 返回 429")
+        if not response.ok:
+            raise RuntimeError(f"/api/claude/chat 返回 {response.status}")
+
+    async def think_time(self):
+        await asyncio.sleep(self.rng.uniform(*self.think))
+
+    async def iteration(self):
+        await self.step("shops", lambda: self.open("/shops"))
+        await self.think_time()
+        await self.step("skill", self.open_skill)
+        if self.chat:
+            await self.think_time()
+            await self.step("chat", self.send_chat)
+        await self.think_time()
+        await self.step("history", lambda: self.open("/history"))
+        await self.think_time()
+
+    async def run(self, delay, deadline):
+        await asyncio.sleep(delay)
+        try:
+            await self.step("login", self.login)
+        except Exception:
+            return
+        while time.monotonic() < deadline:
+            try:
+                await self.iteration()
+                self.level.iterations += 1
+            except Exception:
+                await self.think_time()
+
+    async def heap_mb(self):
+        try:
+            usage = await self.cdp.send("Runtime.getHeapUsage")
+        except Exception:
+            return None
+        return usage["usedSize"] / 1024 / 1024
+
+
+async def _server_heap(client):
+    try:
+        return (await client.request("GET", "/api/health", timeout=10)).json().get("memory", {}).get("heapUsedMB")
+    except Exception:
+        return None
+
+
+def _peak_rss_mb():
+    # Linux 上 ru_maxrss 单位为 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _browser_rss_mb(root=None):
+    """本进程所有子孙进程（Playwright 驱动和各浏览器进程）当前 RSS 之和；读不到 /proc 时返回 None"""
+    root = root or os.getpid()
+    children = {}
+    try:
+        pids = [int(p) for p in os.listdir("/proc") if p.isdigit()]
+    except OSError:
+        return None
+    for pid in pids:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                # comm 字段可能包含空格，ppid 在最后一个 ')' 之后的第二个字段
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(pid)
+    total, stack = 0, list(children.get(root, ()))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, ()))
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, IndexError, ValueError):
+            continue
+    return total / 1024 / 1024
+
+
+async def _sample_browser_rss(peak, interval=1.0):
+    """周期采样浏览器进程树 RSS，峰值写入 peak["mb"]，直到被取消"""
+    while True:
+        rss = await asyncio.to_thread(_browser_rss_mb)
+        if rss is not None:
+            peak["mb"] = max(peak["mb"] or 0.0, rss)
+        await asyncio.sleep(interval)
+
+
+async def run_level(pools, client, n, args, rng):
+    level = Level(n)
+    deadline = time.monotonic() + args.ramp + args.duration
+    peak = {"mb": None}
+    sampler = asyncio.create_task(_sample_browser_rss(peak))
+    try:
+        async with AsyncExitStack() as stack:
+            users = []
+            for i in range(n):
+                # 每个用户一个模拟 IP，按 IP 限流的登录 / 对话接口不会因为同一台压测机而互相挤占
+                ip = fake_ip(args.ip_prefix, args.users_started + i)
+                context = await stack.enter_async_context(
+                    pools[i % len(pools)].context(extra_http_headers={"X-Forwarded-For": ip}))
+                page = await context.new_page()
+                cdp = await context.new_cdp_session(page)
+                users.append(VirtualUser(i, page, cdp, args, level, random.Random(rng.random()),
+                                         args.account_list[i % len(args.account_list)]))
+            args.users_started += n
+            started = time.monotonic()
+            await asyncio.gather(*(u.run(args.ramp * i / max(1, n), deadline) for i, u in enumerate(users)))
+            elapsed = time.monotonic() - started
+            heaps = [h for h in await asyncio.gather(*(u.heap_mb() for u in users)) if h is not None]
+    finally:
+        sampler.cancel()
+
+    attempts = level.attempts()
+    return {
+        "users": n,
+        "elapsed": elapsed,
+        "iterations": level.iterations,
+        "iterations_per_minute": level.iterations / elapsed * 60 if elapsed else 0.0,
+        "steps_per_second": (attempts - level.errors()) / elapsed if elapsed else 0.0,
+        "error_rate": level.errors() / attempts if attempts else 0.0,
+        "rate_limited": {name: count for name, count in level.limited.items() if count},
+        "steps": {name: stats.summary() for name, stats in level.steps.items() if stats.count or stats.errors},
+        "server_heap_mb": await _server_heap(client),
+        "browser_heap_mb_per_user": sum(heaps) / len(heaps) if heaps else None,
+        "harness_peak_rss_mb": _peak_rss_mb(),
+        "browser_peak_rss_mb": peak["mb"],
+    }
+
+
+async def run(args):
+    levels = [int(v) for v in args.users.split(",") if v.strip()]
+    args.think_range = tuple(float(v) for v in args.think.split(","))
+    args.account_list = parse_accounts(args.accounts)
+    # 每次运行从不同的地址开始，各级的用户也不复用 IP，避免命中上一级留下的限流窗口
+    args.ip_prefix = random.randrange(BENCH_NETWORK.num_addresses)
+    args.users_started = 0
+    rng = random.Random(args.random_seed)
+    results = []
+
+    async with AsyncExitStack() as stack:
+        pools = [await stack.enter_async_context(AsyncBrowserPool()) for _ in range(max(1, args.browsers))]
+        client = await stack.enter_async_context(HttpClient(args.base_url, max_connections=2))
+        mode = "含对话" if args.chat else "不含对话"
+        print(f"\n👥 多用户模拟: {len(pools)} 个浏览器进程, {len(args.account_list)} 个账号, "
+              f"每级 {args.duration:g}s ({mode})")
+        for n in levels:
+            print(f"\n▶ {n} 个用户...")
+            result = await run_level(pools, client, n, args, rng)
+            results.append(result)
+            _print_level(result)
+
+    _print_scaling(results)
+    return {
+        "benchmark": "users",
+        "config": {"users": levels, "browsers": args.browsers, "duration": args.duration, "ramp": args.ramp,
+                   "think": list(args.think_range), "skill": args.skill, "chat": args.chat,
+                   "accounts": [username for username, _ in args.account_list]},
+        "results": results,
+        "failed": any(r["error_rate"] > args.max_error_rate for r in results),
+    }
+
+
+def _print_level(result):
+    server = result["server_heap_mb"]
+    browser = result["browser_heap_mb_per_user"]
+    browser_rss = result["browser_peak_rss_mb"]
+    limited = sum(result["rate_limited"].values())
+    print(f"  {result['iterations_per_minute']:.1f} 轮/分钟, {result['steps_per_second']:.2f} 步/秒, "
+          f"错误率 {result['error_rate']:.1%}" + (f", ⚠️  被限流 {limited} 次" if limited else ""))
+    for name, s in result["steps"].items():
+        errors = f"  失败 {s['errors']}" if s["errors"] else ""
+        if result["rate_limited"].get(name):
+            errors += f"  429 {result['rate_limited'][name]}"
+        print(f"    {name:<8} p50 {s['p50']:>7.0f}ms  p95 {s['p95']:>7.0f}ms  ({s['count']} 次){errors}")
+    print(f"  内存: 服务端堆 {server if server is not None else '-'} MB, "
+          f"每用户页面堆 {f'{browser:.1f}' if browser is not None else '-'} MB, "
+          f"本进程峰值 RSS {result['harness_peak_rss_mb']:.0f} MB, "
+          f"浏览器进程峰值 RSS {f'{browser_rss:.0f}' if browser_rss is not None else '-'} MB")
+
+
+def _print_scaling(results):
+    """各步骤 p95 随用户数的变化"""
+    if len(results) < 2:
+        return
+    print("\n" + "=" * 60)
+    print("步骤 p95 随并发用户数的变化")
+    print("=" * 60)
+    print(f"  {'步骤':<8}" + "".join(f"{r['users']:>8} 人" for r in results))
+    for name in STEPS:
+        row = [r["steps"].get(name, {}).get("p95") for r in results]
+        if all(v is None for v in row):
+            continue
+        print(f"  {name:<8}" + "".join(f"{v:>9.0f}ms" if v is not None else f"{'-':>11}" for v in row))
+    first, last = results[0], results[-1]
+    if first["iterations_per_minute"]:
+        gain = last["iterations_per_minute"] / first["iterations_per_minute"]
+        print(f"\n  {first['users']} → {last['users']} 人: 吞吐 ×{gain:.1f} "
+              f"(理想 ×{last['users'] / first['users']:.1f}), 错误率 {first['error_rate']:.1%} → {last['error_rate']:.1%}")
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+E2E 浏览器池
+整个测试会话只启动一次 Chromium，每个测试借出一个全新隔离的 BrowserContext，
+归还时关闭该 context（连同其 cookies / localStorage / 页面），下一个测试拿到的永远是干净环境。
+"""
+
+import inspect
+import time
+from contextlib import asynccontextmanager, contextmanager
+
+from playwright.async_api import async_playwright
+from playwright.sync_api import sync_playwright
+
+
+class BrowserPool:
+    """会话级浏览器池
+
+    用法:
+        with BrowserPool() as pool:
+            with pool.page() as page:
+                page.goto(...)
+    """
+
+    def __init__(self, headless=True, context_hooks=(), **context_defaults):
+        self.headless = headless
+        # 每个新 context 创建后依次调用 hook(context)，用于注入脚本、挂监听等
+        self.context_hooks = list(context_hooks)
+        self.context_defaults = context_defaults
+        self.stats = {"launches": 0, "checkouts": 0, "launch_ms": 0.0}
+        self._playwright = None
+        self._browser = None
+        self._active = set()
+
+    def start(self):
+        if self._browser is not None:
+            return self
+        started = time.monotonic()
+        self._playwright = sync_playwright().start()
+        self._browser = self._playwright.chromium.launch(headless=self.headless)
+        self.stats["launches"] += 1
+        self.stats["launch_ms"] += (time.monotonic() - started) * 1000
+        return self
+
+    def close(self):
+        for context in list(self._active):
+            self._reset(context)
+        if self._browser is not None:
+            self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            self._playwright.stop()
+            self._playwright = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def playwright(self):
+        return self.start()._playwright
+
+    @property
+    def browser(self):
+        return self.start()._browser
+
+    @contextmanager
+    def context(self, **options):
+        """借出一个全新的 BrowserContext，退出时自动归还并重置"""
+        context = self.browser.new_context(**{**self.context_defaults, **options})
+        self._active.add(context)
+        self.stats["checkouts"] += 1
+        try:
+            for hook in self.context_hooks:
+                hook(context)
+            yield context
+        finally:
+            self._reset(context)
+
+    @contextmanager
+    def page(self, **options):
+        """借出一个 context 并在其中打开页面"""
+        with self.context(**options) as context:
+            yield context.new_page()
+
+    def _reset(self, context):
+        # 关闭 context 即丢弃其全部状态，比逐项清理 cookies / storage 更可靠
+        self._active.discard(context)
+        try:
+            context.close()
+        except Exception:
+            pass
+
+
+class AsyncBrowserPool:
+    """BrowserPool 的 asyncio 版本，供并发执行模式使用
+
+    用法:
+        async with AsyncBrowserPool() as pool:
+            async with pool.page() as page:
+                await page.goto(...)
+    """
+
+    def __init__(self, headless=True, context_hooks=(), **context_defaults):
+        self.headless = headless
+        self.context_hooks = list(context_hooks)
+        self.context_defaults = context_defaults
+        self.stats = {"launches": 0, "checkouts": 0, "launch_ms": 0.0}
+        self._manager = None
+        self._playwright = None
+        self._browser = None
+        self._active = set()
+
+    async def start(self):
+        if self._browser is not None:
+            return self
+        started = time.monotonic()
+        self._manager = async_playwright()
+        self._playwright = await self._manager.start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        self.stats["launches"] += 1
+        self.stats["launch_ms"] += (time.monotonic() - started) * 1000
+        return self
+
+    async def close(self):
+        for context in list(self._active):
+            await self._reset(context)
+        if self._browser is not None:
+            await self._browser.close()
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """借出一个全新的 BrowserContext，退出时自动归还并重置"""
+        await self.start()
+        context = await self._browser.new_context(**{**self.context_defaults, **options})
+        self._active.add(context)
+        self.stats["checkouts"] += 1
+        try:
+            for hook in self.context_hooks:
+                result = hook(context)
+                if inspect.isawaitable(result):
+                    await result
+            yield context
+        finally:
+            await self._reset(context)
+
+    @asynccontextmanager
+    async def page(self, **options):
+        """借出一个 context 并在其中打开页面"""
+        async with self.context(**options) as context:
+            yield await context.new_page()
+
+    async def _reset(self, context):
+        self._active.discard(context)
+        try:
+            await context.close()
+        except Exception:
+            pass
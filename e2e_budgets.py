@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+E2E 页面性能预算
+e2e_budgets.json 按路由和视口声明上限（请求数、JS / CSS 传输字节、加载期间的 /api 调用次数、
+登录表单可交互时间、LCP），e2e_vitals 采集的报告逐页对照预算，超出任意一项即判定本次运行失败，
+并打印「页面 / 指标 / 实际值 / 上限 / 超出多少」的差异表，api_calls 超标时附上实际请求的路径。
+
+预算和基线对比（e2e_vitals.py compare）互补：基线抓相对回归，预算守住绝对上限。
+
+用法:
+    python e2e_test.py                                    # 有预算文件时自动作为运行门禁
+    python e2e_budgets.py check [--profile prod]          # 对已有的 vitals 报告检查预算
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from collections import Counter
+
+import e2e_vitals
+from e2e_warmup import pattern_regex
+
+BUDGETS_PATH = os.environ.get("E2E_BUDGETS", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                          "e2e_budgets.json"))
+
+METRICS = ("requests", "js_bytes", "css_bytes", "api_calls", "login_form_ready", "lcp")
+
+_UNITS = {"": 1, "b": 1, "kb": 1024, "mb": 1024 * 1024, "ms": 1, "s": 1000}
+_VALUE = re.compile(r"^\s*([\d.]+)\s*([a-z]*)\s*$", re.I)
+
+
+def parse_value(value):
+    """350KB -> 358400, 2.5s -> 2500；数字原样返回"""
+    if isinstance(value, (int, float)):
+        return value
+    match = _VALUE.match(str(value))
+    if not match or match.group(2).lower() not in _UNITS:
+        raise ValueError(f"无法解析预算值: {value!r}")
+    return float(match.group(1)) * _UNITS[match.group(2).lower()]
+
+
+def load(path=BUDGETS_PATH, profile=None):
+    """读取预算文件中的一个 profile，返回 (profile 名, {路由模式: {视口: {指标: 上限}}})"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    name = profile or os.environ.get("E2E_BUDGET_PROFILE") or data.get("profile", "dev")
+    if name not in data["profiles"]:
+        raise ValueError(f"预算文件中没有 profile {name!r}，可选: {', '.join(data['profiles'])}")
+    config = data["profiles"][name]
+    defaults = {k: parse_value(v) for k, v in config.get("defaults", {}).items()}
+    pages = {}
+    for pattern, viewports in config["pages"].items():
+        base = {**defaults, **{k: parse_value(v) for k, v in viewports.get("*", {}).items()}}
+        pages[pattern] = {"*": base}
+        for viewport, limits in viewports.items():
+            if viewport != "*":
+                pages[pattern][viewport] = {**base, **{k: parse_value(v) for k, v in limits.items()}}
+    return name, pages
+
+
+def limits_for(key, pages):
+    """报告中的 "路径@宽x高" 对应的预算，没有列出的页面返回 None"""
+    path, _, viewport = key.partition("@")
+    for pattern, viewports in pages.items():
+        if pattern_regex(pattern).match(path):
+            return viewports.get(viewport, viewports["*"])
+    return None
+
+
+def check(report, pages):
+    """返回 (超标列表 [(页面, 指标, 实际值, 上限)], 已检查的页面, 预算中列出但本次未采集的路由)"""
+    violations = []
+    checked = []
+    for key, metrics in report["pages"].items():
+        limits = limits_for(key, pages)
+        if limits is None:
+            continue
+        checked.append(key)
+        for metric in METRICS:
+            if metric not in limits or metric not in metrics:
+                continue
+            actual = metrics[metric]
+            # 有采集时表单仍未可交互的样本（报告中记为未就绪次数），直接判为超标
+            if metric == "login_form_ready" and metrics.get("login_form_not_ready"):
+                violations.append((key, metric, -1, limits[metric]))
+            if actual >= 0 and actual > limits[metric]:
+                violations.append((key, metric, actual, limits[metric]))
+    measured = {key.partition("@")[0] for key in checked}
+    missing = [p for p in pages if not any(pattern_regex(p).match(path) for path in measured)]
+    return violations, checked, missing
+
+
+def print_results(violations, checked, missing, report=None, profile=None):
+    title = f"性能预算 ({profile})" if profile else "性能预算"
+    print(f"\n💰 {title}: 检查 {len(checked)} 个页面/视口")
+    for pattern in missing:
+        print(f"   ⚠️  本次未采集: {pattern}")
+    if not violations:
+        print("   ✅ 全部在预算内")
+        return
+    print(f"   ❌ {len(violations)} 项超出预算:")
+    print(f"   {'页面':<26} {'指标':<18} {'实际':>8} {'上限':>8}  超出")
+    for key, metric, actual, limit in violations:
+        if actual < 0:
+            not_ready = f"未就绪 {report['pages'][key]['login_form_not_ready']} 次" if report else "未就绪"
+            print(f"   {key:<28} {metric:<20} {not_ready:>7} {e2e_vitals.format_metric(metric, limit):>10}")
+            continue
+        over = actual - limit
+        print(f"   {key:<28} {metric:<20} {e2e_vitals.format_metric(metric, actual):>10} "
+              f"{e2e_vitals.format_metric(metric, limit):>10}  +{e2e_vitals.format_metric(metric, over)} "
+              f"(+{over / limit * 100 if limit else 0:.0f}%)")
+        if metric == "api_calls" and report:
+            paths = Counter(report["pages"][key].get("api_paths", []))
+            print("      " + ", ".join(f"{p} ×{n}" if n > 1 else p for p, n in paths.most_common()))
+
+
+def gate(report, path=BUDGETS_PATH, profile=None):
+    """e2e_test.py 使用：检查并打印，返回是否全部在预算内"""
+    name, pages = load(path, profile)
+    violations, checked, missing = check(report, pages)
+    print_results(violations, checked, missing, report, name)
+    return not violations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 页面性能预算检查")
+    sub = parser.add_subparsers(dest="command", required=True)
+    check_parser = sub.add_parser("check", help="对 vitals 报告检查预算，超标时返回 1")
+    check_parser.add_argument("--report", default=e2e_vitals.REPORT_PATH)
+    check_parser.add_argument("--budgets", default=BUDGETS_PATH)
+    check_parser.add_argument("--profile", help="预算 profile，默认取文件中的 profile 或 E2E_BUDGET_PROFILE")
+    args = parser.parse_args(argv)
+
+    with open(args.report, encoding="utf-8") as f:
+        report = json.load(f)
+    return 0 if gate(report, args.budgets, args.profile) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+E2E 浏览器控制台与页面错误采集
+作为 context 钩子为每个页面监听 console 和 pageerror，内存占用有上限:
+  - 最近 RING_SIZE 条事件保存在环形缓冲区里
+  - 事件按指纹去重计数（数字、UUID、十六进制 id、URL 查询串归一化后取哈希），
+    最多保留 MAX_GROUPS 个指纹的详情，超出的指纹只计入 overflow；
+    另用最多 MAX_OVERFLOW 项的 LRU 记录这些指纹的次数，供 REPEAT_LIMIT 使用
+  - 原始事件流式写入按大小轮转的 JSONL 文件，同一指纹最多写 REPEAT_LIMIT 条，之后只计数
+结束时输出所有测试汇总的 Top 错误 / 警告，以及 hydration 警告出现在哪些测试中。
+
+用法:
+    BrowserPool(context_hooks=[e2e_console.install])      # 全局采集
+    messages = e2e_console.watch(page)                    # 只看单个页面，返回有界的 ConsoleLog
+    python e2e_console.py report [/tmp/e2e_console.summary.json ...]
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import time
+from collections import OrderedDict, deque
+from logging.handlers import RotatingFileHandler
+
+import e2e_steps
+
+LOG_PATH = os.environ.get("E2E_CONSOLE_LOG", "/tmp/e2e_console.jsonl")
+SUMMARY_PATH = os.path.splitext(LOG_PATH)[0] + ".summary.json"
+
+RING_SIZE = 500
+MAX_GROUPS = 2000
+MAX_OVERFLOW = 2000
+REPEAT_LIMIT = 20
+MAX_TEXT = 2000
+# 单个 JSONL 文件上限与保留的轮转文件数
+MAX_BYTES = 5 * 1024 * 1024
+BACKUPS = 3
+# 每个指纹记录的测试 id 上限
+MAX_TESTS = 20
+
+ERROR_TYPES = ("error", "pageerror")
+WARNING_TYPES = ("warning",)
+
+HYDRATION = re.compile(r"hydrat|did not match|server rendered html|text content does not match", re.I)
+
+_NORMALIZERS = (
+    (re.compile(r"(https?://[^\s?#'\"]+)\?[^\s'\"]*"), r"\1?…"),
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I), "<uuid>"),
+    (re.compile(r"\b[0-9a-f]{8,}\b", re.I), "<hex>"),
+    (re.compile(r"\d+(\.\d+)?"), "#"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+def normalize(text):
+    for pattern, replacement in _NORMALIZERS:
+        text = pattern.sub(replacement, text)
+    return text.strip()[:300]
+
+
+def fingerprint(kind, text):
+    return hashlib.sha1(f"{kind}\0{normalize(text)}".encode("utf-8")).hexdigest()[:12]
+
+
+class ConsoleLog:
+    """有界的控制台事件收集器；path 为 None 时只在内存中统计"""
+
+    def __init__(self, path=None, ring_size=RING_SIZE, max_groups=MAX_GROUPS, max_overflow=MAX_OVERFLOW):
+        self.recent = deque(maxlen=ring_size)
+        self.groups = {}
+        self.max_groups = max_groups
+        self.total = 0
+        self.overflow = 0
+        # 超出 MAX_GROUPS 的指纹只保留计数，用于对它们同样执行 REPEAT_LIMIT；
+        # 按最近出现淘汰，被淘汰的指纹再出现时重新计数，日志量仍由文件轮转限制
+        self._overflow_counts = OrderedDict()
+        self.max_overflow = max_overflow
+        self.path = path
+        self._logger = None
+        if path:
+            handler = RotatingFileHandler(path, mode="w", maxBytes=MAX_BYTES, backupCount=BACKUPS, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            self._logger = logging.getLogger(f"e2e_console.{id(self)}")
+            self._logger.propagate = False
+            self._logger.setLevel(logging.INFO)
+            self._logger.addHandler(handler)
+
+    def record(self, kind, text, url="", location="", test=None):
+        text = str(text)[:MAX_TEXT]
+        key = fingerprint(kind, text)
+        event = {"ts": round(time.time(), 3), "test": test, "type": kind, "text": text,
+                 "url": url, "location": location, "fingerprint": key}
+        self.total += 1
+        self.recent.append(event)
+
+        group = self.groups.get(key)
+        if group is None and len(self.groups) >= self.max_groups:
+            # 指纹表已满: 不再新建分组，但原始事件照常写入日志
+            self.overflow += 1
+            count = self._overflow_counts[key] = self._overflow_counts.pop(key, 0) + 1
+            if len(self._overflow_counts) > self.max_overflow:
+                self._overflow_counts.popitem(last=False)
+            if self._logger and count <= REPEAT_LIMIT:
+                self._logger.info(json.dumps(event, ensure_ascii=False))
+            return
+        if group is None:
+            group = self.groups[key] = {
+                "fingerprint": key, "type": kind, "text": text, "count": 0, "tests": [],
+                "first_url": url, "hydration": bool(HYDRATION.search(text)),
+            }
+        group["count"] += 1
+        if test and test not in group["tests"] and len(group["tests"]) < MAX_TESTS:
+            group["tests"].append(test)
+        if self._logger and group["count"] <= REPEAT_LIMIT:
+            self._logger.info(json.dumps(event, ensure_ascii=False))
+
+    def top(self, kinds, limit=10):
+        groups = [g for g in self.groups.values() if g["type"] in kinds]
+        return sorted(groups, key=lambda g: -g["count"])[:limit]
+
+    def lines(self, limit=20):
+        """按出现次数列出去重后的消息，供测试脚本直接打印"""
+        groups = sorted(self.groups.values(), key=lambda g: -g["count"])[:limit]
+        return [f"{g['type']}: {g['text'][:200]}" + (f" (×{g['count']})" if g["count"] > 1 else "") for g in groups]
+
+    def summary(self, limit=50):
+        counts = {}
+        for group in self.groups.values():
+            counts[group["type"]] = counts.get(group["type"], 0) + group["count"]
+        hydration = [g for g in self.groups.values() if g["hydration"]]
+        return {
+            "total": self.total,
+            "distinct": len(self.groups),
+            "overflow": self.overflow,
+            "by_type": counts,
+            "hydration": {"count": sum(g["count"] for g in hydration),
+                          "tests": sorted({t for g in hydration for t in g["tests"]})},
+            "groups": sorted(self.groups.values(), key=lambda g: -g["count"])[:limit],
+            "log": self.path,
+        }
+
+    def close(self):
+        if self._logger:
+            for handler in list(self._logger.handlers):
+                handler.close()
+                self._logger.removeHandler(handler)
+            self._logger = None
+
+
+def _location(msg):
+    loc = msg.location or {}
+    return f"{loc.get('url', '')}:{loc.get('lineNumber', 0)}" if loc.get("url") else ""
+
+
+def watch(page, log=None, test=None):
+    """监听单个页面的 console / pageerror，返回收集用的 ConsoleLog"""
+    log = log if log is not None else ConsoleLog(ring_size=50)
+
+    page.on("console", lambda msg: log.record(msg.type, msg.text, page.url, _location(msg), test))
+    page.on("pageerror", lambda error: log.record("pageerror", getattr(error, "message", None) or error,
+                                                  page.url, "", test))
+    return log
+
+
+# 本进程的全局收集器，未显式 start 时在第一次 install 时懒加载
+_collector = None
+
+
+def start(path=LOG_PATH):
+    global _collector
+    if _collector is not None:
+        _collector.close()
+    _collector = ConsoleLog(path)
+    return _collector
+
+
+def current():
+    return _collector if _collector is not None else start()
+
+
+def install(context):
+    """BrowserPool context 钩子；借出 context 时所属的测试 id 记入每条事件"""
+    record = e2e_steps.current_test()
+    test = record.id if record else None
+    collector = current()
+    context.on("page", lambda page: watch(page, collector, test))
+
+
+def finish(path=SUMMARY_PATH):
+    """关闭全局收集器，写出汇总 JSON 并返回汇总；没有采集时返回 None"""
+    global _collector
+    collector, _collector = _collector, None
+    if collector is None:
+        return None
+    collector.close()
+    summary = collector.summary()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    summary["path"] = path
+    return summary
+
+
+def merge(summaries):
+    """合并多个进程（分片）的汇总，按指纹累加计数"""
+    merged = {"total": 0, "distinct": 0, "overflow": 0, "by_type": {}, "hydration": {"count": 0, "tests": []},
+              "groups": [], "log": None}
+    groups = {}
+    tests = set()
+    for summary in summaries:
+        if not summary:
+            continue
+        merged["total"] += summary["total"]
+        merged["overflow"] += summary["overflow"]
+        for kind, n in summary["by_type"].items():
+            merged["by_type"][kind] = merged["by_type"].get(kind, 0) + n
+        merged["hydration"]["count"] += summary["hydration"]["count"]
+        tests.update(summary["hydration"]["tests"])
+        for group in summary["groups"]:
+            existing = groups.get(group["fingerprint"])
+            if existing is None:
+                groups[group["fingerprint"]] = {**group, "tests": list(group["tests"])}
+                continue
+            existing["count"] += group["count"]
+            existing["tests"] = (existing["tests"] + [t for t in group["tests"] if t not in existing["tests"]])[:MAX_TESTS]
+    merged["hydration"]["tests"] = sorted(tests)
+    merged["distinct"] = len(groups)
+    merged["groups"] = sorted(groups.values(), key=lambda g: -g["count"])
+    return merged
+
+
+def print_summary(summary, limit=10):
+    if not summary or not summary["total"]:
+        print("\n🖥️  控制台: 无消息")
+        return
+    by_type = ", ".join(f"{k} {v}" for k, v in sorted(summary["by_type"].items(), key=lambda kv: -kv[1]))
+    print(f"\n🖥️  控制台消息 {summary['total']} 条, 去重后 {summary['distinct']} 种 ({by_type})"
+          + (f", 超出指纹上限 {summary['overflow']} 条" if summary["overflow"] else ""))
+    for title, kinds in (("Top 错误", ERROR_TYPES), ("Top 警告", WARNING_TYPES)):
+        groups = [g for g in summary["groups"] if g["type"] in kinds][:limit]
+        if not groups:
+            continue
+        print(f"  {title}:")
+        for g in groups:
+            tests = f"  [{len(g['tests'])} 个测试]" if g["tests"] else ""
+            print(f"    {'❌' if g['type'] in ERROR_TYPES else '⚠️ '} ×{g['count']:<5} {g['text'][:120]}{tests}")
+    hydration = summary["hydration"]
+    if hydration["count"]:
+        print(f"  💧 hydration 警告 {hydration['count']} 条，涉及: {', '.join(hydration['tests']) or '未归属测试'}")
+    if summary.get("log"):
+        print(f"  📄 事件日志: {summary['log']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 控制台消息汇总")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="打印一个或多个汇总文件（多个时合并）")
+    report.add_argument("paths", nargs="*", default=[SUMMARY_PATH])
+    report.add_argument("--limit", type=int, default=10, help="每类显示的条数 (默认 10)")
+    args = parser.parse_args(argv)
+
+    summaries = []
+    for path in args.paths:
+        with open(path, encoding="utf-8") as f:
+            summaries.append(json.load(f))
+    print_summary(summaries[0] if len(summaries) == 1 else merge(summaries), args.limit)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+E2E 页面快照
+一次 evaluate 取回页面可见文本、链接（标出导航栏中的）、body 直接子元素摘要和加载状态，
+之后的文本包含、导航项、元素结构等检查都在本地快照上完成，不再反复 page.content() 序列化整页 HTML，
+也不再对每个元素单独 evaluate / get_attribute。
+
+页面内的 MutationObserver 在 DOM 变化时递增版本号。再次取快照时把已缓存的版本号传给页面，
+DOM 没有变化就只返回 null，沿用缓存；导航后文档 id 改变，缓存自然失效。
+
+用法:
+    dom = e2e_dom.snapshot(page)
+    dom.contains("登录")                       # 可见文本中包含任意一个
+    dom.missing(["技能广场", "我的店铺"])        # 可见文本中找不到的项
+    dom.nav_links, dom.elements, dom.loading
+    dom = await e2e_dom.snapshot_async(page)
+"""
+
+import weakref
+
+SNAPSHOT_JS = """(known) => {
+  let state = window.__e2eDom
+  if (!state) {
+    state = window.__e2eDom = {id: Math.random().toString(36).slice(2), version: 0}
+    new MutationObserver(() => { state.version++ }).observe(document, {
+      subtree: true, childList: true, characterData: true,
+      attributes: true, attributeFilter: ['class', 'href', 'hidden', 'style', 'open', 'disabled'],
+    })
+  }
+  const key = state.id + ':' + state.version
+  if (key === known) return null
+  const text = el => (el.innerText || el.textContent || '').replace(/\\s+/g, ' ').trim()
+  const body = document.body
+  return {
+    key,
+    url: location.href,
+    title: document.title,
+    text: body ? body.innerText : '',
+    links: Array.from(document.querySelectorAll('a[href]'), a => ({
+      text: text(a).slice(0, 100),
+      href: a.getAttribute('href'),
+      nav: !!a.closest('header, nav'),
+    })),
+    elements: body ? Array.from(body.children, el => ({
+      tag: el.tagName.toLowerCase(),
+      id: el.id,
+      classes: el.getAttribute('class') || '',
+      children: el.childElementCount,
+      text: text(el).slice(0, 80),
+    })) : [],
+    loading: !!document.querySelector('.animate-spin, .lucide-loader-2, .lucide-loader-circle'),
+  }
+}"""
+
+# 页面 -> 最近一次快照
+_cache = weakref.WeakKeyDictionary()
+
+
+class Snapshot:
+    """页面在某个 DOM 版本上的只读快照"""
+
+    def __init__(self, data):
+        self.key = data["key"]
+        self.url = data["url"]
+        self.title = data["title"]
+        self.text = data["text"]
+        self.links = data["links"]
+        self.elements = data["elements"]
+        self.loading = data["loading"]
+
+    @property
+    def nav_links(self):
+        return [link for link in self.links if link["nav"]]
+
+    def contains(self, *needles, ignore_case=False):
+        """可见文本中包含任意一个 needle"""
+        text = self.text.lower() if ignore_case else self.text
+        return any((n.lower() if ignore_case else n) in text for n in needles)
+
+    def missing(self, items):
+        """items 中在可见文本里找不到的项，保持原顺序"""
+        return [item for item in items if item not in self.text]
+
+    def link(self, text):
+        """文本包含 text 的第一个链接，没有时返回 None"""
+        return next((link for link in self.links if text in link["text"]), None)
+
+
+def _update(page, data):
+    if data is None:
+        return _cache[page]
+    snapshot = _cache[page] = Snapshot(data)
+    return snapshot
+
+
+def _known(page):
+    cached = _cache.get(page)
+    return cached.key if cached else None
+
+
+def snapshot(page):
+    """取页面快照；DOM 自上次以来没有变化时直接返回缓存"""
+    return _update(page, page.evaluate(SNAPSHOT_JS, _known(page)))
+
+
+async def snapshot_async(page):
+    return _update(page, await page.evaluate(SNAPSHOT_JS, _known(page)))
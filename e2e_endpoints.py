@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+E2E API 端点列表
+e2e_test.py 的 API 端点检查和 e2e_bench.py load 压测共用同一份列表；
+压测插件只需要这份列表，不必导入整个测试脚本。
+"""
+
+API_ENDPOINTS = [
+    ("/api/skills", "技能列表 API"),
+    ("/api/health", "健康检查 API"),
+]
+
+V2_API_ENDPOINTS = [
+    ("/api/v2/shops", "店铺管理 API"),
+    ("/api/v2/generate", "生成 API"),
+    ("/api/v2/content/check", "内容检测 API"),
+]
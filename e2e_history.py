@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+E2E 历史结果库
+每次运行结束后把每个测试和步骤的结果（耗时、通过与否、重试次数、是否接近超时）连同 git SHA
+写入本地 SQLite，跨运行回答「登录流程变慢是偶发还是最近几周在持续变慢」:
+  report   最近 --last 次运行中的耗时趋势、变慢最多的测试和不稳定评分
+  trend    单个测试逐次运行的耗时与各步骤中位数
+  import   导入 e2e_runner.py 输出的结果 JSON
+  export-durations  把近期耗时中位数导出为 e2e_runner.py 分片用的耗时文件
+结果库只在本机，各 CI 节点只记录自己那一片，因此分片不直接读它；导出的耗时文件提交到仓库后
+各节点读到的是同一份数据，算出的分片一致。
+
+不稳定评分 = 0.7 × 结果翻转率（相邻两次运行通过 / 失败不同的比例）+ 0.3 × 接近超时率，
+一直失败的测试翻转率为 0，算作坏掉而不是不稳定。
+
+用法:
+    python e2e_history.py report [--last 30]
+    python e2e_history.py trend e2e_login_flow_test.py::test_login_flow
+    python e2e_history.py import /tmp/e2e_report.json
+    python e2e_history.py export-durations            # 写入 .e2e_durations.json，随后提交
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.environ.get("E2E_HISTORY_DB", os.path.join(ROOT, ".e2e_history.sqlite"))
+# 与 e2e_runner.DURATIONS_PATH 相同
+DURATIONS_PATH = os.environ.get("E2E_DURATIONS", os.path.join(ROOT, ".e2e_durations.json"))
+
+# 测试脚本里常用的 goto / 等待超时 (秒)，单个步骤或 Playwright 调用的耗时落在其 NEAR_TIMEOUT 比例以上
+# 视为接近超时；整个测试的总耗时不受这些超时限制，不参与判断
+TIMEOUT_LIMITS = (30, 60)
+NEAR_TIMEOUT = 0.9
+TIMEOUT_MARKERS = ("Timeout", "超时")
+
+# 近期耗时取最近多少次通过的运行
+RECENT_RUNS = 5
+SPARK = "▁▂▃▄▅▆▇█"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at TEXT NOT NULL,
+    git_sha TEXT,
+    dirty INTEGER,
+    source TEXT,
+    host TEXT,
+    total INTEGER,
+    failed INTEGER,
+    elapsed REAL
+);
+CREATE TABLE IF NOT EXISTS results (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    started_at TEXT,
+    passed INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    retries INTEGER NOT NULL DEFAULT 0,
+    near_timeout INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    name TEXT NOT NULL,
+    passed INTEGER NOT NULL,
+    duration_ms REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS results_test ON results(test_id, run_id);
+CREATE INDEX IF NOT EXISTS steps_test ON steps(test_id, name, run_id);
+"""
+
+
+def connect(path=DB_PATH):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def git_revision():
+    """返回 (短 SHA, 工作区是否有改动)；不在 git 仓库中时返回 (None, None)"""
+    try:
+        sha = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                             text=True, timeout=10, check=True).stdout.strip()
+        status = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=ROOT,
+                                capture_output=True, text=True, timeout=30).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None, None
+    return sha, bool(status.strip())
+
+
+def timed_out(error):
+    return bool(error) and any(marker in error for marker in TIMEOUT_MARKERS)
+
+
+def near_timeout(duration_s, error=None):
+    """单个步骤或调用的耗时是否接近 goto / 等待超时"""
+    if timed_out(error):
+        return True
+    return any(limit * NEAR_TIMEOUT <= duration_s <= limit * 1.1 for limit in TIMEOUT_LIMITS)
+
+
+def result_near_timeout(result):
+    """测试以超时失败，或任一步骤 / Playwright 调用接近超时"""
+    steps = result.get("steps", [])
+    calls = list(result.get("calls", [])) + [c for s in steps for c in s.get("calls", [])]
+    return (timed_out(result.get("error"))
+            or any(near_timeout(s["duration_ms"] / 1000, s.get("error")) for s in steps)
+            or any(near_timeout(c["duration_ms"] / 1000, c.get("error")) for c in calls))
+
+
+def record_run(results, source="e2e_test", elapsed=None, path=DB_PATH):
+    """写入一次运行；results 为 TestRecord.to_dict() 列表，返回 run id
+
+    e2e_runner.py --cache 复用的结果 (cached) 是之前运行的耗时和结论，不再重复记入。
+    """
+    results = [r for r in results if not r.get("cached")]
+    sha, dirty = git_revision()
+    with contextlib.closing(connect(path)) as conn, conn:
+        cursor = conn.execute(
+            "INSERT INTO runs (started_at, git_sha, dirty, source, host, total, failed, elapsed) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (min((r.get("started_at") or "" for r in results), default="") or time.strftime("%Y-%m-%dT%H:%M:%S"),
+             sha, dirty, source, socket.gethostname(), len(results),
+             sum(1 for r in results if not r["passed"]), elapsed))
+        run_id = cursor.lastrowid
+        for r in results:
+            steps = r.get("steps", [])
+            retries = sum(len(s.get("retries", [])) for s in steps)
+            slow = result_near_timeout(r)
+            conn.execute(
+                "INSERT INTO results (run_id, test_id, started_at, passed, duration, retries, near_timeout, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (run_id, r["id"], r.get("started_at"), int(bool(r["passed"])), r["duration"], retries, int(slow),
+                 r.get("error")))
+            conn.executemany(
+                "INSERT INTO steps (run_id, test_id, name, passed, duration_ms, attempts, error) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, r["id"], s["name"], int(s["status"] == "passed"), s["duration_ms"],
+                  s.get("attempts", 1), s.get("error")) for s in steps])
+    return run_id
+
+
+def history(conn, test_id=None, last=30):
+    """按测试分组返回最近 last 次运行的结果（按时间正序）"""
+    runs = [row["id"] for row in conn.execute("SELECT id FROM runs ORDER BY id DESC LIMIT ?", (last,))]
+    if not runs:
+        return {}
+    query = (f"SELECT r.*, runs.git_sha FROM results r JOIN runs ON runs.id = r.run_id "
+             f"WHERE r.run_id >= ? {'AND r.test_id = ?' if test_id else ''} ORDER BY r.run_id")
+    grouped = {}
+    for row in conn.execute(query, (min(runs), test_id) if test_id else (min(runs),)):
+        grouped.setdefault(row["test_id"], []).append(dict(row))
+    return grouped
+
+
+def durations(path=DB_PATH, recent=RECENT_RUNS):
+    """各测试最近 recent 次通过的耗时中位数 (秒)，供 e2e_runner.py 分片排序使用"""
+    if not os.path.exists(path):
+        return {}
+    with contextlib.closing(connect(path)) as conn:
+        rows = conn.execute(
+            "SELECT test_id, duration FROM ("
+            "  SELECT test_id, duration, ROW_NUMBER() OVER (PARTITION BY test_id ORDER BY run_id DESC) AS n"
+            "  FROM results WHERE passed = 1) WHERE n <= ?", (recent,)).fetchall()
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(row["test_id"], []).append(row["duration"])
+    return {test_id: round(statistics.median(values), 3) for test_id, values in grouped.items()}
+
+
+def flakiness(rows):
+    """rows 为单个测试按时间排序的结果，返回 (评分, 翻转率, 接近超时率)"""
+    if len(rows) < 2:
+        return 0.0, 0.0, 0.0
+    flips = sum(1 for a, b in zip(rows, rows[1:]) if a["passed"] != b["passed"]) / (len(rows) - 1)
+    timeouts = sum(r["near_timeout"] for r in rows) / len(rows)
+    return 0.7 * flips + 0.3 * timeouts, flips, timeouts
+
+
+def movement(rows, recent=RECENT_RUNS):
+    """最近 recent 次通过的耗时中位数相对更早的通过运行的变化，返回 (之前, 最近) 秒"""
+    passed = [r["duration"] for r in rows if r["passed"]]
+    if len(passed) <= recent:
+        return None
+    return statistics.median(passed[:-recent]), statistics.median(passed[-recent:])
+
+
+def slope(values):
+    """最小二乘斜率（每次运行的变化量）"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x, mean_y = (n - 1) / 2, sum(values) / n
+    var_x = sum((i - mean_x) ** 2 for i in range(n))
+    return sum((i - mean_x) * (v - mean_y) for i, v in enumerate(values)) / var_x
+
+
+def sparkline(values):
+    if not values:
+        return ""
+    low, high = min(values), max(values)
+    span = high - low or 1
+    return "".join(SPARK[int((v - low) / span * (len(SPARK) - 1))] for v in values)
+
+
+def outcomes(rows):
+    return "".join("✓" if r["passed"] else "✗" for r in rows)
+
+
+def print_report(conn, last=30, top=10):
+    grouped = history(conn, last=last)
+    run_count = conn.execute("SELECT COUNT(*) FROM runs").fetchone()[0]
+    print("=" * 60)
+    print(f"E2E 历史 (最近 {min(last, run_count)} / 共 {run_count} 次运行)")
+    print("=" * 60)
+    if not grouped:
+        print("  暂无记录")
+        return
+
+    print("\n📈 耗时趋势:")
+    for test_id, rows in sorted(grouped.items()):
+        values = [r["duration"] for r in rows]
+        print(f"  {test_id:<48} {sparkline(values):<{last}} 中位 {statistics.median(values):>6.1f}s "
+              f"斜率 {slope(values):+.2f}s/次  {outcomes(rows)[-20:]}")
+
+    movers = []
+    for test_id, rows in grouped.items():
+        moved = movement(rows)
+        if moved and moved[0] and moved[1] > moved[0]:
+            movers.append((moved[1] / moved[0], test_id, *moved))
+    if movers:
+        print(f"\n🐢 变慢最多 (最近 {RECENT_RUNS} 次通过 vs 之前):")
+        for ratio, test_id, before, after in sorted(movers, reverse=True)[:top]:
+            print(f"  {test_id:<48} {before:>6.1f}s → {after:>6.1f}s  ×{ratio:.2f}")
+
+    scored = sorted(((flakiness(rows), test_id, rows) for test_id, rows in grouped.items()),
+                    key=lambda item: -item[0][0])
+    print("\n🎲 不稳定评分:")
+    shown = 0
+    for (score, flips, timeouts), test_id, rows in scored[:top]:
+        if score <= 0:
+            continue
+        shown += 1
+        print(f"  {test_id:<48} {score:.2f}  翻转 {flips:.0%}  接近超时 {timeouts:.0%}  {outcomes(rows)[-20:]}")
+    if not shown:
+        print("  ✅ 没有不稳定的测试")
+
+
+def print_trend(conn, test_id, last=30):
+    rows = history(conn, test_id, last).get(test_id, [])
+    if not rows:
+        print(f"没有 {test_id} 的记录")
+        return
+    print("=" * 60)
+    print(f"{test_id} 最近 {len(rows)} 次运行")
+    print("=" * 60)
+    for r in rows:
+        flags = ("  重试 %d" % r["retries"] if r["retries"] else "") + ("  ⏰ 接近超时" if r["near_timeout"] else "")
+        print(f"  #{r['run_id']:<5} {r['started_at'] or '-':<20} {r['git_sha'] or '-':<9} "
+              f"{'✅' if r['passed'] else '❌'} {r['duration']:>7.1f}s{flags}")
+    steps = conn.execute(
+        "SELECT name, COUNT(*) AS n, SUM(passed) AS ok, GROUP_CONCAT(duration_ms) AS values_ms FROM steps "
+        "WHERE test_id = ? AND run_id >= ? GROUP BY name ORDER BY MIN(rowid)", (test_id, rows[0]["run_id"])).fetchall()
+    if steps:
+        print("\n  步骤耗时中位数:")
+        for s in steps:
+            values = [float(v) for v in s["values_ms"].split(",")]
+            print(f"    {s['name']:<40} {statistics.median(values):>8.0f}ms  通过 {s['ok']}/{s['n']}  "
+                  f"{sparkline(values[-last:])}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 历史结果库")
+    parser.add_argument("--db", default=DB_PATH, help=f"SQLite 路径 (默认 {DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report = sub.add_parser("report", help="耗时趋势、变慢最多和不稳定评分")
+    report.add_argument("--last", type=int, default=30, help="统计最近多少次运行 (默认 30)")
+    report.add_argument("--top", type=int, default=10, help="每个榜单显示条数 (默认 10)")
+    trend = sub.add_parser("trend", help="单个测试逐次运行的耗时")
+    trend.add_argument("test_id")
+    trend.add_argument("--last", type=int, default=30)
+    imported = sub.add_parser("import", help="导入 e2e_runner.py 的结果 JSON")
+    imported.add_argument("paths", nargs="+")
+    exported = sub.add_parser("export-durations", help="导出近期耗时中位数，供各分片节点共享")
+    exported.add_argument("--output", default=DURATIONS_PATH, help=f"输出路径 (默认 {DURATIONS_PATH})")
+    args = parser.parse_args(argv)
+
+    if args.command == "export-durations":
+        values = durations(args.db)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(dict(sorted(values.items())), f, ensure_ascii=False, indent=2)
+        print(f"📤 已导出 {len(values)} 个测试的耗时到 {args.output}，提交后各分片节点共享")
+        return 0
+
+    if args.command == "import":
+        for path in args.paths:
+            with open(path, encoding="utf-8") as f:
+                report_data = json.load(f)
+            fresh = [r for r in report_data["results"] if not r.get("cached")]
+            skipped = len(report_data["results"]) - len(fresh)
+            note = f", 跳过 {skipped} 个复用缓存的结果" if skipped else ""
+            if not fresh:
+                print(f"⏭️  {path}: 全部为复用缓存的结果，未导入")
+                continue
+            run_id = record_run(fresh, "import", report_data.get("elapsed"), args.db)
+            print(f"📥 {path} → 运行 #{run_id} ({len(fresh)} 个测试{note})")
+        return 0
+
+    with contextlib.closing(connect(args.db)) as conn:
+        if args.command == "report":
+            print_report(conn, args.last, args.top)
+        else:
+            print_trend(conn, args.test_id, args.last)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,336 @@
+#!/usr/bin/env python3
+"""
+E2E 压测用 HTTP 客户端与延迟统计
+基于 asyncio 的 HTTP/1.1 keep-alive 连接池（仅标准库），记录每个请求的连接 / 首字节 / 总耗时，
+支持 chunked 流式响应逐块回调；LatencyStats 负责分位数与直方图输出。
+"""
+
+import asyncio
+import json
+import math
+import socket
+import ssl
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+BASE_URL = "http://localhost:3000"
+
+
+class HttpResponse:
+    """一次请求的结果，timings 单位为毫秒"""
+
+    def __init__(self, status, reason, headers, body, timings, chunks, reused):
+        self.status = status
+        self.reason = reason
+        self.headers = headers
+        self.body = body
+        self.timings = timings
+        self.chunks = chunks
+        self.reused = reused
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 400
+
+    def text(self):
+        return self.body.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.body or b"null")
+
+
+class _Connection:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    def close(self):
+        try:
+            self.writer.close()
+        except Exception:
+            pass
+
+
+class HttpClient:
+    """keep-alive 连接池，最多同时持有 max_connections 条连接
+
+    用法:
+        async with HttpClient(BASE_URL, max_connections=32) as client:
+            response = await client.request("GET", "/api/health")
+    """
+
+    def __init__(self, base_url=BASE_URL, max_connections=16, timeout=30, headers=None):
+        parts = urlsplit(base_url)
+        self.scheme = parts.scheme or "http"
+        self.host = parts.hostname or "localhost"
+        self.port = parts.port or (443 if self.scheme == "https" else 80)
+        self.timeout = timeout
+        self.default_headers = dict(headers or {})
+        self.stats = {"connections": 0, "reused": 0, "requests": 0}
+        self._slots = asyncio.Semaphore(max_connections)
+        self._idle = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        while self._idle:
+            self._idle.pop().close()
+
+    async def _open(self):
+        ssl_context = ssl.create_default_context() if self.scheme == "https" else None
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=ssl_context)
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stats["connections"] += 1
+        return _Connection(reader, writer)
+
+    async def request(self, method, path, body=None, headers=None, json_body=None,
+                      params=None, on_chunk=None, timeout=None):
+        """发送请求并读取完整响应；on_chunk(data, elapsed_ms) 在每块数据到达时回调"""
+        if json_body is not None:
+            body = json.dumps(json_body, ensure_ascii=False).encode("utf-8")
+            headers = {"Content-Type": "application/json", **(headers or {})}
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        if params:
+            path = f"{path}{'&' if '?' in path else '?'}{urlencode(params)}"
+
+        async with self._slots:
+            self.stats["requests"] += 1
+            try:
+                return await asyncio.wait_for(
+                    self._request_once(method, path, body, headers, on_chunk, allow_stale=True),
+                    timeout or self.timeout,
+                )
+            except asyncio.TimeoutError:
+                raise TimeoutError(f"{method} {path} 超时 ({timeout or self.timeout}s)")
+
+    async def login(self, username, password, path="/api/auth/login"):
+        """调用登录接口，把返回的 cookies 加到之后所有请求的 Cookie 头中"""
+        response = await self.request("POST", path, json_body={"username": username, "password": password})
+        if not response.ok:
+            raise RuntimeError(f"登录失败: {response.status} {response.text()[:200]}")
+        cookies = [line.split(";", 1)[0].strip() for line in response.headers.get("set-cookie", "").split("\n") if line]
+        if not cookies:
+            raise RuntimeError("登录成功但没有返回 cookie")
+        self.default_headers["Cookie"] = "; ".join(cookies)
+        return response
+
+    async def _request_once(self, method, path, body, headers, on_chunk, allow_stale):
+        started = time.monotonic()
+        reused = bool(self._idle)
+        conn = self._idle.pop() if reused else await self._open()
+        connected = time.monotonic()
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}:{self.port}", "Connection: keep-alive"]
+        merged = {"User-Agent": "ai-zhanggui-e2e", "Accept": "*/*", **self.default_headers, **(headers or {})}
+        if body is not None:
+            merged["Content-Length"] = str(len(body))
+        lines.extend(f"{k}: {v}" for k, v in merged.items())
+        payload = ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + (body or b"")
+
+        try:
+            conn.writer.write(payload)
+            await conn.writer.drain()
+            status_line = await conn.reader.readline()
+            if not status_line:
+                raise ConnectionResetError("连接已被服务端关闭")
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError) as e:
+            conn.close()
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            # 空闲连接可能已被服务端关闭，换一条新连接重试一次
+            if reused and allow_stale:
+                return await self._request_once(method, path, body, headers, on_chunk, allow_stale=False)
+            raise
+
+        first_byte = time.monotonic()
+        try:
+            version, status, reason = self._parse_status(status_line)
+            response_headers = await self._read_headers(conn.reader)
+            chunks = []
+
+            def deliver(data):
+                elapsed = (time.monotonic() - started) * 1000
+                chunks.append((elapsed, len(data)))
+                if on_chunk:
+                    on_chunk(data, elapsed)
+
+            body_bytes = await self._read_body(conn.reader, method, status, response_headers, deliver)
+        except BaseException:
+            # 包括超时取消：响应没读完的连接不能再放回池中
+            conn.close()
+            raise
+
+        finished = time.monotonic()
+        keep_alive = (
+            version == "HTTP/1.1"
+            and response_headers.get("connection", "").lower() != "close"
+            and ("content-length" in response_headers
+                 or "chunked" in response_headers.get("transfer-encoding", "").lower()
+                 or method == "HEAD" or status in (204, 304))
+        )
+        conn.requests += 1
+        if keep_alive:
+            self._idle.append(conn)
+        else:
+            conn.close()
+        if reused:
+            self.stats["reused"] += 1
+
+        timings = {
+            "connect": (connected - started) * 1000,
+            "ttfb": (first_byte - started) * 1000,
+            "total": (finished - started) * 1000,
+        }
+        return HttpResponse(status, reason, response_headers, body_bytes, timings, chunks, reused)
+
+    @staticmethod
+    def _parse_status(line):
+        parts = line.decode("latin-1").rstrip("\r\n").split(" ", 2)
+        return parts[0], int(parts[1]), parts[2] if len(parts) > 2 else ""
+
+    @staticmethod
+    async def _read_headers(reader):
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                return headers
+            name, _, value = line.decode("latin-1").partition(":")
+            name = name.strip().lower()
+            value = value.strip()
+            # 重复头（如 set-cookie）用换行拼接保留
+            headers[name] = f"{headers[name]}\n{value}" if name in headers else value
+
+    @staticmethod
+    async def _read_body(reader, method, status, headers, deliver):
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            return b""
+
+        parts = []
+        if "chunked" in headers.get("transfer-encoding", "").lower():
+            while True:
+                size_line = await reader.readline()
+                size = int(size_line.split(b";")[0].strip() or b"0", 16)
+                if size == 0:
+                    # 跳过 trailer
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    return b"".join(parts)
+                data = await reader.readexactly(size)
+                await reader.readexactly(2)
+                parts.append(data)
+                deliver(data)
+
+        if "content-length" in headers:
+            remaining = int(headers["content-length"])
+            while remaining > 0:
+                data = await reader.read(min(remaining, 65536))
+                if not data:
+                    raise asyncio.IncompleteReadError(b"".join(parts), remaining)
+                remaining -= len(data)
+                parts.append(data)
+                deliver(data)
+            return b"".join(parts)
+
+        # 既无长度也非 chunked：读到连接关闭
+        while True:
+            data = await reader.read(65536)
+            if not data:
+                return b"".join(parts)
+            parts.append(data)
+            deliver(data)
+
+
+def percentile(sorted_values, p):
+    """线性插值分位数，sorted_values 需已排序"""
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo = math.floor(k)
+    hi = math.ceil(k)
+    if lo == hi:
+        return sorted_values[int(k)]
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+class LatencyStats:
+    """收集延迟样本与状态码，输出分位数和对数刻度直方图"""
+
+    # 直方图桶上界 (ms)
+    BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, math.inf)
+
+    def __init__(self, name=""):
+        self.name = name
+        self.samples = []
+        self.statuses = Counter()
+        self.errors = Counter()
+        self.bytes = 0
+
+    def record(self, latency_ms, status=None, nbytes=0):
+        self.samples.append(latency_ms)
+        self.bytes += nbytes
+        if status is not None:
+            self.statuses[status] += 1
+
+    def record_error(self, error):
+        self.errors[type(error).__name__] += 1
+
+    def merge(self, other):
+        self.samples.extend(other.samples)
+        self.statuses.update(other.statuses)
+        self.errors.update(other.errors)
+        self.bytes += other.bytes
+        return self
+
+    @property
+    def count(self):
+        return len(self.samples)
+
+    def summary(self):
+        ordered = sorted(self.samples)
+        return {
+            "count": len(ordered),
+            "errors": sum(self.errors.values()),
+            "min": ordered[0] if ordered else 0.0,
+            "mean": sum(ordered) / len(ordered) if ordered else 0.0,
+            "p50": percentile(ordered, 50),
+            "p95": percentile(ordered, 95),
+            "p99": percentile(ordered, 99),
+            "max": ordered[-1] if ordered else 0.0,
+            "statuses": {str(k): v for k, v in sorted(self.statuses.items())},
+            "error_types": dict(self.errors),
+            "bytes": self.bytes,
+        }
+
+    def histogram(self):
+        counts = Counter()
+        for value in self.samples:
+            for bound in self.BUCKETS:
+                if value <= bound:
+                    counts[bound] += 1
+                    break
+        return [(bound, counts[bound]) for bound in self.BUCKETS]
+
+    def print_histogram(self, width=40, indent="    "):
+        rows = self.histogram()
+        peak = max((n for _, n in rows), default=0) or 1
+        lower = 0
+        for bound, n in rows:
+            if n:
+                label = f"{lower:g}-{bound:g}ms" if bound != math.inf else f">{lower:g}ms"
+                print(f"{indent}{label:>14} | {'█' * max(1, round(n / peak * width))} {n}")
+            lower = bound
+
+
+def format_summary(summary):
+    return (f"p50 {summary['p50']:.1f}ms  p95 {summary['p95']:.1f}ms  "
+            f"p99 {summary['p99']:.1f}ms  max {summary['max']:.1f}ms")
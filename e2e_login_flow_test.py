@@ -3,55 +3,77 @@
 登录流程完整测试 - 测试实际登录功能
 """
 
-from playwright.sync_api import sync_playwright
+import sys
+import time
+
+from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
+
+import e2e_dom
+from e2e_auth import AUTH_STATE_PATH, save_storage_state
+from e2e_browser_pool import BrowserPool
+from e2e_readiness import LOGIN_SIGNALS, format_timings, goto_ready, print_report, wait_until_ready
+from e2e_steps import mark_failed, print_steps, retry, run_test, step, track
 
 BASE_URL = "http://localhost:3000"
 
-def test_login_flow():
+# 跳转离开登录页或出现错误提示即视为登录响应已返回
+LOGIN_RESPONDED_JS = "() => !location.pathname.startsWith('/login') || !!document.querySelector('.text-destructive')"
+
+def test_login_flow(pool=None):
     """测试完整登录流程"""
+    if pool is None:
+        with BrowserPool() as pool:
+            return test_login_flow(pool)
+
     print("=" * 60)
     print("登录流程 E2E 测试")
     print("=" * 60)
 
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
+        page = track(page)
         try:
             # 1. 访问登录页面
             print("\n1. 访问登录页面...")
-            page.goto(f"{BASE_URL}/login", timeout=60000)
-            page.wait_for_load_state('networkidle')
-            page.wait_for_timeout(2000)
+            with step("访问登录页"):
+                timings = goto_ready(page, f"{BASE_URL}/login", LOGIN_SIGNALS)
+            print(f"   ⏱️  {format_timings(timings)}")
 
             # 2. 等待登录表单加载
             print("2. 等待登录表单加载...")
-            username_input = page.wait_for_selector('input#username', timeout=10000)
-            password_input = page.wait_for_selector('input#password', timeout=5000)
-            login_button = page.wait_for_selector('button[type="submit"]', timeout=5000)
+            with step("等待登录表单"):
+                username_input = page.wait_for_selector('input#username', timeout=10000)
+                password_input = page.wait_for_selector('input#password', timeout=5000)
+                login_button = page.wait_for_selector('button[type="submit"]', timeout=5000)
 
-            if username_input and password_input and login_button:
-                print("   ✅ 登录表单已加载")
-            else:
-                print("   ❌ 登录表单加载失败")
-                return False
+                if username_input and password_input and login_button:
+                    print("   ✅ 登录表单已加载")
+                else:
+                    print("   ❌ 登录表单加载失败")
+                    mark_failed("登录表单加载失败")
+                    return False
 
             # 3. 输入测试凭证
             print("3. 输入测试凭证 (admin/admin123)...")
-            username_input.fill("admin")
-            password_input.fill("admin123")
+            with step("输入凭证"):
+                username_input.fill("admin")
+                password_input.fill("admin123")
 
-            # 截图 - 输入后
-            page.screenshot(path="/tmp/e2e_login_filled.png")
-            print("   📸 截图保存到 /tmp/e2e_login_filled.png")
+                # 截图 - 输入后
+                page.screenshot(path="/tmp/e2e_login_filled.png")
+                print("   📸 截图保存到 /tmp/e2e_login_filled.png")
 
-            # 4. 点击登录按钮
+            # 4. 点击登录按钮并等待响应
             print("4. 点击登录按钮...")
-            login_button.click()
-
-            # 5. 等待响应
             print("5. 等待登录响应...")
-            page.wait_for_timeout(3000)
+
+            def submit():
+                # 按钮的 onClick 还没挂上时点击不会有任何反应，等待超时后重新点击
+                page.locator('button[type="submit"]').click(timeout=5000)
+                page.wait_for_function(LOGIN_RESPONDED_JS, timeout=15000)
+
+            started = time.monotonic()
+            retry("提交登录并等待跳转", submit, attempts=2, delay=1, exceptions=(PlaywrightTimeoutError,))
+            print(f"   ⏱️  登录响应 {(time.monotonic() - started) * 1000:.0f}ms")
 
             # 检查是否登录成功 (重定向到首页或显示错误)
             current_url = page.url
@@ -59,25 +81,29 @@ def test_login_flow():
             if "/login" not in current_url:
                 print(f"   ✅ 登录成功，已重定向到: {current_url}")
 
+                # 顺便刷新登录态缓存，后续需要登录的测试可直接复用
+                save_storage_state(page.context, AUTH_STATE_PATH)
+                print(f"   🔑 登录态已缓存到 {AUTH_STATE_PATH}")
+
                 # 截图 - 登录后
                 page.screenshot(path="/tmp/e2e_login_success.png", full_page=True)
                 print("   📸 截图保存到 /tmp/e2e_login_success.png")
 
                 # 检查是否显示用户信息
-                page.wait_for_timeout(2000)
-                content = page.content()
+                with step("登录后页面就绪"):
+                    wait_until_ready(page)
+                    dom = e2e_dom.snapshot(page)
 
-                if "admin" in content.lower() or "管理员" in content:
+                if dom.contains("admin", "管理员", ignore_case=True):
                     print("   ✅ 检测到用户信息显示")
 
                 # 6. 测试访问受保护页面
                 print("\n6. 测试访问受保护页面 (/shops)...")
-                page.goto(f"{BASE_URL}/shops", timeout=30000)
-                page.wait_for_load_state('networkidle')
-                page.wait_for_timeout(2000)
+                with step("访问受保护页面"):
+                    timings = goto_ready(page, f"{BASE_URL}/shops")
+                print(f"   ⏱️  {format_timings(timings)}")
 
                 shops_url = page.url
-                shops_content = page.content()
 
                 if "/login" not in shops_url:
                     print("   ✅ 可以访问店铺页面")
@@ -94,8 +120,10 @@ def test_login_flow():
                 if error_element.count() > 0:
                     error_text = error_element.inner_text()
                     print(f"   ❌ 登录失败: {error_text}")
+                    mark_failed(f"登录失败: {error_text}")
                 else:
                     print("   ❌ 登录失败 (未知原因)")
+                    mark_failed("登录失败 (未知原因)")
 
                 page.screenshot(path="/tmp/e2e_login_failed.png", full_page=True)
                 print("   📸 截图保存到 /tmp/e2e_login_failed.png")
@@ -106,14 +134,14 @@ def test_login_flow():
             page.screenshot(path="/tmp/e2e_login_error.png", full_page=True)
             return False
 
-        finally:
-            browser.close()
-
 if __name__ == "__main__":
-    success = test_login_flow()
+    success, record = run_test("e2e_login_flow_test.py::test_login_flow", test_login_flow)
+    print_steps(record)
+    print_report()
     print("\n" + "=" * 60)
     if success:
         print("✅ 登录流程测试通过")
     else:
         print("❌ 登录流程测试失败")
     print("=" * 60)
+    sys.exit(0 if success else 1)
@@ -3,85 +3,102 @@
 登录页面完整测试 - 等待页面完全渲染
 """
 
-from playwright.sync_api import sync_playwright
+import sys
+
+import e2e_console
+import e2e_dom
+import e2e_warmup
+from e2e_browser_pool import BrowserPool
+from e2e_readiness import LOGIN_SIGNALS, ReadinessTimeout, format_timings, print_report, wait_for_signal
 
 BASE_URL = "http://localhost:3000"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
-
-    # 监听控制台输出
-    console_messages = []
-    page.on("console", lambda msg: console_messages.append(f"{msg.type}: {msg.text}"))
-
-    print("1. 访问登录页面...")
-    page.goto(f"{BASE_URL}/login", timeout=60000)
-
-    print("2. 等待网络空闲...")
-    page.wait_for_load_state('networkidle')
-
-    print("3. 额外等待 3 秒让 React hydration 完成...")
-    page.wait_for_timeout(3000)
-
-    # 检查是否有登录表单
-    print("\n4. 检查页面元素...")
-
-    # 尝试等待登录表单出现
-    try:
-        # 等待用户名输入框
-        username_input = page.wait_for_selector('input[name="username"], input#username', timeout=10000)
-        if username_input:
-            print("  ✅ 用户名输入框已加载")
-
-        # 等待密码输入框
-        password_input = page.wait_for_selector('input[name="password"], input#password', timeout=5000)
-        if password_input:
-            print("  ✅ 密码输入框已加载")
-
-        # 等待登录按钮
-        login_button = page.wait_for_selector('button[type="submit"]', timeout=5000)
-        if login_button:
-            print("  ✅ 登录按钮已加载")
-            button_text = login_button.inner_text()
-            print(f"     按钮文本: {button_text}")
-
-    except Exception as e:
-        print(f"  ❌ 等待元素超时: {e}")
-
-        # 获取当前页面内容进行分析
-        content = page.content()
-
-        # 检查是否显示加载状态
-        if "animate-spin" in content:
-            print("  ⚠️  页面仍在显示加载状态")
-        if "Loader2" in content or "lucide-loader" in content:
-            print("  ⚠️  检测到加载图标")
-
-        # 检查是否有错误信息
-        if "error" in content.lower() or "错误" in content:
-            print("  ⚠️  页面可能有错误")
-
-    # 截图
-    page.screenshot(path="/tmp/e2e_login_full.png", full_page=True)
-    print("\n5. 截图保存到 /tmp/e2e_login_full.png")
-
-    # 输出控制台消息
-    if console_messages:
-        print("\n6. 控制台消息:")
-        for msg in console_messages[:20]:  # 只显示前 20 条
-            print(f"   {msg}")
-    else:
-        print("\n6. 无控制台消息")
-
-    # 获取页面 HTML 结构
-    print("\n7. 页面主要结构:")
-    main_elements = page.locator('body > *').all()
-    for i, elem in enumerate(main_elements[:5]):
-        tag = elem.evaluate("el => el.tagName.toLowerCase()")
-        classes = elem.get_attribute("class") or ""
-        print(f"   {i+1}. <{tag}> class=\"{classes[:60]}...\"" if len(classes) > 60 else f"   {i+1}. <{tag}> class=\"{classes}\"")
-
-    browser.close()
-
-print("\n测试完成!")
+def test_login_full(pool):
+    """等待登录页完全渲染，检查表单、控制台消息和页面结构"""
+    with pool.page() as page:
+        # 监听控制台输出和页面错误，重复消息按指纹合并计数，内存有上限
+        console = e2e_console.watch(page)
+
+        print("1. 访问登录页面...")
+        page.goto(f"{BASE_URL}/login", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/login", 60000), wait_until="domcontentloaded")
+
+        print("2. 等待 React hydration 与 /api/auth/me 完成...")
+        timings = {}
+        try:
+            for signal in LOGIN_SIGNALS:
+                timings[signal] = wait_for_signal(page, signal)
+            print(f"   ⏱️  {format_timings(timings)}")
+        except ReadinessTimeout as e:
+            print(f"   ⚠️  {e}")
+
+        print("3. 检查加载图标是否消失...")
+        try:
+            print(f"   ⏱️  loader_gone {wait_for_signal(page, 'loader_gone'):.0f}ms")
+        except ReadinessTimeout as e:
+            print(f"   ⚠️  {e}")
+
+        # 检查是否有登录表单
+        print("\n4. 检查页面元素...")
+
+        # 尝试等待登录表单出现
+        form_loaded = False
+        try:
+            # 等待用户名输入框
+            username_input = page.wait_for_selector('input[name="username"], input#username', timeout=10000)
+            if username_input:
+                print("  ✅ 用户名输入框已加载")
+
+            # 等待密码输入框
+            password_input = page.wait_for_selector('input[name="password"], input#password', timeout=5000)
+            if password_input:
+                print("  ✅ 密码输入框已加载")
+
+            # 等待登录按钮
+            login_button = page.wait_for_selector('button[type="submit"]', timeout=5000)
+            if login_button:
+                print("  ✅ 登录按钮已加载")
+                button_text = login_button.inner_text()
+                print(f"     按钮文本: {button_text}")
+
+            form_loaded = bool(username_input and password_input and login_button)
+
+        except Exception as e:
+            print(f"  ❌ 等待元素超时: {e}")
+
+            # 获取当前页面快照进行分析
+            dom = e2e_dom.snapshot(page)
+
+            # 检查是否显示加载状态
+            if dom.loading:
+                print("  ⚠️  页面仍在显示加载图标")
+
+            # 检查是否有错误信息
+            if dom.contains("error", "错误", ignore_case=True):
+                print("  ⚠️  页面可能有错误")
+
+        # 截图
+        page.screenshot(path="/tmp/e2e_login_full.png", full_page=True)
+        print("\n5. 截图保存到 /tmp/e2e_login_full.png")
+
+        # 输出控制台消息
+        if console.total:
+            print(f"\n6. 控制台消息 ({console.total} 条, 去重后 {len(console.groups)} 种):")
+            for line in console.lines(20):
+                print(f"   {line}")
+        else:
+            print("\n6. 无控制台消息")
+
+        # 获取页面 HTML 结构
+        print("\n7. 页面主要结构:")
+        for i, elem in enumerate(e2e_dom.snapshot(page).elements[:5]):
+            tag, classes = elem["tag"], elem["classes"]
+            print(f"   {i+1}. <{tag}> class=\"{classes[:60]}...\"" if len(classes) > 60 else f"   {i+1}. <{tag}> class=\"{classes}\"")
+
+        return form_loaded
+
+if __name__ == "__main__":
+    with BrowserPool() as pool:
+        success = test_login_full(pool)
+    print_report()
+    print("\n测试完成!" if success else "\n测试失败!")
+    sys.exit(0 if success else 1)
@@ -3,28 +3,36 @@
 登录页面详细测试
 """
 
-from playwright.sync_api import sync_playwright
+import sys
+
+import e2e_warmup
+from e2e_browser_pool import BrowserPool
+from e2e_readiness import format_timings, print_report, wait_for_login_form
 
 BASE_URL = "http://localhost:3000"
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
+def test_login_detail(pool):
+    """登录页加载后截图并输出页面内容片段"""
+    with pool.page() as page:
+        print("访问登录页面...")
+        page.goto(f"{BASE_URL}/login", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/login", 60000), wait_until="domcontentloaded")
 
-    print("访问登录页面...")
-    page.goto(f"{BASE_URL}/login", timeout=60000)
+        # 等待 hydration 完成、登录表单可交互
+        print("等待页面完全加载...")
+        print(f"  ⏱️  {format_timings(wait_for_login_form(page))}")
 
-    # 等待更长时间
-    print("等待页面完全加载...")
-    page.wait_for_timeout(5000)  # 等待 5 秒
-    page.wait_for_load_state('networkidle')
+        # 截图
+        page.screenshot(path="/tmp/e2e_login_detail.png", full_page=True)
+        print("截图保存到 /tmp/e2e_login_detail.png")
 
-    # 截图
-    page.screenshot(path="/tmp/e2e_login_detail.png", full_page=True)
-    print("截图保存到 /tmp/e2e_login_detail.png")
+        # 输出页面内容
+        content = page.content()
+        print(f"\n页面内容片段:\n{content[:2000]}...")
 
-    # 输出页面内容
-    content = page.content()
-    print(f"\n页面内容片段:\n{content[:2000]}...")
+        return True
 
-    browser.close()
+if __name__ == "__main__":
+    with BrowserPool() as pool:
+        success = test_login_detail(pool)
+    print_report()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+E2E 网络请求分析
+NetworkRecorder 挂在 context 上记录每个请求的时序阶段（DNS / 连接 / TTFB / 下载）、大小、
+缓存头和发起者（通过 CDP Network.requestWillBeSent 获取 initiator），分析:
+  - 重复 / 冗余请求（如 AuthContext 多次请求 /api/auth/me）
+  - 不可缓存的静态资源
+  - 关键路径上的请求链
+并可导出 HAR 1.2 文件，用 Chrome DevTools 等工具查看瀑布图。
+"""
+
+import json
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlsplit
+
+STATIC_TYPES = ("script", "stylesheet", "image", "font", "media")
+CACHE_HEADERS = ("cache-control", "etag", "last-modified", "expires", "age")
+
+
+def _phase(timing, start, end):
+    a = timing.get(start, -1)
+    b = timing.get(end, -1)
+    return b - a if a >= 0 and b >= 0 and b >= a else -1
+
+
+def timing_phases(timing):
+    """把 Playwright request.timing 转换为 HAR 风格的阶段耗时 (ms)
+
+    HAR 1.2 只允许 blocked / dns / connect / ssl 用 -1 表示不可用，send / wait / receive 不可用时记 0。
+    """
+    first = next((timing[k] for k in ("domainLookupStart", "connectStart", "requestStart")
+                  if timing.get(k, -1) >= 0), -1)
+    ssl = _phase(timing, "secureConnectionStart", "connectEnd")
+    connect = _phase(timing, "connectStart", "connectEnd")
+    return {
+        "blocked": first,
+        "dns": _phase(timing, "domainLookupStart", "domainLookupEnd"),
+        "connect": connect,
+        "ssl": ssl,
+        "send": 0,
+        "wait": max(_phase(timing, "requestStart", "responseStart"), 0),
+        "receive": max(_phase(timing, "responseStart", "responseEnd"), 0),
+    }
+
+
+class NetworkRecorder:
+    """记录一个 context 内的全部请求
+
+    用法:
+        recorder = NetworkRecorder()
+        recorder.attach(context)
+        page = context.new_page()
+        recorder.watch(page)     # 开启 CDP initiator 采集（仅 Chromium）
+        ...
+        recorder.print_waterfall()
+        recorder.export_har("/tmp/e2e_network.har")
+    """
+
+    def __init__(self):
+        self.failures = []
+        self._finished = []
+        self._entries = []
+        self._pending = {}
+        self._initiators = {}
+        self._started = time.time() * 1000
+
+    def attach(self, context):
+        context.on("request", self._on_request)
+        context.on("requestfinished", self._on_finished)
+        context.on("requestfailed", self._on_failed)
+        return self
+
+    @property
+    def entries(self):
+        """事件回调里只保存 request，读取 response / sizes 等需要往返的数据推迟到这里"""
+        while self._finished:
+            self._entries.append(self._build_entry(*self._finished.pop(0)))
+        return self._entries
+
+    def watch(self, page):
+        """通过 CDP 记录每个请求的发起者；非 Chromium 浏览器静默跳过"""
+        try:
+            cdp = page.context.new_cdp_session(page)
+            cdp.on("Network.requestWillBeSent", self._on_cdp_request)
+            cdp.send("Network.enable")
+        except Exception:
+            pass
+        return page
+
+    def _on_cdp_request(self, params):
+        initiator = params.get("initiator", {})
+        url = initiator.get("url")
+        if not url and initiator.get("stack"):
+            frames = initiator["stack"].get("callFrames") or []
+            url = frames[0]["url"] if frames else None
+        self._initiators.setdefault(params["request"]["url"], []).append(
+            {"type": initiator.get("type", "other"), "url": url})
+
+    def _on_request(self, request):
+        self._pending[id(request)] = time.time() * 1000
+
+    def _take_initiator(self, url):
+        queue = self._initiators.get(url)
+        return queue.pop(0) if queue else {"type": "other", "url": None}
+
+    def _on_finished(self, request):
+        start = self._pending.pop(id(request), 0)
+        self._finished.append((request, start, self._take_initiator(request.url)))
+
+    def _build_entry(self, request, fallback_start, initiator):
+        response = request.response()
+        timing = request.timing
+        try:
+            sizes = request.sizes()
+        except Exception:
+            sizes = {}
+        headers = response.headers if response else {}
+        start = timing.get("startTime") or fallback_start
+        return {
+            "url": request.url,
+            "method": request.method,
+            "resource_type": request.resource_type,
+            "status": response.status if response else 0,
+            "status_text": response.status_text if response else "",
+            "mime_type": headers.get("content-type", ""),
+            "start": start,
+            "end": start + timing["responseEnd"] if timing.get("responseEnd", -1) >= 0 else start,
+            "phases": timing_phases(timing),
+            "request_headers": dict(request.headers),
+            "response_headers": dict(headers),
+            "cache": {k: headers[k] for k in CACHE_HEADERS if k in headers},
+            "sizes": sizes,
+            "initiator": initiator,
+        }
+
+    def _on_failed(self, request):
+        self._pending.pop(id(request), None)
+        self.failures.append({"url": request.url, "method": request.method, "error": request.failure})
+
+    # ---- 分析 ----
+
+    def responses(self):
+        """兼容旧脚本的 [{url, status}] 视图"""
+        return [{"url": e["url"], "status": e["status"]} for e in self.entries]
+
+    def duplicates(self):
+        """同一 method + URL 被请求多次的列表 [(method, url, 次数)]"""
+        counts = Counter((e["method"], e["url"]) for e in self.entries)
+        return [(method, url, n) for (method, url), n in counts.most_common() if n > 1]
+
+    def uncacheable_static(self):
+        """静态资源缺少缓存头或显式禁止缓存"""
+        flagged = []
+        for e in self.entries:
+            if e["resource_type"] not in STATIC_TYPES and "/_next/static/" not in e["url"]:
+                continue
+            cache_control = e["cache"].get("cache-control", "").lower()
+            if (not e["cache"] or "no-store" in cache_control or "no-cache" in cache_control
+                    or "max-age=0" in cache_control):
+                flagged.append((e["url"], cache_control or "(无缓存头)"))
+        return flagged
+
+    def chains(self, limit=3):
+        """按发起者还原请求链，返回结束最晚的 limit 条链（关键路径候选）"""
+        by_url = {}
+        for e in self.entries:
+            by_url.setdefault(e["url"], e)
+
+        def chain_of(entry):
+            chain = [entry]
+            seen = {entry["url"]}
+            parent_url = entry["initiator"].get("url")
+            while parent_url and parent_url in by_url and parent_url not in seen:
+                parent = by_url[parent_url]
+                chain.append(parent)
+                seen.add(parent_url)
+                parent_url = parent["initiator"].get("url")
+            return list(reversed(chain))
+
+        ranked = sorted(self.entries, key=lambda e: e["end"], reverse=True)
+        result = []
+        seen_tails = set()
+        for entry in ranked:
+            chain = chain_of(entry)
+            key = tuple(e["url"] for e in chain)
+            if len(chain) < 2 or key in seen_tails:
+                continue
+            seen_tails.add(key)
+            result.append(chain)
+            if len(result) >= limit:
+                break
+        return result
+
+    def summary(self):
+        total_bytes = sum(max(0, e["sizes"].get("responseBodySize", 0)) for e in self.entries)
+        span = (max(e["end"] for e in self.entries) - min(e["start"] for e in self.entries)) if self.entries else 0
+        return {
+            "requests": len(self.entries),
+            "failed": len(self.failures),
+            "bytes": total_bytes,
+            "span_ms": span,
+            "by_type": dict(Counter(e["resource_type"] for e in self.entries)),
+            "duplicates": self.duplicates(),
+            "uncacheable_static": self.uncacheable_static(),
+        }
+
+    # ---- 输出 ----
+
+    def print_waterfall(self, width=40, only_api=False):
+        entries = [e for e in self.entries if not only_api or "/api/" in e["url"]]
+        if not entries:
+            print("   无请求")
+            return
+        origin = min(e["start"] for e in entries)
+        span = max(e["end"] for e in entries) - origin or 1
+        for e in sorted(entries, key=lambda x: x["start"]):
+            offset = int((e["start"] - origin) / span * width)
+            length = max(1, int((e["end"] - e["start"]) / span * width))
+            bar = " " * offset + "█" * min(length, width - offset)
+            p = e["phases"]
+            path = urlsplit(e["url"]).path[-38:]
+            print(f"   {bar:<{width}} {e['end'] - e['start']:>6.0f}ms  "
+                  f"ttfb {p['wait']:>5.0f}  dl {p['receive']:>5.0f}  [{e['status']}] {path}")
+
+    def print_analysis(self):
+        duplicates = self.duplicates()
+        print("\n   🔁 重复请求:")
+        if duplicates:
+            for method, url, n in duplicates:
+                print(f"      {n}× {method} {url}")
+        else:
+            print("      无")
+
+        uncacheable = self.uncacheable_static()
+        print(f"\n   🚫 不可缓存的静态资源: {len(uncacheable)} 个")
+        for url, cache_control in uncacheable[:10]:
+            print(f"      {cache_control:<30} {urlsplit(url).path}")
+
+        print("\n   ⛓️  关键路径请求链:")
+        for chain in self.chains():
+            hops = " → ".join(urlsplit(e["url"]).path.rsplit("/", 1)[-1] or "/" for e in chain)
+            print(f"      {chain[-1]['end'] - chain[0]['start']:>6.0f}ms  {hops}")
+
+    def to_har(self, page_title=""):
+        started = min((e["start"] for e in self.entries), default=self._started)
+        page_id = "page_1"
+        entries = []
+        for e in sorted(self.entries, key=lambda x: x["start"]):
+            split = urlsplit(e["url"])
+            phases = e["phases"]
+            total = sum(v for v in phases.values() if v > 0)
+            entries.append({
+                "pageref": page_id,
+                "startedDateTime": _iso(e["start"]),
+                "time": total,
+                "request": {
+                    "method": e["method"],
+                    "url": e["url"],
+                    "httpVersion": "HTTP/1.1",
+                    "headers": [{"name": k, "value": v} for k, v in e["request_headers"].items()],
+                    "queryString": [{"name": k, "value": v} for k, v in parse_qsl(split.query)],
+                    "cookies": [],
+                    "headersSize": e["sizes"].get("requestHeadersSize", -1),
+                    "bodySize": e["sizes"].get("requestBodySize", -1),
+                },
+                "response": {
+                    "status": e["status"],
+                    "statusText": e["status_text"],
+                    "httpVersion": "HTTP/1.1",
+                    "headers": [{"name": k, "value": v} for k, v in e["response_headers"].items()],
+                    "cookies": [],
+                    "content": {"size": e["sizes"].get("responseBodySize", -1), "mimeType": e["mime_type"]},
+                    "redirectURL": e["response_headers"].get("location", ""),
+                    "headersSize": e["sizes"].get("responseHeadersSize", -1),
+                    "bodySize": e["sizes"].get("responseBodySize", -1),
+                },
+                "cache": {},
+                "timings": phases,
+                "_resourceType": e["resource_type"],
+                "_initiator": e["initiator"],
+            })
+        return {
+            "log": {
+                "version": "1.2",
+                "creator": {"name": "ai-zhanggui-e2e", "version": "2.0.0"},
+                "pages": [{
+                    "startedDateTime": _iso(started),
+                    "id": page_id,
+                    "title": page_title,
+                    "pageTimings": {},
+                }],
+                "entries": entries,
+            }
+        }
+
+    def export_har(self, path, page_title=""):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_har(page_title), f, ensure_ascii=False, indent=2)
+        return path
+
+
+def _iso(epoch_ms):
+    seconds, ms = divmod(epoch_ms, 1000)
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)) + f".{int(ms):03d}Z"
@@ -1,75 +1,86 @@
 #!/usr/bin/env python3
 """
-网络请求测试 - 检查所有网络请求
+网络请求测试 - 分析登录页加载的全部网络请求
+记录每个请求的时序阶段、大小、缓存头和发起者，找出重复请求、不可缓存的静态资源和关键请求链，
+并导出 HAR 文件 (/tmp/e2e_network.har)。
 """
 
-from playwright.sync_api import sync_playwright
+import sys
 
-BASE_URL = "http://localhost:3000"
+import e2e_warmup
+from e2e_browser_pool import BrowserPool
+from e2e_network import NetworkRecorder
+from e2e_readiness import format_timings, print_report, wait_until_ready
 
-with sync_playwright() as p:
-    browser = p.chromium.launch(headless=True)
-    page = browser.new_page()
-
-    # 记录所有网络请求
-    requests = []
-    responses = []
-
-    def handle_request(request):
-        requests.append({
-            "url": request.url,
-            "method": request.method
-        })
-
-    def handle_response(response):
-        responses.append({
-            "url": response.url,
-            "status": response.status
-        })
-
-    page.on("request", handle_request)
-    page.on("response", handle_response)
-
-    print("1. 访问登录页面...")
-    page.goto(f"{BASE_URL}/login", timeout=60000)
-
-    print("2. 等待网络空闲...")
-    page.wait_for_load_state('networkidle')
-    page.wait_for_timeout(2000)
-
-    print("\n3. 网络请求汇总:")
-    print(f"   总请求数: {len(requests)}")
-    print(f"   总响应数: {len(responses)}")
-
-    # 显示失败的请求
-    print("\n4. 失败的请求 (状态码 >= 400):")
-    failed = [r for r in responses if r["status"] >= 400]
-    if failed:
-        for r in failed:
-            print(f"   [{r['status']}] {r['url']}")
-    else:
-        print("   无")
-
-    # 显示 API 请求
-    print("\n5. API 请求:")
-    api_requests = [r for r in responses if "/api/" in r["url"]]
-    if api_requests:
-        for r in api_requests:
-            print(f"   [{r['status']}] {r['url']}")
-    else:
-        print("   无 API 请求")
-
-    # 检查 auth/me 是否被调用
-    auth_me = [r for r in responses if "/api/auth/me" in r["url"]]
-    if auth_me:
-        print(f"\n6. /api/auth/me 请求状态: {auth_me[0]['status']}")
-    else:
-        print("\n6. /api/auth/me 未被调用!")
-
-    # 截图
-    page.screenshot(path="/tmp/e2e_network.png", full_page=True)
-    print("\n7. 截图保存到 /tmp/e2e_network.png")
-
-    browser.close()
-
-print("\n测试完成!")
+BASE_URL = "http://localhost:3000"
+HAR_PATH = "/tmp/e2e_network.har"
+
+def test_network(pool):
+    """分析登录页加载的网络请求并导出 HAR"""
+    with pool.context() as context:
+        # 记录所有网络请求
+        recorder = NetworkRecorder().attach(context)
+        page = recorder.watch(context.new_page())
+
+        print("1. 访问登录页面...")
+        page.goto(f"{BASE_URL}/login", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/login", 60000))
+
+        print("2. 等待网络空闲与页面就绪...")
+        page.wait_for_load_state('networkidle')
+        print(f"   ⏱️  {format_timings(wait_until_ready(page))}")
+
+        responses = recorder.responses()
+        summary = recorder.summary()
+
+        print("\n3. 网络请求汇总:")
+        print(f"   总请求数: {summary['requests'] + summary['failed']}")
+        print(f"   总响应数: {summary['requests']}")
+        print(f"   传输字节: {summary['bytes'] / 1024:.1f}KB, 跨度 {summary['span_ms']:.0f}ms")
+        print(f"   按类型: {', '.join(f'{t} {n}' for t, n in sorted(summary['by_type'].items()))}")
+
+        # 显示失败的请求
+        print("\n4. 失败的请求 (状态码 >= 400):")
+        failed = [r for r in responses if r["status"] >= 400]
+        if failed or recorder.failures:
+            for r in failed:
+                print(f"   [{r['status']}] {r['url']}")
+            for r in recorder.failures:
+                print(f"   [{r['error']}] {r['url']}")
+        else:
+            print("   无")
+
+        # 显示 API 请求
+        print("\n5. API 请求瀑布:")
+        recorder.print_waterfall(only_api=True)
+
+        # 检查 auth/me 是否被调用
+        auth_me = [r for r in responses if "/api/auth/me" in r["url"]]
+        if auth_me:
+            print(f"\n6. /api/auth/me 请求状态: {auth_me[0]['status']} (共 {len(auth_me)} 次)")
+            if len(auth_me) > 1:
+                print("   ⚠️  /api/auth/me 被重复请求，检查 AuthContext 是否多次挂载")
+        else:
+            print("\n6. /api/auth/me 未被调用!")
+
+        print("\n7. 全部请求瀑布:")
+        recorder.print_waterfall()
+
+        print("\n8. 请求分析:")
+        recorder.print_analysis()
+
+        recorder.export_har(HAR_PATH, page_title=page.title())
+        print(f"\n9. HAR 已导出到 {HAR_PATH}")
+
+        # 截图
+        page.screenshot(path="/tmp/e2e_network.png", full_page=True)
+        print("\n10. 截图保存到 /tmp/e2e_network.png")
+
+        # 登录页必须触发 /api/auth/me，否则 AuthContext 没有正常初始化
+        return bool(auth_me)
+
+if __name__ == "__main__":
+    with BrowserPool() as pool:
+        success = test_network(pool)
+    print_report()
+    print("\n测试完成!" if success else "\n测试失败!")
+    sys.exit(0 if success else 1)
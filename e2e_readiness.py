@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+E2E 页面就绪等待
+用真实信号代替固定的 wait_for_timeout：
+  - hydrated:     React 已在 DOM 节点上挂载 __reactProps$ / __reactFiber$（hydration 完成）
+  - auth_settled: AuthContext 发出的 /api/auth/me 已返回
+  - loader_gone:  页面上不再有 animate-spin / Loader2 加载图标
+  - login_form:   登录表单已 hydration 且可交互
+每次等待都会记录实际耗时，便于发现慢页面。
+"""
+
+import time
+
+import e2e_warmup
+
+# 检查若干元素上是否存在 React 内部属性，存在即说明 hydration 已完成
+HYDRATED_JS = """() => {
+  if (document.readyState === 'loading') return false
+  const nodes = document.querySelectorAll('body *')
+  for (let i = 0; i < nodes.length && i < 200; i++) {
+    if (Object.keys(nodes[i]).some(k => k.startsWith('__reactFiber$') || k.startsWith('__reactProps$'))) return true
+  }
+  return false
+}"""
+
+AUTH_SETTLED_JS = """() => performance.getEntriesByType('resource')
+  .some(e => e.name.includes('/api/auth/me') && e.responseEnd > 0)"""
+
+LOADER_GONE_JS = """() => !document.querySelector('.animate-spin, .lucide-loader-2, .lucide-loader-circle')"""
+
+LOGIN_FORM_JS = """() => {
+  const fields = ['input#username', 'input#password', 'button[type="submit"]']
+    .map(s => document.querySelector(s))
+  return fields.every(el => el && !el.disabled && el.offsetParent !== null &&
+    Object.keys(el).some(k => k.startsWith('__reactProps$')))
+}"""
+
+SIGNALS = {
+    "hydrated": HYDRATED_JS,
+    "auth_settled": AUTH_SETTLED_JS,
+    "loader_gone": LOADER_GONE_JS,
+    "login_form": LOGIN_FORM_JS,
+}
+
+# 普通页面默认等待的信号（顺序即等待顺序）
+PAGE_SIGNALS = ("hydrated", "auth_settled", "loader_gone")
+LOGIN_SIGNALS = ("hydrated", "auth_settled", "login_form")
+
+# 本进程内所有等待的记录: (url, signal, 耗时 ms, 是否成功)
+TIMINGS = []
+
+
+class ReadinessTimeout(Exception):
+    """等待就绪信号超时"""
+
+
+def wait_for_signal(page, name, timeout=15000):
+    """等待单个信号成立，返回实际等待毫秒数"""
+    started = time.monotonic()
+    try:
+        page.wait_for_function(SIGNALS[name], timeout=timeout)
+    except Exception as e:
+        elapsed = (time.monotonic() - started) * 1000
+        TIMINGS.append((page.url, name, elapsed, False))
+        raise ReadinessTimeout(f"等待 {name} 超时 ({timeout}ms): {e}") from e
+    elapsed = (time.monotonic() - started) * 1000
+    TIMINGS.append((page.url, name, elapsed, True))
+    return elapsed
+
+
+def wait_until_ready(page, signals=PAGE_SIGNALS, timeout=15000):
+    """依次等待多个信号，返回 {信号: 耗时 ms}"""
+    return {name: wait_for_signal(page, name, timeout) for name in signals}
+
+
+def wait_for_login_form(page, timeout=15000):
+    """等待登录页 hydration 完成且表单可交互"""
+    return wait_until_ready(page, LOGIN_SIGNALS, timeout)
+
+
+def goto_ready(page, url, signals=PAGE_SIGNALS, timeout=None):
+    """导航到 url 并等待就绪信号，返回 {信号: 耗时 ms}（含 goto 本身）
+
+    未指定 timeout 时，已预热的路由用 e2e_warmup 的紧超时，否则 60 秒。
+    """
+    if timeout is None:
+        timeout = e2e_warmup.nav_timeout(url, 60000)
+    started = time.monotonic()
+    page.goto(url, timeout=timeout, wait_until="domcontentloaded")
+    timings = {"goto": (time.monotonic() - started) * 1000}
+    timings.update(wait_until_ready(page, signals, timeout))
+    return timings
+
+
+def format_timings(timings):
+    return ", ".join(f"{name} {ms:.0f}ms" for name, ms in timings.items())
+
+
+def print_report():
+    """打印本进程内所有就绪等待的耗时汇总"""
+    if not TIMINGS:
+        return
+    print("\n⏱️  就绪等待耗时:")
+    for url, name, ms, ok in TIMINGS:
+        print(f"   {'✅' if ok else '❌'} {name:<13} {ms:>7.0f}ms  {url}")
@@ -0,0 +1,388 @@
+#!/usr/bin/env python3
+"""
+E2E 网络录制 / 回放
+record 模式在真实运行中把 API 响应（/api/auth/me、/api/skills、/api/v2/shops 等）写入 e2e_fixtures/；
+replay 模式通过 context.route 直接用这些响应应答，不访问后端，UI 检查不再依赖 Supabase / 模型服务，
+耗时也不再受数据库延迟影响。
+
+模式由 E2E_NETWORK_MODE 或 configure() 决定:
+  live     不做任何处理（默认）
+  record   正常访问后端，同时录制响应；与已有录制的 JSON 结构不一致时记为漂移
+  replay   只用录制的响应应答；没有录制的 API 请求返回 404 并记为未命中
+
+范围由 E2E_REPLAY_SCOPE 决定: api（默认，只处理 /api/ 请求）或 all（页面、静态资源一并录制，
+回放时未命中的请求直接中止，可在没有 next dev 的机器上运行）。
+
+同一请求的多次响应按顺序保存为多个变体（如登录前后的 /api/auth/me），回放时每个 context 依次取用，
+取完后重复最后一个。不保存 set-cookie 响应头，但响应体原样保存（如 /api/auth/me 的账号信息），
+因此 e2e_fixtures/ 默认被 .gitignore 忽略。需要共享录制时，先用测试账号录制、检查并改掉其中的
+真实用户数据，再有意识地 git add -f e2e_fixtures/<文件> 提交。
+
+用法:
+    BrowserPool(context_hooks=[e2e_replay.install])
+    python e2e_replay.py report           # 录制概况、过期录制
+    python e2e_replay.py verify           # 请求真实后端，对比 JSON 结构是否漂移
+"""
+
+import argparse
+import base64
+import hashlib
+import inspect
+import json
+import os
+import re
+import sys
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+BASE_URL = "http://localhost:3000"
+ROOT = os.path.dirname(os.path.abspath(__file__))
+FIXTURE_DIR = os.environ.get("E2E_FIXTURES", os.path.join(ROOT, "e2e_fixtures"))
+MODES = ("live", "record", "replay")
+SCOPES = ("api", "all")
+
+# 录制时丢弃的响应头：与传输相关或回放时不再成立
+DROP_HEADERS = {"content-length", "content-encoding", "transfer-encoding", "connection",
+                "keep-alive", "date", "set-cookie"}
+TEXT_TYPES = ("json", "text/", "javascript", "xml", "svg")
+
+MODE = os.environ.get("E2E_NETWORK_MODE", "live")
+SCOPE = os.environ.get("E2E_REPLAY_SCOPE", "api")
+
+# 回放未命中的请求 [(key, url)]
+MISSES = []
+
+_store = None
+
+
+def configure(mode=None, scope=None, root=None):
+    """切换模式 / 范围 / 录制目录，通常在 main() 解析参数后调用一次"""
+    global MODE, SCOPE, _store
+    if mode is not None:
+        if mode not in MODES:
+            raise ValueError(f"未知网络模式: {mode}，可选 {', '.join(MODES)}")
+        MODE = mode
+    if scope is not None:
+        if scope not in SCOPES:
+            raise ValueError(f"未知录制范围: {scope}，可选 {', '.join(SCOPES)}")
+        SCOPE = scope
+    if root is not None or _store is None:
+        _store = FixtureStore(root or FIXTURE_DIR)
+    return _store
+
+
+def store():
+    return _store or configure()
+
+
+def schema_of(value):
+    """JSON 值的结构：对象保留键，数组取第一个元素，标量只保留类型"""
+    if isinstance(value, dict):
+        return {k: schema_of(v) for k, v in sorted(value.items())}
+    if isinstance(value, list):
+        return [schema_of(value[0])] if value else []
+    if value is None:
+        return "null"
+    return type(value).__name__
+
+
+def schema_diff(old, new, path="$"):
+    """比较两个结构，返回差异描述列表；null 与任意类型互相兼容"""
+    if old == new or "null" in (old, new):
+        return []
+    if isinstance(old, dict) and isinstance(new, dict):
+        diffs = [f"{path}.{k}: 字段消失" for k in old if k not in new]
+        diffs += [f"{path}.{k}: 新增字段" for k in new if k not in old]
+        for k in old.keys() & new.keys():
+            diffs += schema_diff(old[k], new[k], f"{path}.{k}")
+        return diffs
+    if isinstance(old, list) and isinstance(new, list):
+        return schema_diff(old[0], new[0], f"{path}[]") if old and new else []
+    return [f"{path}: {_type_name(old)} → {_type_name(new)}"]
+
+
+def _type_name(schema):
+    return "object" if isinstance(schema, dict) else "array" if isinstance(schema, list) else schema
+
+
+def request_key(method, url, post_data=None):
+    """method + 路径 + 排序后的查询串；非 GET 请求再加请求体哈希"""
+    split = urlsplit(url)
+    key = f"{method} {split.path}"
+    if split.query:
+        key += "?" + urlencode(sorted(parse_qsl(split.query, keep_blank_values=True)))
+    if post_data and method != "GET":
+        data = post_data if isinstance(post_data, bytes) else post_data.encode()
+        key += " #" + hashlib.sha1(data).hexdigest()[:12]
+    return key
+
+
+def in_scope(url, scope=None):
+    return (scope or SCOPE) == "all" or urlsplit(url).path.startswith("/api/")
+
+
+class FixtureStore:
+    """每个请求 key 一个 JSON 文件，内含按录制顺序排列的响应变体"""
+
+    def __init__(self, root=FIXTURE_DIR):
+        self.root = root
+        self.drift = []
+        self._cache = {}
+        self._recorded = set()
+        self._previous = {}
+
+    def path_for(self, key):
+        method, _, rest = key.partition(" ")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", rest.split("?")[0].split(" #")[0]).strip("_") or "root"
+        return os.path.join(self.root, f"{method.lower()}_{slug[:60]}_{hashlib.sha1(key.encode()).hexdigest()[:10]}.json")
+
+    def load(self, key):
+        if key not in self._cache:
+            path = self.path_for(key)
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    self._cache[key] = json.load(f)
+            else:
+                self._cache[key] = None
+        return self._cache[key]
+
+    def lookup(self, key, index=0):
+        fixture = self.load(key)
+        if not fixture or not fixture["variants"]:
+            return None
+        return fixture["variants"][min(index, len(fixture["variants"]) - 1)]
+
+    def record(self, key, url, status, headers, body):
+        """追加一个响应变体；本进程第一次录制某个 key 时覆盖旧录制，并与旧结构比较"""
+        variant = {
+            "status": status,
+            "headers": {k: v for k, v in headers.items() if k.lower() not in DROP_HEADERS},
+            "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        content_type = headers.get("content-type", "")
+        if any(t in content_type for t in TEXT_TYPES):
+            variant["text"] = body.decode("utf-8", errors="replace")
+        else:
+            variant["base64"] = base64.b64encode(body).decode()
+        if "json" in content_type:
+            try:
+                variant["schema"] = schema_of(json.loads(body))
+            except ValueError:
+                pass
+
+        if key not in self._recorded:
+            self._recorded.add(key)
+            self._previous[key] = self.load(key)
+            self._cache[key] = {"key": key, "url": url, "variants": []}
+        fixture = self._cache[key]
+        index = len(fixture["variants"])
+        previous = self._previous[key]
+        if previous and index < len(previous["variants"]) and "schema" in variant:
+            old = previous["variants"][index].get("schema")
+            if old is not None:
+                for diff in schema_diff(old, variant["schema"]):
+                    self.drift.append((key, diff))
+        fixture["variants"].append(variant)
+        self._write(key, fixture)
+
+    def _write(self, key, fixture):
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path_for(key)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(fixture, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+
+    def fixtures(self):
+        if not os.path.isdir(self.root):
+            return []
+        result = []
+        for name in sorted(os.listdir(self.root)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.root, name), encoding="utf-8") as f:
+                    result.append(json.load(f))
+        return result
+
+
+def fulfill_args(variant):
+    body = variant["text"].encode() if "text" in variant else base64.b64decode(variant.get("base64", ""))
+    return {"status": variant["status"], "headers": variant["headers"], "body": body}
+
+
+NO_FIXTURE = {"status": 404, "headers": {"content-type": "application/json"},
+              "body": json.dumps({"error": "no recorded fixture"})}
+
+
+def install(context):
+    """context hook：按当前模式挂录制监听或回放路由，live 模式下什么也不做"""
+    if MODE == "live":
+        return None
+    is_async = inspect.iscoroutinefunction(context.new_page)
+    if MODE == "record":
+        return _install_record_async(context) if is_async else _install_record(context)
+    return _install_replay_async(context) if is_async else _install_replay(context)
+
+
+def _record_response(request, response, body):
+    store().record(request_key(request.method, request.url, request.post_data_buffer),
+                   request.url, response.status, response.headers, body)
+
+
+def _install_record(context):
+    def on_finished(request):
+        if not in_scope(request.url):
+            return
+        response = request.response()
+        if response is None:
+            return
+        try:
+            body = response.body()
+        except Exception:
+            return  # 重定向等没有响应体
+        _record_response(request, response, body)
+
+    context.on("requestfinished", on_finished)
+
+
+async def _install_record_async(context):
+    async def on_finished(request):
+        if not in_scope(request.url):
+            return
+        response = await request.response()
+        if response is None:
+            return
+        try:
+            body = await response.body()
+        except Exception:
+            return
+        _record_response(request, response, body)
+
+    context.on("requestfinished", on_finished)
+
+
+def _replay_response(request, counters):
+    key = request_key(request.method, request.url, request.post_data_buffer)
+    index = counters.get(key, 0)
+    counters[key] = index + 1
+    variant = store().lookup(key, index)
+    if variant is None:
+        MISSES.append((key, request.url))
+    return variant
+
+
+def _install_replay(context):
+    counters = {}
+
+    def handle(route):
+        variant = _replay_response(route.request, counters)
+        if variant is not None:
+            route.fulfill(**fulfill_args(variant))
+        elif urlsplit(route.request.url).path.startswith("/api/"):
+            route.fulfill(**NO_FIXTURE)
+        else:
+            route.abort()
+
+    context.route(lambda url: in_scope(url), handle)
+
+
+async def _install_replay_async(context):
+    counters = {}
+
+    async def handle(route):
+        variant = _replay_response(route.request, counters)
+        if variant is not None:
+            await route.fulfill(**fulfill_args(variant))
+        elif urlsplit(route.request.url).path.startswith("/api/"):
+            await route.fulfill(**NO_FIXTURE)
+        else:
+            await route.abort()
+
+    await context.route(lambda url: in_scope(url), handle)
+
+
+def verify(base_url=BASE_URL, timeout=10):
+    """用真实后端重放录制中的 GET JSON 请求，返回 [(key, 差异描述)]"""
+    drift = []
+    for fixture in store().fixtures():
+        method, _, path = fixture["key"].partition(" ")
+        first = fixture["variants"][0] if fixture["variants"] else None
+        if method != "GET" or not first or "schema" not in first:
+            continue
+        try:
+            with urllib.request.urlopen(f"{base_url}{path}", timeout=timeout) as response:
+                status, body = response.status, response.read()
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read()
+        except Exception as e:
+            drift.append((fixture["key"], f"请求失败: {e}"))
+            continue
+        if status != first["status"]:
+            drift.append((fixture["key"], f"状态码 {first['status']} → {status}"))
+        try:
+            current = schema_of(json.loads(body))
+        except ValueError:
+            drift.append((fixture["key"], "响应不再是 JSON"))
+            continue
+        drift += [(fixture["key"], d) for d in schema_diff(first["schema"], current)]
+    return drift
+
+
+def _age_days(fixture):
+    stamps = [v["recorded_at"] for v in fixture["variants"]]
+    if not stamps:
+        return None
+    return (time.time() - time.mktime(time.strptime(min(stamps), "%Y-%m-%dT%H:%M:%S"))) / 86400
+
+
+def print_report(max_age_days=7):
+    """打印录制 / 回放概况：结构漂移、回放未命中、过期录制"""
+    fixtures = store().fixtures()
+    print(f"\n📼 网络模式 {MODE} (范围 {SCOPE})，录制目录 {store().root}: {len(fixtures)} 个请求")
+    if store().drift:
+        print(f"   ⚠️  结构漂移 {len(store().drift)} 处:")
+        for key, diff in store().drift:
+            print(f"      {key}  {diff}")
+    if MISSES:
+        print(f"   ❌ 回放未命中 {len(MISSES)} 次（需重新 record）:")
+        for key in sorted({key for key, _ in MISSES}):
+            print(f"      {key}")
+    stale = [(f["key"], age) for f in fixtures if (age := _age_days(f)) is not None and age > max_age_days]
+    if stale:
+        print(f"   🕰️  超过 {max_age_days} 天未更新的录制 {len(stale)} 个:")
+        for key, age in sorted(stale, key=lambda x: -x[1]):
+            print(f"      {age:>5.0f} 天  {key}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 网络录制管理")
+    parser.add_argument("--fixtures", default=FIXTURE_DIR, help=f"录制目录 (默认 {FIXTURE_DIR})")
+    sub = parser.add_subparsers(dest="command", required=True)
+    report_parser = sub.add_parser("report", help="列出录制及过期情况")
+    report_parser.add_argument("--max-age-days", type=float, default=7)
+    verify_parser = sub.add_parser("verify", help="对比真实后端的响应结构")
+    verify_parser.add_argument("--base-url", default=BASE_URL)
+    args = parser.parse_args(argv)
+
+    configure(root=args.fixtures)
+    if args.command == "report":
+        for fixture in store().fixtures():
+            variants = fixture["variants"]
+            statuses = ",".join(str(v["status"]) for v in variants)
+            print(f"  {fixture['key']:<50} {len(variants)} 个变体  [{statuses}]")
+        print_report(args.max_age_days)
+        return 0
+
+    drift = verify(args.base_url)
+    if not drift:
+        print("✅ 录制与真实后端结构一致")
+        return 0
+    print(f"⚠️  {len(drift)} 处结构漂移，建议用 --network record 重新录制:")
+    for key, diff in drift:
+        print(f"  {key}  {diff}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
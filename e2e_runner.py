@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+AI 掌柜 v2.0 E2E 统一运行器
+自动发现 e2e_*test*.py 中的全部场景（模块级 test_* 函数），按历史耗时做确定性的均衡分片，
+分片可在本机多进程并行，也可以分发到多台 CI 机器，最后合并成一份报告。
+
+用法:
+    python e2e_runner.py list [--shards 4]                    # 查看场景及分片
+    python e2e_runner.py run --jobs 4                         # 本机 4 进程并行并合并
+    python e2e_runner.py run --shard 2/4 --output shard-2.json  # CI 节点只跑第 2 片
+    python e2e_runner.py merge shard-*.json                   # 合并各节点结果
+    python e2e_runner.py run --since origin/main --cache      # 只跑受改动影响的场景（见 e2e_select.py）
+"""
+
+import argparse
+import glob
+import importlib
+import inspect
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import e2e_console
+import e2e_history
+import e2e_replay
+import e2e_select
+import e2e_steps
+import e2e_warmup
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+# 分片用的耗时，提交到仓库供各节点共享；覆盖映射、结果缓存和历史结果库是本机状态，被 .gitignore 忽略
+DURATIONS_PATH = os.environ.get("E2E_DURATIONS", os.path.join(ROOT, ".e2e_durations.json"))
+REPORT_PATH = os.environ.get("E2E_REPORT", "/tmp/e2e_report.json")
+
+# 未记录过耗时的场景按该值估算
+DEFAULT_DURATION = 10.0
+
+
+class Scenario:
+    def __init__(self, module, name, func):
+        self.module = module
+        self.name = name
+        self.func = func
+        self.id = f"{module}.py::{name}"
+        self.wants_pool = "pool" in inspect.signature(func).parameters
+        self.doc = (inspect.getdoc(func) or "").split("\n")[0]
+
+    def run(self, pool):
+        return self.func(pool) if self.wants_pool else self.func()
+
+
+def discover(root=ROOT, pattern="e2e_*test*.py"):
+    """导入匹配的模块并收集其中定义的 test_* 函数，按场景 id 排序"""
+    if root not in sys.path:
+        sys.path.insert(0, root)
+    scenarios = []
+    for path in sorted(glob.glob(os.path.join(root, pattern))):
+        module_name = os.path.splitext(os.path.basename(path))[0]
+        module = importlib.import_module(module_name)
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            # 只收集本模块定义的同步测试函数，跳过从别处导入的
+            if name.startswith("test_") and func.__module__ == module_name and not inspect.iscoroutinefunction(func):
+                scenarios.append(Scenario(module_name, name, func))
+    return sorted(scenarios, key=lambda s: s.id)
+
+
+def load_durations(path=DURATIONS_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_durations(results, path=DURATIONS_PATH, alpha=0.5):
+    """用指数滑动平均更新各场景耗时"""
+    durations = load_durations(path)
+    for r in results:
+        previous = durations.get(r["id"])
+        durations[r["id"]] = round(r["duration"] if previous is None else alpha * r["duration"] + (1 - alpha) * previous, 3)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(durations.items())), f, ensure_ascii=False, indent=2)
+
+
+def known_durations(path=DURATIONS_PATH):
+    """分片用的历史耗时。只读各节点共享的耗时文件（提交到仓库，或 e2e_history.py export-durations 导出），
+    不读本机的历史结果库：那里只有本节点跑过的分片，各节点会算出不同的分片"""
+    return load_durations(path)
+
+
+def estimate(scenario_id, durations):
+    if scenario_id in durations:
+        return durations[scenario_id]
+    known = sorted(durations.values())
+    return known[len(known) // 2] if known else DEFAULT_DURATION
+
+
+def partition(scenarios, shards, durations):
+    """最长处理时间优先 (LPT) 贪心分片：结果只取决于场景 id 和耗时，各机器算出的分片一致"""
+    buckets = [[] for _ in range(shards)]
+    loads = [0.0] * shards
+    ordered = sorted(scenarios, key=lambda s: (-estimate(s.id, durations), s.id))
+    for scenario in ordered:
+        target = min(range(shards), key=lambda i: (loads[i], i))
+        buckets[target].append(scenario)
+        loads[target] += estimate(scenario.id, durations)
+    return buckets, loads
+
+
+def parse_shard(value):
+    index, total = value.split("/")
+    index, total = int(index), int(total)
+    if not 1 <= index <= total:
+        raise argparse.ArgumentTypeError(f"分片编号需在 1..{total} 之间: {value}")
+    return index, total
+
+
+def select(scenarios, patterns):
+    if not patterns:
+        return scenarios
+    return [s for s in scenarios if any(p in s.id for p in patterns)]
+
+
+def run_scenarios(scenarios, shard_label="1/1"):
+    """在一个浏览器池内依次执行场景，返回结果列表"""
+    from e2e_browser_pool import BrowserPool
+    import e2e_screenshots
+
+    results = []
+    e2e_console.start()
+    hooks = [e2e_replay.install, e2e_console.install, e2e_select.install]
+    with BrowserPool(context_hooks=hooks) as pool:
+        for scenario in scenarios:
+            print(f"\n{'─' * 60}\n▶ {scenario.id}")
+            _, record = e2e_steps.run_test(scenario.id, scenario.run, pool)
+            print(f"{'✅' if record.passed else '❌'} {scenario.id} ({record.duration:.1f}s)")
+            if record.steps:
+                e2e_steps.print_steps(record)
+            results.append({**record.to_dict(), "shard": shard_label, "coverage": e2e_select.observed(scenario.id)})
+    e2e_screenshots.finish_run()
+    return results
+
+
+def build_report(results, shards=None, elapsed=None, console=None):
+    passed = sum(1 for r in results if r["passed"])
+    return {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "elapsed": elapsed,
+        "shards": shards or sorted({r["shard"] for r in results}),
+        "summary": {"total": len(results), "passed": passed, "failed": len(results) - passed},
+        "results": sorted(results, key=lambda r: r["id"]),
+        "console": console,
+    }
+
+
+def write_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def print_report(report):
+    print("\n" + "=" * 60)
+    print("测试结果汇总")
+    print("=" * 60)
+    for r in report["results"]:
+        status = "✅ 通过" if r["passed"] else "❌ 失败"
+        if r.get("cached"):
+            status = "♻️  缓存"
+        print(f"  {r['id']:<48} {status}  {r['duration']:>6.1f}s  [{r['shard']}]")
+        if r.get("error"):
+            print(f"      {r['error']}")
+    print("-" * 60)
+    s = report["summary"]
+    elapsed = f", 墙钟 {report['elapsed']:.1f}s" if report.get("elapsed") else ""
+    print(f"总计: {s['passed']} 通过, {s['failed']} 失败 (累计 {sum(r['duration'] for r in report['results']):.1f}s{elapsed})")
+    print("=" * 60)
+    if report.get("console"):
+        e2e_console.print_summary(report["console"])
+
+
+def merge_files(paths):
+    results = []
+    shards = []
+    consoles = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        results.extend(data["results"])
+        shards.extend(data.get("shards", []))
+        consoles.append(data.get("console"))
+    console = e2e_console.merge(consoles) if any(consoles) else None
+    return build_report(results, sorted(set(shards)), console=console)
+
+
+def prepare_routes(args, path=e2e_warmup.REPORT_PATH):
+    """测试开始前预热路由，或读入父进程写好的预热结果"""
+    if args.warmup_from:
+        count = e2e_warmup.load(args.warmup_from)
+        print(f"🔥 已读入 {count} 个预热路由 ({args.warmup_from})")
+    elif args.warmup and args.network != "replay":
+        e2e_warmup.run(path=path)
+
+
+def run_parallel(jobs, args):
+    """本机启动 jobs 个子进程各跑一片，输出按分片缓存后整体打印"""
+    workdir = tempfile.mkdtemp(prefix="e2e_shards_")
+    # 路由只预热一次，子进程读入结果使用紧超时
+    warmup_path = os.path.join(workdir, "warmup.json")
+    prepare_routes(args, warmup_path)
+    processes = []
+    started = time.monotonic()
+    for index in range(1, jobs + 1):
+        output = os.path.join(workdir, f"shard-{index}.json")
+        log_path = os.path.join(workdir, f"shard-{index}.log")
+        cmd = [sys.executable, os.path.abspath(__file__), "run", "--shard", f"{index}/{jobs}",
+               "--output", output, "--no-save-durations", "--network", args.network, "--durations", args.durations]
+        cmd += ["--warmup-from", warmup_path] if e2e_warmup.WARMED else ["--no-warmup"]
+        for pattern in args.select or []:
+            cmd += ["-k", pattern]
+        if args.since:
+            cmd += ["--since", args.since]
+        if args.cache:
+            cmd.append("--cache")
+        # 各分片的控制台事件写到各自的 JSONL，汇总随结果文件合并
+        env = {**os.environ, "E2E_CONSOLE_LOG": os.path.join(workdir, f"console-{index}.jsonl")}
+        log = open(log_path, "w", encoding="utf-8")
+        processes.append((index, subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=ROOT, env=env),
+                          log, log_path, output))
+
+    outputs = []
+    for index, process, log, log_path, output in processes:
+        process.wait()
+        log.close()
+        print(f"\n{'=' * 60}\n分片 {index}/{jobs} 输出 (退出码 {process.returncode})\n{'=' * 60}")
+        with open(log_path, encoding="utf-8") as f:
+            print(f.read())
+        if os.path.exists(output):
+            outputs.append(output)
+        else:
+            print(f"❌ 分片 {index}/{jobs} 没有生成结果文件")
+
+    report = merge_files(outputs)
+    report["elapsed"] = time.monotonic() - started
+    if len(outputs) < jobs:
+        report["summary"]["failed"] += jobs - len(outputs)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 掌柜 v2.0 E2E 统一运行器")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = sub.add_parser("list", help="列出发现的场景及分片")
+    list_parser.add_argument("--shards", type=int, default=1)
+    list_parser.add_argument("--durations", default=DURATIONS_PATH, help=f"分片用的耗时文件 (默认 {DURATIONS_PATH})")
+    list_parser.add_argument("-k", dest="select", action="append", help="按场景 id 子串筛选，可重复")
+    list_parser.add_argument("--since", metavar="REF", help="只列出受 REF 以来改动影响的场景")
+    list_parser.add_argument("--cache", action="store_true", help="依赖未变的场景复用上次通过的结果")
+    list_parser.add_argument("--network", choices=e2e_replay.MODES, default=e2e_replay.MODE)
+
+    run_parser = sub.add_parser("run", help="执行场景")
+    run_parser.add_argument("--shard", type=parse_shard, default=(1, 1), help="只执行第 i/N 片，如 2/4")
+    run_parser.add_argument("--jobs", type=int, default=1, help="本机并行进程数，自动分片并合并")
+    run_parser.add_argument("--output", default=REPORT_PATH, help=f"结果 JSON 路径 (默认 {REPORT_PATH})")
+    run_parser.add_argument("--durations", default=DURATIONS_PATH,
+                            help=f"分片用的耗时文件，各节点需一致 (默认 {DURATIONS_PATH})")
+    run_parser.add_argument("-k", dest="select", action="append", help="按场景 id 子串筛选，可重复")
+    run_parser.add_argument("--network", choices=e2e_replay.MODES, default=e2e_replay.MODE,
+                            help="网络模式: live / record / replay (默认 live)")
+    run_parser.add_argument("--junit", metavar="PATH", help="同时输出 JUnit XML（每个步骤一个 testcase）")
+    run_parser.add_argument("--no-save-durations", action="store_true", help="不更新历史耗时文件和历史结果库")
+    run_parser.add_argument("--no-warmup", dest="warmup", action="store_false",
+                            help="不预热路由（回放模式下总是跳过）")
+    run_parser.add_argument("--warmup-from", metavar="PATH", help="读入已有的预热结果而不重新预热")
+    run_parser.add_argument("--since", metavar="REF",
+                            help="只执行受 REF（与当前分支的合并基点）以来改动影响的场景")
+    run_parser.add_argument("--cache", action="store_true",
+                            help=f"依赖文件内容未变的场景复用上次通过的结果 ({e2e_select.CACHE_PATH})")
+
+    merge_parser = sub.add_parser("merge", help="合并多个分片结果")
+    merge_parser.add_argument("inputs", nargs="+")
+    merge_parser.add_argument("--output", default=REPORT_PATH)
+    merge_parser.add_argument("--junit", metavar="PATH", help="同时输出 JUnit XML")
+    merge_parser.add_argument("--no-save-durations", action="store_true")
+    merge_parser.add_argument("--durations", default=DURATIONS_PATH, help="用合并后的完整结果更新的耗时文件")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "merge":
+        report = merge_files(args.inputs)
+    elif args.command == "run" and args.jobs > 1:
+        report = run_parallel(args.jobs, args)
+    else:
+        scenarios = select(discover(), args.select)
+        if args.command == "run":
+            e2e_replay.configure(args.network)
+            if args.network == "replay":
+                # 不借用浏览器的场景直接发 HTTP 请求，回放模式下没有后端可用
+                skipped = [s for s in scenarios if not s.wants_pool]
+                scenarios = [s for s in scenarios if s.wants_pool]
+                for s in skipped:
+                    print(f"⏭️  回放模式跳过 {s.id}")
+        durations = known_durations(args.durations)
+        total = args.shards if args.command == "list" else args.shard[1]
+        # 先对完整的场景列表分片，再在各自的分片内按改动和缓存筛选：
+        # 覆盖映射和结果缓存是各节点本地的状态，放在分片之前会让各节点算出不同的分片
+        buckets, loads = partition(scenarios, total, durations)
+
+        if args.command == "list":
+            for i, (bucket, load) in enumerate(zip(buckets, loads), 1):
+                print(f"分片 {i}/{total} (预计 {load:.1f}s):")
+                if args.since or args.cache:
+                    e2e_select.plan(bucket, args.since, args.cache, args.network).print()
+                    continue
+                for s in bucket:
+                    print(f"  {s.id:<48} {estimate(s.id, durations):>6.1f}s  {s.doc}")
+            return 0
+
+        index, total = args.shard
+        bucket = buckets[index - 1]
+        selection = e2e_select.plan(bucket, args.since, args.cache, args.network)
+        print("=" * 60)
+        print(f"AI 掌柜 v2.0 E2E 测试 - 分片 {index}/{total} ({len(bucket)}/{len(scenarios)} 个场景, 预计 {loads[index - 1]:.1f}s)")
+        print("=" * 60)
+        if args.since or args.cache:
+            selection.print()
+        started = time.monotonic()
+        results, console = [], None
+        if selection.run:
+            prepare_routes(args)
+            results = run_scenarios(selection.run, f"{index}/{total}")
+            console = e2e_console.finish()
+        # 每片只带入本片内复用的缓存结果，合并时不会重复
+        results += [{**r, "shard": f"{index}/{total}"} for r in selection.cached]
+        report = build_report(results, [f"{index}/{total}"], time.monotonic() - started, console)
+        if args.network != "live":
+            e2e_replay.print_report()
+
+    write_report(report, args.output)
+    if args.junit:
+        e2e_steps.write_junit(args.junit, report["results"])
+    # 缓存结果是之前运行的，不计入耗时和历史
+    fresh = [r for r in report["results"] if not r.get("cached")]
+    # 单个分片只有部分结果，不写回共享的耗时文件，改由 merge 用完整结果更新
+    partial = args.command == "run" and args.jobs == 1 and args.shard[1] > 1
+    if not args.no_save_durations and fresh:
+        if not partial:
+            save_durations(fresh, args.durations)
+        coverage = e2e_select.update_coverage(fresh)
+        if args.command == "run":
+            e2e_select.update_cache(fresh, args.network, coverage)
+            run_id = e2e_history.record_run(fresh, "e2e_runner", report.get("elapsed"))
+            print(f"🗄️  已记入历史结果库 (运行 #{run_id})")
+    print_report(report)
+    print(f"\n📄 结果已写入 {args.output}")
+    if args.junit:
+        print(f"📄 JUnit 报告已写入 {args.junit}")
+    return 0 if report["summary"]["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+E2E 截图管理
+测试线程从浏览器取回截图字节并按 sha1 去重（哈希远快于截图本身），落盘交给后台线程池；
+capture 返回的就是最终文件路径，重复的截图返回先前已保存的文件。
+截图按运行写入独立目录 (/tmp/e2e_runs/<时间戳>/)，并生成 manifest.json。
+
+截图策略:
+  always      每次 capture 都截图（默认）
+  on-failure  只保留失败截图，普通 capture 直接跳过，省掉整页截图的耗时
+  sampled     普通 capture 按 sample_rate 抽样，失败截图总是保留
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ARTIFACT_ROOT = os.environ.get("E2E_ARTIFACT_DIR", "/tmp/e2e_runs")
+POLICIES = ("always", "on-failure", "sampled")
+
+
+class ScreenshotManager:
+    def __init__(self, policy="always", sample_rate=0.25, run_dir=None, workers=2, seed=None):
+        if policy not in POLICIES:
+            raise ValueError(f"未知截图策略: {policy}，可选 {', '.join(POLICIES)}")
+        self.policy = policy
+        self.sample_rate = sample_rate
+        self.run_dir = run_dir or os.path.join(ARTIFACT_ROOT, time.strftime("%Y%m%d-%H%M%S") + f"-{os.getpid()}")
+        os.makedirs(self.run_dir, exist_ok=True)
+        self.manifest = []
+        self.stats = {"captured": 0, "skipped": 0, "deduplicated": 0, "bytes_written": 0}
+        self._random = random.Random(seed)
+        self._by_hash = {}
+        self._last_hash = {}
+        self._names = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="e2e-shot")
+        self._futures = []
+
+    def should_capture(self, failure=False):
+        if failure or self.policy == "always":
+            return True
+        if self.policy == "sampled":
+            return self._random.random() < self.sample_rate
+        return False
+
+    def capture(self, page, name, full_page=True, failure=False):
+        """按策略截图，返回最终文件路径（跳过时返回 None，写盘在后台完成）"""
+        if not self.should_capture(failure):
+            self.stats["skipped"] += 1
+            return None
+        started = time.monotonic()
+        data = page.screenshot(full_page=full_page)
+        return self.submit(name, data, page.url, full_page, failure, (time.monotonic() - started) * 1000)
+
+    async def capture_async(self, page, name, full_page=True, failure=False):
+        if not self.should_capture(failure):
+            self.stats["skipped"] += 1
+            return None
+        started = time.monotonic()
+        data = await page.screenshot(full_page=full_page)
+        return self.submit(name, data, page.url, full_page, failure, (time.monotonic() - started) * 1000)
+
+    def submit(self, name, data, url="", full_page=True, failure=False, capture_ms=0.0):
+        """登记一张截图并交给后台线程写盘，返回最终文件路径；与已有截图字节相同时返回已有文件"""
+        self.stats["captured"] += 1
+        digest = hashlib.sha1(data).hexdigest()
+        with self._lock:
+            # 同名截图不覆盖，依次加序号
+            self._names[name] = self._names.get(name, 0) + 1
+            count = self._names[name]
+            path = os.path.join(self.run_dir, f"{name}.png" if count == 1 else f"{name}-{count}.png")
+            entry = {
+                "id": os.path.splitext(os.path.basename(path))[0],
+                "name": name,
+                "kind": "failure" if failure else "capture",
+                "file": path,
+                "url": url,
+                "full_page": full_page,
+                "capture_ms": round(capture_ms, 1),
+                "captured_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "sha1": digest,
+                "bytes": len(data),
+            }
+            self.manifest.append(entry)
+            previous = self._by_hash.get(digest)
+            unchanged = self._last_hash.get(name) == digest
+            self._last_hash[name] = digest
+            if previous is not None:
+                # 与之前某张截图字节完全相同，不再重复写盘
+                entry["file"] = previous
+                entry["duplicate"] = True
+                entry["unchanged"] = unchanged
+                self.stats["deduplicated"] += 1
+                return previous
+            self._by_hash[digest] = path
+        self._futures.append(self._executor.submit(self._write, entry, data))
+        return path
+
+    def _write(self, entry, data):
+        with open(entry["file"], "wb") as f:
+            f.write(data)
+        with self._lock:
+            self.stats["bytes_written"] += len(data)
+
+    def close(self):
+        """等待所有写盘任务完成并写出 manifest.json，返回 manifest 路径"""
+        for future in self._futures:
+            future.result()
+        self._futures = []
+        self._executor.shutdown(wait=True)
+        path = os.path.join(self.run_dir, "manifest.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "run_dir": self.run_dir,
+                "policy": self.policy,
+                "sample_rate": self.sample_rate,
+                "stats": self.stats,
+                "screenshots": self.manifest,
+            }, f, ensure_ascii=False, indent=2)
+        return path
+
+    def files(self):
+        return sorted({entry["file"] for entry in self.manifest})
+
+
+# 本进程当前运行使用的管理器，未显式 start_run 时按默认策略懒加载
+_manager = None
+
+
+def start_run(policy="always", sample_rate=0.25, run_dir=None):
+    global _manager
+    _manager = ScreenshotManager(policy, sample_rate, run_dir)
+    return _manager
+
+
+def current():
+    global _manager
+    if _manager is None:
+        _manager = ScreenshotManager()
+    return _manager
+
+
+def finish_run():
+    """结束本次运行，返回 (manager, manifest 路径)"""
+    global _manager
+    manager, _manager = _manager, None
+    if manager is None:
+        return None, None
+    return manager, manager.close()
+
+
+def capture(page, name, full_page=True):
+    return current().capture(page, name, full_page)
+
+
+def capture_failure(page, name, full_page=True):
+    """失败截图在任何策略下都会保留"""
+    return current().capture(page, name, full_page, failure=True)
+
+
+async def capture_async(page, name, full_page=True):
+    return await current().capture_async(page, name, full_page)
+
+
+async def capture_failure_async(page, name, full_page=True):
+    return await current().capture_async(page, name, full_page, failure=True)
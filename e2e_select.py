@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""
+E2E 按改动选择场景
+完整运行时作为 context 钩子记录每个场景实际访问到的页面路由、API 路由和 public/ 静态资源，
+写入覆盖映射 (.e2e_coverage.json)。场景的依赖文件由此推出:
+  - 场景所在的测试脚本、e2e_runner.py 以及它们导入的本地 e2e_*.py
+  - 覆盖到的 page.tsx / route.ts，页面所在目录及上级目录的 layout / template / loading / error
+  - 以上 TS 文件经 @/ 和相对路径 import 的传递闭包，以及运行时读取的数据目录（见 RUNTIME_READS）
+  - middleware.ts、next.config.js、package.json 等全局文件的改动影响所有场景
+
+运行前用 git diff 得到改动文件，只执行依赖与改动有交集的场景；依赖文件内容哈希与上次通过时相同的
+场景直接复用缓存结果 (.e2e_cache.json)。没有覆盖记录的场景（如只发 HTTP 请求、不借用浏览器的）总是执行。
+
+缓存只反映代码没变，不反映数据库或模型服务的状态，定时的完整运行不要加 --cache。
+
+用法:
+    python e2e_runner.py run                                  # 完整运行，同时更新覆盖映射和结果缓存
+    python e2e_runner.py run --since origin/main --cache      # 合并前只跑受影响的场景
+    python e2e_runner.py list --since origin/main --cache     # 预览选择结果
+    python e2e_select.py report                               # 查看覆盖映射
+    python e2e_select.py deps e2e_test.py::test_shops_page    # 查看一个场景的依赖文件
+"""
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import e2e_steps
+from e2e_warmup import ROOT, discover_routes
+
+COVERAGE_PATH = os.environ.get("E2E_COVERAGE", os.path.join(ROOT, ".e2e_coverage.json"))
+CACHE_PATH = os.environ.get("E2E_RESULT_CACHE", os.path.join(ROOT, ".e2e_cache.json"))
+
+# 改动后影响所有场景的文件
+GLOBAL_FILES = {
+    "middleware.ts", "next.config.js", "package.json", "package-lock.json", "tsconfig.json",
+    "tailwind.config.ts", "postcss.config.js",
+}
+
+# 运行时用 fs 读取、不会出现在 import 里的目录: 源文件 -> 目录前缀
+RUNTIME_READS = {
+    "lib/skills/loader.ts": ("skills/",),
+    "app/api/skills/route.ts": ("skills/",),
+    "app/api/skills/[id]/route.ts": ("skills/",),
+}
+
+# 页面路由沿目录向上继承的特殊文件
+SEGMENT_FILES = ("layout", "template", "loading", "error", "not-found")
+
+_EXTENSIONS = ("", ".ts", ".tsx", ".js", ".jsx", ".json", "/index.ts", "/index.tsx", "/index.js")
+_IMPORT = re.compile(r"""(?:\bfrom\s+|\bimport\s*\(?\s*|\brequire\s*\(\s*)['"]([^'"]+)['"]""")
+
+# 本进程观察到的覆盖: 场景 id -> {"routes": set, "assets": set}
+OBSERVED = {}
+
+_routes = None
+_file_hashes = {}
+
+
+def routes():
+    """app/ 下的路由，静态路由优先于动态路由匹配"""
+    global _routes
+    if _routes is None:
+        _routes = sorted(discover_routes(), key=lambda r: (r.pattern.count("["), r.kind, r.pattern))
+    return _routes
+
+
+def match_route(path, kind=None):
+    for route in routes():
+        if (kind is None or route.kind == kind) and route.regex.match(path):
+            return route
+    return None
+
+
+# ---------------------------------------------------------------- 采集
+
+def _observe(test, url, kind=None):
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.path:
+        return
+    entry = OBSERVED.setdefault(test, {"routes": set(), "assets": set()})
+    if parts.path.startswith("/_next/"):
+        return
+    route = match_route(parts.path, kind or ("api" if parts.path.startswith("/api/") else "page"))
+    if route is not None:
+        entry["routes"].add(route.pattern)
+    elif os.path.isfile(os.path.join(ROOT, "public", parts.path.lstrip("/"))):
+        entry["assets"].add("public" + parts.path)
+
+
+def _watch(page, test):
+    def on_request(request):
+        if request.resource_type == "document" or "/api/" in request.url:
+            _observe(test, request.url)
+
+    def on_navigated(frame):
+        # 客户端路由跳转没有 document 请求，以主 frame 的 URL 为准
+        if frame == page.main_frame:
+            _observe(test, frame.url, "page")
+
+    page.on("request", on_request)
+    page.on("framenavigated", on_navigated)
+
+
+def install(context):
+    """BrowserPool context 钩子；借出 context 时所属的测试 id 决定覆盖记到哪个场景"""
+    record = e2e_steps.current_test()
+    if record is None:
+        return
+    context.on("page", lambda page: _watch(page, record.id))
+
+
+def observed(test_id):
+    """一个场景本次观察到的覆盖，没有观察到任何路由时返回 None"""
+    entry = OBSERVED.get(test_id)
+    if not entry or not entry["routes"]:
+        return None
+    return {"routes": sorted(entry["routes"]), "assets": sorted(entry["assets"])}
+
+
+# ---------------------------------------------------------------- 依赖
+
+def _resolve(specifier, importer):
+    if specifier.startswith("@/"):
+        base = os.path.join(ROOT, specifier[2:])
+    elif specifier.startswith("."):
+        base = os.path.normpath(os.path.join(ROOT, os.path.dirname(importer), specifier))
+    else:
+        return None
+    for ext in _EXTENSIONS:
+        if os.path.isfile(base + ext):
+            return os.path.relpath(base + ext, ROOT)
+    return None
+
+
+def ts_closure(files):
+    """TS / JS 源文件经本地 import 的传递闭包（相对仓库根目录的路径）"""
+    seen = set()
+    pending = list(files)
+    while pending:
+        path = pending.pop()
+        if path in seen:
+            continue
+        seen.add(path)
+        if not path.endswith((".ts", ".tsx", ".js", ".jsx")):
+            continue
+        try:
+            with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+                source = f.read()
+        except OSError:
+            continue
+        for specifier in _IMPORT.findall(source):
+            resolved = _resolve(specifier, path)
+            if resolved and resolved not in seen:
+                pending.append(resolved)
+    return seen
+
+
+def python_closure(module):
+    """测试脚本及其导入的本地模块"""
+    seen = set()
+    pending = [module]
+    while pending:
+        name = pending.pop()
+        path = f"{name}.py"
+        if path in seen or not os.path.isfile(os.path.join(ROOT, path)):
+            continue
+        seen.add(path)
+        with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+            tree = ast.parse(f.read(), path)
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                pending.extend(alias.name for alias in node.names)
+            elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                pending.append(node.module)
+    return seen
+
+
+def _segment_files(source):
+    """页面所在目录及各级上级目录中的 layout 等文件"""
+    files = []
+    directory = os.path.dirname(source)
+    while directory.startswith("app"):
+        for name in SEGMENT_FILES:
+            for ext in (".tsx", ".ts", ".jsx", ".js"):
+                path = os.path.join(directory, name + ext)
+                if os.path.isfile(os.path.join(ROOT, path)):
+                    files.append(path)
+        directory = os.path.dirname(directory)
+    return files
+
+
+def dependencies(test_id, coverage):
+    """场景的依赖文件和目录前缀；coverage 为 None 时返回 None（依赖未知）"""
+    if coverage is None:
+        return None
+    sources = []
+    by_pattern = {(r.kind, r.pattern): r for r in routes()}
+    for pattern in coverage["routes"]:
+        for kind in ("page", "api"):
+            route = by_pattern.get((kind, pattern))
+            if route is not None:
+                sources.append(route.source)
+                if kind == "page":
+                    sources.extend(_segment_files(route.source))
+    # 运行器安装的 context 钩子同样影响结果，运行器及其导入的模块算作每个场景的依赖
+    files = (ts_closure(sources) | set(coverage.get("assets", []))
+             | python_closure(test_id.split(".py::")[0]) | python_closure("e2e_runner"))
+    prefixes = sorted({p for f in files for p in RUNTIME_READS.get(f, ())})
+    return {"files": sorted(files), "prefixes": prefixes}
+
+
+def _file_hash(path):
+    if path not in _file_hashes:
+        try:
+            with open(os.path.join(ROOT, path), "rb") as f:
+                _file_hashes[path] = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            _file_hashes[path] = "missing"
+    return _file_hashes[path]
+
+
+def _prefix_files(prefix):
+    for dirpath, _, filenames in os.walk(os.path.join(ROOT, prefix)):
+        for name in filenames:
+            yield os.path.relpath(os.path.join(dirpath, name), ROOT)
+
+
+def content_key(deps, mode="live"):
+    """依赖文件（含全局文件和数据目录下的全部文件）内容的哈希，作为结果缓存的键"""
+    digest = hashlib.sha256(f"mode={mode}\n".encode())
+    files = set(deps["files"]) | GLOBAL_FILES
+    for prefix in deps["prefixes"]:
+        files.update(_prefix_files(prefix))
+    for path in sorted(files):
+        digest.update(f"{path}\0{_file_hash(path)}\n".encode())
+    return digest.hexdigest()
+
+
+# ---------------------------------------------------------------- 选择
+
+def changed_files(since):
+    """相对 since 与当前分支的合并基点，工作区中改动过的文件（含暂存和未跟踪的）"""
+    base = subprocess.run(["git", "merge-base", since, "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout.strip()
+    diff = subprocess.run(["git", "diff", "--name-only", base], cwd=ROOT, capture_output=True, text=True,
+                          check=True).stdout.split()
+    untracked = subprocess.run(["git", "ls-files", "--others", "--exclude-standard"], cwd=ROOT,
+                               capture_output=True, text=True, check=True).stdout.split()
+    return set(diff) | set(untracked)
+
+
+def affected(deps, changed):
+    """返回引起影响的改动文件列表"""
+    hits = [f for f in changed if f in GLOBAL_FILES]
+    if deps is None:
+        return hits
+    files = set(deps["files"])
+    hits += [f for f in changed if f in files or f.startswith(tuple(deps["prefixes"]))]
+    return sorted(set(hits))
+
+
+class Plan:
+    """一次运行的选择结果: 要执行的场景、复用缓存的结果、跳过的场景及原因"""
+
+    def __init__(self):
+        self.run = []
+        self.cached = []
+        self.skipped = []
+        self.reasons = {}
+
+    def print(self):
+        total = len(self.run) + len(self.cached) + len(self.skipped)
+        print(f"🎯 场景选择: 共 {total} 个，执行 {len(self.run)}，复用缓存 {len(self.cached)}，跳过 {len(self.skipped)}")
+        for scenario in self.run:
+            print(f"   ▶ {scenario.id:<48} {self.reasons.get(scenario.id, '')}")
+        for result in self.cached:
+            print(f"   ♻️  {result['id']:<48} 依赖未变，复用 {result.get('started_at', '')} 的结果")
+        for scenario in self.skipped:
+            print(f"   ⏭️  {scenario.id:<48} 未受改动影响")
+
+
+def plan(scenarios, since=None, use_cache=False, mode="live"):
+    """按改动和结果缓存划分场景；since 和 use_cache 都未指定时全部执行"""
+    result = Plan()
+    if not since and not use_cache:
+        result.run = list(scenarios)
+        return result
+    coverage = load_coverage()
+    cache = load_cache() if use_cache else {}
+    changed = changed_files(since) if since else None
+    for scenario in scenarios:
+        deps = dependencies(scenario.id, coverage.get(scenario.id))
+        entry = cache.get(scenario.id)
+        if deps is None:
+            result.run.append(scenario)
+            result.reasons[scenario.id] = "无覆盖记录"
+        elif entry and entry["key"] == content_key(deps, mode):
+            result.cached.append({**entry["result"], "cached": True})
+        elif changed is None:
+            result.run.append(scenario)
+            result.reasons[scenario.id] = "依赖已变" if entry else "无缓存结果"
+        else:
+            hits = affected(deps, changed)
+            if hits:
+                result.run.append(scenario)
+                result.reasons[scenario.id] = "改动: " + ", ".join(hits[:3]) + (" …" if len(hits) > 3 else "")
+            else:
+                result.skipped.append(scenario)
+    return result
+
+
+# ---------------------------------------------------------------- 持久化
+
+def _load(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save(data, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(data.items())), f, ensure_ascii=False, indent=2)
+
+
+def load_coverage(path=COVERAGE_PATH):
+    return _load(path)
+
+
+def load_cache(path=CACHE_PATH):
+    return _load(path)
+
+
+def update_coverage(results, path=COVERAGE_PATH):
+    """通过的场景用本次覆盖替换，失败的场景可能提前结束，只做合并"""
+    coverage = load_coverage(path)
+    for r in results:
+        seen = r.get("coverage")
+        if r.get("cached") or not seen:
+            continue
+        previous = coverage.get(r["id"])
+        if not r["passed"] and previous:
+            seen = {key: sorted(set(previous.get(key, [])) | set(seen[key])) for key in ("routes", "assets")}
+        coverage[r["id"]] = {**seen, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    _save(coverage, path)
+    return coverage
+
+
+def update_cache(results, mode="live", coverage=None, path=CACHE_PATH):
+    """缓存通过且有覆盖记录的场景结果；失败的场景清除缓存"""
+    coverage = coverage if coverage is not None else load_coverage()
+    cache = load_cache(path)
+    for r in results:
+        if r.get("cached"):
+            continue
+        deps = dependencies(r["id"], coverage.get(r["id"]))
+        if not r["passed"] or deps is None:
+            cache.pop(r["id"], None)
+            continue
+        result = {k: v for k, v in r.items() if k not in ("coverage", "shard", "calls")}
+        cache[r["id"]] = {"key": content_key(deps, mode), "result": result}
+    _save(cache, path)
+
+
+# ---------------------------------------------------------------- CLI
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 场景覆盖映射与改动选择")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("report", help="打印覆盖映射")
+    deps_parser = sub.add_parser("deps", help="打印一个场景的依赖文件")
+    deps_parser.add_argument("test_id")
+    args = parser.parse_args(argv)
+
+    coverage = load_coverage()
+    if args.command == "report":
+        if not coverage:
+            print(f"没有覆盖记录，先完整运行一次 e2e_runner.py run ({COVERAGE_PATH})")
+            return 1
+        cache = load_cache()
+        for test_id, entry in coverage.items():
+            deps = dependencies(test_id, entry)
+            cached = " ♻️" if test_id in cache else ""
+            print(f"{test_id}  ({len(deps['files'])} 个依赖文件, 更新于 {entry['updated_at']}){cached}")
+            print(f"    {', '.join(entry['routes'])}")
+        return 0
+
+    deps = dependencies(args.test_id, coverage.get(args.test_id))
+    if deps is None:
+        print(f"{args.test_id} 没有覆盖记录，总是执行")
+        return 1
+    for path in deps["files"]:
+        print(path)
+    for prefix in deps["prefixes"]:
+        print(f"{prefix}*")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+E2E 步骤计时
+把测试拆成带名字的步骤，记录每一步的单调时钟起止、重试次数以及步骤内的 Playwright 调用耗时，
+结果可输出为 JSON 或 JUnit XML（每个测试一个 testsuite，每个步骤一个 testcase）。
+
+用法:
+    with e2e_steps.test_case("e2e_login_flow_test.py::test_login_flow"):
+        page = e2e_steps.track(page)          # 可选：记录步骤内的 Playwright 调用
+        with e2e_steps.step("访问登录页"):
+            page.goto(...)
+        e2e_steps.retry("提交表单", lambda: page.click(...), attempts=3)
+
+记录保存在 contextvars 中，asyncio 并发的测试互不干扰；不在 test_case 内调用 step 时不做任何记录。
+"""
+
+import contextvars
+import functools
+import inspect
+import json
+import time
+import traceback
+from contextlib import contextmanager
+from xml.etree import ElementTree as ET
+
+# 本进程已结束的测试记录
+RESULTS = []
+
+# 会被包装以继续记录调用的 Playwright 返回对象
+TRACKED_TYPES = ("Locator", "FrameLocator", "ElementHandle", "Frame", "Keyboard", "Mouse")
+
+_current_test = contextvars.ContextVar("e2e_current_test", default=None)
+_step_stack = contextvars.ContextVar("e2e_step_stack", default=())
+
+
+def _now():
+    return time.monotonic()
+
+
+def _error_text(exc):
+    return f"{type(exc).__name__}: {exc}"
+
+
+class TestRecord:
+    def __init__(self, test_id):
+        self.id = test_id
+        self.started = _now()
+        self.started_at = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.duration = 0.0
+        self.passed = None
+        self.error = None
+        self.steps = []
+        self.calls = []
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "started_at": self.started_at,
+            "passed": bool(self.passed),
+            "duration": round(self.duration, 3),
+            "error": self.error,
+            "steps": self.steps,
+            "calls": self.calls,
+        }
+
+
+@contextmanager
+def test_case(test_id):
+    """开始记录一个测试；退出时计算总耗时并加入 RESULTS。passed 由调用方设置，未设置时以是否抛异常为准"""
+    record = TestRecord(test_id)
+    token = _current_test.set(record)
+    stack_token = _step_stack.set(())
+    try:
+        yield record
+    except BaseException as e:
+        record.passed = False
+        record.error = record.error or _error_text(e)
+        raise
+    finally:
+        record.duration = _now() - record.started
+        if record.passed is None:
+            record.passed = True
+        _step_stack.reset(stack_token)
+        _current_test.reset(token)
+        RESULTS.append(record)
+
+
+def run_test(test_id, func, *args, **kwargs):
+    """在 test_case 内执行测试函数，返回 (结果, 记录)；返回 False 或抛异常视为失败"""
+    with test_case(test_id) as record:
+        try:
+            outcome = func(*args, **kwargs)
+        except Exception as e:
+            outcome = False
+            record.error = _error_text(e)
+            traceback.print_exc()
+        record.passed = outcome is not False
+    return outcome, record
+
+
+async def run_test_async(test_id, func, *args, **kwargs):
+    with test_case(test_id) as record:
+        try:
+            outcome = await func(*args, **kwargs)
+        except Exception as e:
+            outcome = False
+            record.error = _error_text(e)
+        record.passed = outcome is not False
+    return outcome, record
+
+
+def current_test():
+    return _current_test.get()
+
+
+def _open_step(name):
+    record = _current_test.get()
+    if record is None:
+        return None, None
+    stack = _step_stack.get()
+    entry = {
+        "name": " / ".join([s["name"] for s in stack] + [name]),
+        "offset_ms": round((_now() - record.started) * 1000, 1),
+        "duration_ms": 0.0,
+        "status": "passed",
+        "error": None,
+        "attempts": 1,
+        "retries": [],
+        "calls": [],
+    }
+    record.steps.append(entry)
+    return entry, _step_stack.set(stack + (entry,))
+
+
+def _close_step(entry, token, started, exc=None):
+    entry["duration_ms"] = round((_now() - started) * 1000, 1)
+    if exc is not None:
+        entry["status"] = "failed"
+        entry["error"] = _error_text(exc)
+    _step_stack.reset(token)
+
+
+@contextmanager
+def step(name):
+    """记录一个步骤；步骤可以嵌套，嵌套步骤名为 "父 / 子" """
+    entry, token = _open_step(name)
+    if entry is None:
+        yield None
+        return
+    started = _now()
+    try:
+        yield entry
+    except BaseException as e:
+        _close_step(entry, token, started, e)
+        raise
+    _close_step(entry, token, started)
+
+
+def mark_failed(message):
+    """步骤没有抛异常但判定失败时调用（如表单未加载直接 return False）"""
+    stack = _step_stack.get()
+    if stack:
+        stack[-1]["status"] = "failed"
+        stack[-1]["error"] = message
+    record = _current_test.get()
+    if record is not None:
+        record.error = record.error or message
+
+
+def retry(name, func, attempts=3, delay=0.5, exceptions=(Exception,)):
+    """作为一个步骤执行 func，失败时重试，每次失败的耗时和原因记在步骤的 retries 中"""
+    with step(name) as entry:
+        for attempt in range(1, attempts + 1):
+            started = _now()
+            try:
+                result = func()
+            except exceptions as e:
+                if entry is not None:
+                    entry["retries"].append({"attempt": attempt, "duration_ms": round((_now() - started) * 1000, 1),
+                                             "error": _error_text(e)})
+                if attempt == attempts:
+                    raise
+                time.sleep(delay)
+            else:
+                if entry is not None:
+                    entry["attempts"] = attempt
+                return result
+
+
+def record_call(name, duration_ms, error=None):
+    """把一次 Playwright 调用记到当前步骤（不在步骤内时记到测试上）"""
+    stack = _step_stack.get()
+    target = stack[-1]["calls"] if stack else None
+    if target is None:
+        record = _current_test.get()
+        if record is None:
+            return
+        target = record.calls
+    call = {"call": name, "duration_ms": round(duration_ms, 1)}
+    if error is not None:
+        call["error"] = _error_text(error)
+    target.append(call)
+
+
+class _Tracked:
+    """代理 Playwright 对象，记录方法调用耗时；属性访问原样透传"""
+
+    def __init__(self, target, prefix=""):
+        object.__setattr__(self, "_target", target)
+        object.__setattr__(self, "_prefix", prefix)
+
+    def __getattr__(self, name):
+        value = getattr(self._target, name)
+        if name.startswith("_") or not callable(value):
+            return value
+        label = self._prefix + name
+
+        @functools.wraps(value)
+        def call(*args, **kwargs):
+            started = _now()
+            try:
+                result = value(*args, **kwargs)
+            except Exception as e:
+                record_call(label, (_now() - started) * 1000, e)
+                raise
+            if inspect.isawaitable(result):
+                return _await_tracked(result, label, started)
+            record_call(label, (_now() - started) * 1000)
+            return _wrap(result)
+
+        return call
+
+    def __setattr__(self, name, value):
+        setattr(self._target, name, value)
+
+    def __repr__(self):
+        return f"<tracked {self._target!r}>"
+
+
+async def _await_tracked(awaitable, label, started):
+    try:
+        result = await awaitable
+    except Exception as e:
+        record_call(label, (_now() - started) * 1000, e)
+        raise
+    record_call(label, (_now() - started) * 1000)
+    return _wrap(result)
+
+
+def _wrap(value):
+    name = type(value).__name__
+    if name in TRACKED_TYPES:
+        return _Tracked(value, name[0].lower() + name[1:] + ".")
+    return value
+
+
+def track(page):
+    """返回记录调用耗时的 page 代理，可直接替代原 page 使用"""
+    return page if isinstance(page, _Tracked) else _Tracked(page)
+
+
+# ---- 输出 ----
+
+def to_dicts(records=None):
+    return [r.to_dict() if isinstance(r, TestRecord) else r for r in (RESULTS if records is None else records)]
+
+
+def write_json(path, records=None):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "tests": to_dicts(records)},
+                  f, ensure_ascii=False, indent=2)
+    return path
+
+
+def to_junit(records=None):
+    """每个测试一个 testsuite；有步骤时每个步骤一个 testcase，否则整个测试作为一个 testcase"""
+    tests = to_dicts(records)
+    root = ET.Element("testsuites", name="e2e", tests=str(len(tests)),
+                      failures=str(sum(1 for t in tests if not t["passed"])),
+                      time=f"{sum(t['duration'] for t in tests):.3f}")
+    for test in tests:
+        steps = test.get("steps") or []
+        cases = steps or [{"name": test["id"].rsplit("::", 1)[-1], "duration_ms": test["duration"] * 1000,
+                           "status": "passed" if test["passed"] else "failed", "error": test.get("error"),
+                           "calls": test.get("calls", []), "retries": []}]
+        failures = sum(1 for c in cases if c["status"] == "failed")
+        # 测试失败但没有任何步骤标记失败时，在 suite 上单独记一个失败用例
+        orphan_failure = not test["passed"] and failures == 0
+        suite = ET.SubElement(root, "testsuite", name=test["id"], timestamp=test.get("started_at", ""),
+                              tests=str(len(cases) + orphan_failure), failures=str(failures + orphan_failure),
+                              time=f"{test['duration']:.3f}")
+        for case in cases:
+            element = ET.SubElement(suite, "testcase", classname=test["id"], name=case["name"],
+                                    time=f"{case['duration_ms'] / 1000:.3f}")
+            if case["status"] == "failed":
+                ET.SubElement(element, "failure", message=case.get("error") or "failed")
+            lines = [f"{c['call']} {c['duration_ms']:.0f}ms" + (f" ({c['error']})" if c.get("error") else "")
+                     for c in case.get("calls", [])]
+            lines += [f"retry #{r['attempt']} {r['duration_ms']:.0f}ms: {r['error']}" for r in case.get("retries", [])]
+            if lines:
+                ET.SubElement(element, "system-out").text = "\n".join(lines)
+        if orphan_failure:
+            element = ET.SubElement(suite, "testcase", classname=test["id"], name="(测试结果)", time="0.000")
+            ET.SubElement(element, "failure", message=test.get("error") or "测试返回 False")
+    return root
+
+
+def write_junit(path, records=None):
+    tree = ET.ElementTree(to_junit(records))
+    ET.indent(tree)
+    tree.write(path, encoding="utf-8", xml_declaration=True)
+    return path
+
+
+def print_steps(record):
+    """打印单个测试的步骤耗时"""
+    record = record.to_dict() if isinstance(record, TestRecord) else record
+    print(f"\n⏱️  {record['id']} 步骤耗时 (共 {record['duration']:.2f}s):")
+    for s in record.get("steps", []):
+        mark = "✅" if s["status"] == "passed" else "❌"
+        retries = f"  重试 {len(s['retries'])} 次" if s.get("retries") else ""
+        print(f"   {mark} +{s['offset_ms']:>7.0f}ms  {s['duration_ms']:>7.0f}ms  {s['name']}{retries}")
+        for c in sorted(s.get("calls", []), key=lambda c: -c["duration_ms"])[:3]:
+            print(f"         {c['duration_ms']:>7.0f}ms  {c['call']}")
@@ -4,311 +4,277 @@ AI 掌柜 v2.0 E2E 测试脚本
 使用 Playwright 进行端到端测试
 """
 
+import argparse
+import asyncio
 import json
+import os
 import sys
-from playwright.sync_api import sync_playwright, expect
+import time
+import e2e_budgets
+import e2e_console
+import e2e_dom
+import e2e_history
+import e2e_replay
+import e2e_screenshots
+import e2e_steps
+import e2e_vitals
+import e2e_warmup
+from e2e_browser_pool import BrowserPool
+from e2e_endpoints import API_ENDPOINTS, V2_API_ENDPOINTS
 
 BASE_URL = "http://localhost:3000"
 
-def test_homepage():
+# 首页导航栏中应当出现的关键导航项
+NAV_ITEMS = ["技能广场", "我的店铺", "我的技能", "开发工具"]
+
+VIEWPORTS = [
+    {"width": 1920, "height": 1080, "name": "Desktop"},
+    {"width": 768, "height": 1024, "name": "Tablet"},
+    {"width": 375, "height": 667, "name": "Mobile"},
+]
+
+# 以下 check_* 只处理从页面取回的数据，顺序模式和 e2e_async_runner.py 并发模式共用同一份断言
+
+def check_homepage(title, nav_count, main_count, log=print):
+    """首页: 标题、导航栏、主内容区域"""
+    log(f"  页面标题: {title}")
+    assert "AI 掌柜" in title or "掌柜" in title or "Skills" in title, f"标题不正确: {title}"
+
+    assert nav_count > 0, "找不到导航栏"
+    log("  ✅ 导航栏存在")
+
+    assert main_count > 0, "找不到主内容区域"
+    log("  ✅ 主内容区域存在")
+
+def check_login_form(username_count, password_count, button_count, log=print):
+    """登录页: 用户名 / 密码输入框和登录按钮"""
+    if username_count > 0:
+        log("  ✅ 用户名输入框存在")
+    else:
+        log("  ⚠️  用户名输入框可能使用其他选择器")
+
+    if password_count > 0:
+        log("  ✅ 密码输入框存在")
+    else:
+        log("  ⚠️  密码输入框可能使用其他选择器")
+
+    if button_count > 0:
+        log("  ✅ 登录按钮存在")
+
+def check_requires_login(dom, page_name, log=print):
+    """页面显示登录内容时返回 True，重定向到登录页是预期行为"""
+    if dom.contains("登录", "login", ignore_case=True):
+        log(f"  ⚠️  需要登录才能访问{page_name}")
+        return True
+    return False
+
+def check_skill_detail(dom, textarea_count, log=print):
+    """技能详情页: 技能名称和文本输入区域"""
+    if dom.contains("朋友圈", "文案"):
+        log("  ✅ 技能名称显示正确")
+
+    if textarea_count > 0:
+        log("  ✅ 文本输入区域存在")
+
+def check_navigation(dom, log=print):
+    """导航链接数量和关键导航项"""
+    log(f"  找到 {len(dom.nav_links)} 个导航链接")
+    for item in NAV_ITEMS:
+        if dom.contains(item):
+            log(f"  ✅ 导航项 '{item}' 存在")
+        else:
+            log(f"  ⚠️  导航项 '{item}' 未找到")
+
+def report_shot(shot, log=print):
+    if shot:
+        log(f"  📸 截图保存到 {shot}")
+
+def viewport_line(vp, shot):
+    return f"  ✅ {vp['name']} ({vp['width']}x{vp['height']}): " + (f"截图保存到 {shot}" if shot else "截图已跳过")
+
+def test_homepage(pool):
     """测试首页加载"""
     print("\n=== 测试首页 ===")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
         try:
-            page.goto(BASE_URL, timeout=30000)
+            page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
             page.wait_for_load_state('networkidle')
+            e2e_vitals.capture(page)
 
-            # 检查页面标题
-            title = page.title()
-            print(f"  页面标题: {title}")
-            assert "AI 掌柜" in title or "掌柜" in title or "Skills" in title, f"标题不正确: {title}"
-
-            # 检查导航栏
-            nav = page.locator('header nav, header')
-            assert nav.count() > 0, "找不到导航栏"
-            print("  ✅ 导航栏存在")
-
-            # 检查是否有技能卡片或内容
-            content = page.locator('main')
-            assert content.count() > 0, "找不到主内容区域"
-            print("  ✅ 主内容区域存在")
+            check_homepage(page.title(), page.locator('header nav, header').count(), page.locator('main').count())
 
-            # 截图
-            page.screenshot(path="/tmp/e2e_homepage.png", full_page=True)
-            print("  📸 截图保存到 /tmp/e2e_homepage.png")
+            report_shot(e2e_screenshots.capture(page, "homepage"))
 
             print("  ✅ 首页测试通过")
             return True
         except Exception as e:
             print(f"  ❌ 首页测试失败: {e}")
-            page.screenshot(path="/tmp/e2e_homepage_error.png", full_page=True)
+            e2e_screenshots.capture_failure(page, "homepage_error")
             return False
-        finally:
-            browser.close()
 
-def test_login_page():
+def test_login_page(pool):
     """测试登录页面"""
     print("\n=== 测试登录页面 ===")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
         try:
-            page.goto(f"{BASE_URL}/login", timeout=30000)
+            page.goto(f"{BASE_URL}/login", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/login"))
             page.wait_for_load_state('networkidle')
+            e2e_vitals.capture(page)
 
-            # 检查登录表单
-            username_input = page.locator('input[name="username"], input[type="text"]').first
-            password_input = page.locator('input[name="password"], input[type="password"]').first
+            check_login_form(
+                page.locator('input[name="username"], input[type="text"]').first.count(),
+                page.locator('input[name="password"], input[type="password"]').first.count(),
+                page.locator('button[type="submit"], button:has-text("登录")').count(),
+            )
 
-            if username_input.count() > 0:
-                print("  ✅ 用户名输入框存在")
-            else:
-                print("  ⚠️  用户名输入框可能使用其他选择器")
-
-            if password_input.count() > 0:
-                print("  ✅ 密码输入框存在")
-            else:
-                print("  ⚠️  密码输入框可能使用其他选择器")
-
-            # 检查登录按钮
-            login_button = page.locator('button[type="submit"], button:has-text("登录")')
-            if login_button.count() > 0:
-                print("  ✅ 登录按钮存在")
-
-            page.screenshot(path="/tmp/e2e_login.png", full_page=True)
-            print("  📸 截图保存到 /tmp/e2e_login.png")
+            report_shot(e2e_screenshots.capture(page, "login"))
 
             print("  ✅ 登录页面测试通过")
             return True
         except Exception as e:
             print(f"  ❌ 登录页面测试失败: {e}")
-            page.screenshot(path="/tmp/e2e_login_error.png", full_page=True)
+            e2e_screenshots.capture_failure(page, "login_error")
             return False
-        finally:
-            browser.close()
 
-def test_shops_page():
+def test_shops_page(pool):
     """测试店铺列表页面"""
     print("\n=== 测试店铺列表页面 ===")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
         try:
-            page.goto(f"{BASE_URL}/shops", timeout=30000)
+            page.goto(f"{BASE_URL}/shops", timeout=e2e_warmup.nav_timeout(f"{BASE_URL}/shops"))
             page.wait_for_load_state('networkidle')
+            e2e_vitals.capture(page)
 
-            # 检查页面内容
-            content = page.content()
-
-            # 可能需要登录才能访问
-            if "登录" in content or "login" in content.lower():
-                print("  ⚠️  需要登录才能访问店铺页面")
-                page.screenshot(path="/tmp/e2e_shops_redirect.png", full_page=True)
-                return True  # 重定向到登录页是预期行为
+            if check_requires_login(e2e_dom.snapshot(page), "店铺页面"):
+                e2e_screenshots.capture(page, "shops_redirect")
+                return True
 
-            # 检查页面元素
-            page.screenshot(path="/tmp/e2e_shops.png", full_page=True)
-            print("  📸 截图保存到 /tmp/e2e_shops.png")
+            report_shot(e2e_screenshots.capture(page, "shops"))
 
             print("  ✅ 店铺列表页面测试通过")
             return True
         except Exception as e:
             print(f"  ❌ 店铺列表页面测试失败: {e}")
-            page.screenshot(path="/tmp/e2e_shops_error.png", full_page=True)
+            e2e_screenshots.capture_failure(page, "shops_error")
             return False
-        finally:
-            browser.close()
 
-def test_skill_detail_page():
+def test_skill_detail_page(pool):
     """测试技能详情页"""
     print("\n=== 测试技能详情页 ===")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
         # 测试朋友圈文案技能
         skill_id = "moments-copywriter"
+        url = f"{BASE_URL}/skill/{skill_id}"
 
         try:
-            page.goto(f"{BASE_URL}/skill/{skill_id}", timeout=30000)
+            page.goto(url, timeout=e2e_warmup.nav_timeout(url))
             page.wait_for_load_state('networkidle')
+            e2e_vitals.capture(page)
 
-            content = page.content()
-
-            # 可能需要登录
-            if "登录" in content or "login" in content.lower():
-                print("  ⚠️  需要登录才能访问技能详情页")
+            dom = e2e_dom.snapshot(page)
+            if check_requires_login(dom, "技能详情页"):
                 return True
 
-            # 检查技能名称
-            if "朋友圈" in content or "文案" in content:
-                print("  ✅ 技能名称显示正确")
+            check_skill_detail(dom, page.locator('textarea').count())
 
-            # 检查输入区域
-            textarea = page.locator('textarea')
-            if textarea.count() > 0:
-                print("  ✅ 文本输入区域存在")
-
-            page.screenshot(path="/tmp/e2e_skill_detail.png", full_page=True)
-            print("  📸 截图保存到 /tmp/e2e_skill_detail.png")
+            report_shot(e2e_screenshots.capture(page, "skill_detail"))
 
             print("  ✅ 技能详情页测试通过")
             return True
         except Exception as e:
             print(f"  ❌ 技能详情页测试失败: {e}")
-            page.screenshot(path="/tmp/e2e_skill_detail_error.png", full_page=True)
+            e2e_screenshots.capture_failure(page, "skill_detail_error")
             return False
-        finally:
-            browser.close()
 
-def test_api_endpoints():
+def test_api_endpoints(log=print):
     """测试 API 端点"""
-    print("\n=== 测试 API 端点 ===")
+    log("\n=== 测试 API 端点 ===")
 
     import urllib.request
     import urllib.error
 
-    endpoints = [
-        ("/api/skills", "技能列表 API"),
-        ("/api/health", "健康检查 API"),
-    ]
-
     results = []
 
-    for endpoint, name in endpoints:
+    for endpoint, name in API_ENDPOINTS:
         try:
             url = f"{BASE_URL}{endpoint}"
             req = urllib.request.Request(url)
             with urllib.request.urlopen(req, timeout=10) as response:
                 status = response.status
-                print(f"  ✅ {name} ({endpoint}): {status}")
+                log(f"  ✅ {name} ({endpoint}): {status}")
                 results.append(True)
         except urllib.error.HTTPError as e:
             if e.code == 401:
-                print(f"  ⚠️  {name} ({endpoint}): 401 (需要认证 - 预期行为)")
+                log(f"  ⚠️  {name} ({endpoint}): 401 (需要认证 - 预期行为)")
                 results.append(True)
             else:
-                print(f"  ❌ {name} ({endpoint}): {e.code}")
+                log(f"  ❌ {name} ({endpoint}): {e.code}")
                 results.append(False)
         except Exception as e:
-            print(f"  ❌ {name} ({endpoint}): {e}")
+            log(f"  ❌ {name} ({endpoint}): {e}")
             results.append(False)
 
     # 测试 v2 API
-    v2_endpoints = [
-        ("/api/v2/shops", "店铺管理 API"),
-        ("/api/v2/generate", "生成 API"),
-        ("/api/v2/content/check", "内容检测 API"),
-    ]
-
-    for endpoint, name in v2_endpoints:
+    for endpoint, name in V2_API_ENDPOINTS:
         try:
             url = f"{BASE_URL}{endpoint}"
             req = urllib.request.Request(url)
             with urllib.request.urlopen(req, timeout=10) as response:
                 status = response.status
-                print(f"  ✅ {name} ({endpoint}): {status}")
+                log(f"  ✅ {name} ({endpoint}): {status}")
                 results.append(True)
         except urllib.error.HTTPError as e:
             if e.code in [401, 405]:  # 401=未认证, 405=方法不允许 (GET on POST-only)
-                print(f"  ✅ {name} ({endpoint}): {e.code} (预期行为)")
+                log(f"  ✅ {name} ({endpoint}): {e.code} (预期行为)")
                 results.append(True)
             else:
-                print(f"  ❌ {name} ({endpoint}): {e.code}")
+                log(f"  ❌ {name} ({endpoint}): {e.code}")
                 results.append(False)
         except Exception as e:
-            print(f"  ❌ {name} ({endpoint}): {e}")
+            log(f"  ❌ {name} ({endpoint}): {e}")
             results.append(False)
 
     return all(results)
 
-def test_navigation():
+def test_navigation(pool):
     """测试导航功能"""
     print("\n=== 测试导航功能 ===")
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-        page = browser.new_page()
-
+    with pool.page() as page:
         try:
-            page.goto(BASE_URL, timeout=30000)
+            page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
             page.wait_for_load_state('networkidle')
+            e2e_vitals.capture(page)
 
-            # 查找导航链接
-            nav_links = page.locator('header a, nav a')
-            link_count = nav_links.count()
-            print(f"  找到 {link_count} 个导航链接")
-
-            # 检查关键导航项
-            nav_items = ["技能广场", "我的店铺", "我的技能", "开发工具"]
-            page_content = page.content()
-
-            for item in nav_items:
-                if item in page_content:
-                    print(f"  ✅ 导航项 '{item}' 存在")
-                else:
-                    print(f"  ⚠️  导航项 '{item}' 未找到")
+            # 导航链接和页面文本一次取回
+            check_navigation(e2e_dom.snapshot(page))
 
             print("  ✅ 导航测试完成")
             return True
         except Exception as e:
             print(f"  ❌ 导航测试失败: {e}")
             return False
-        finally:
-            browser.close()
 
-def test_responsive_design():
+def test_responsive_design(pool):
     """测试响应式设计"""
     print("\n=== 测试响应式设计 ===")
 
-    viewports = [
-        {"width": 1920, "height": 1080, "name": "Desktop"},
-        {"width": 768, "height": 1024, "name": "Tablet"},
-        {"width": 375, "height": 667, "name": "Mobile"},
-    ]
-
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=True)
-
-        for vp in viewports:
-            try:
-                page = browser.new_page(viewport={"width": vp["width"], "height": vp["height"]})
-                page.goto(BASE_URL, timeout=30000)
+    for vp in VIEWPORTS:
+        try:
+            with pool.page(viewport={"width": vp["width"], "height": vp["height"]}) as page:
+                page.goto(BASE_URL, timeout=e2e_warmup.nav_timeout(BASE_URL))
                 page.wait_for_load_state('networkidle')
+                e2e_vitals.capture(page)
 
                 # 截图
-                filename = f"/tmp/e2e_responsive_{vp['name'].lower()}.png"
-                page.screenshot(path=filename, full_page=True)
-                print(f"  ✅ {vp['name']} ({vp['width']}x{vp['height']}): 截图保存到 {filename}")
-
-                page.close()
-            except Exception as e:
-                print(f"  ❌ {vp['name']}: {e}")
-
-        browser.close()
-        print("  ✅ 响应式设计测试完成")
-        return True
-
-def main():
-    """运行所有测试"""
-    print("=" * 60)
-    print("AI 掌柜 v2.0 E2E 测试")
-    print("=" * 60)
+                print(viewport_line(vp, e2e_screenshots.capture(page, f"responsive_{vp['name'].lower()}")))
+        except Exception as e:
+            print(f"  ❌ {vp['name']}: {e}")
 
-    results = {
-        "首页": test_homepage(),
-        "登录页面": test_login_page(),
-        "店铺列表": test_shops_page(),
-        "技能详情页": test_skill_detail_page(),
-        "API 端点": test_api_endpoints(),
-        "导航功能": test_navigation(),
-        "响应式设计": test_responsive_design(),
-    }
+    print("  ✅ 响应式设计测试完成")
+    return True
 
+def print_summary(results):
+    """打印测试结果汇总表，返回 (通过数, 失败数)"""
     print("\n" + "=" * 60)
     print("测试结果汇总")
     print("=" * 60)
@@ -317,6 +283,9 @@ def main():
     failed = 0
 
     for name, result in results.items():
+        if result is None:
+            print(f"  {name}: ⏭️  跳过")
+            continue
         status = "✅ 通过" if result else "❌ 失败"
         print(f"  {name}: {status}")
         if result:
@@ -327,13 +296,133 @@ def main():
     print("-" * 60)
     print(f"总计: {passed} 通过, {failed} 失败")
     print("=" * 60)
+    return passed, failed
+
+def run(test, *args):
+    """执行单个测试并记录到 e2e_steps，场景 id 与 e2e_runner.py 一致"""
+    _, record = e2e_steps.run_test(f"e2e_test.py::{test.__name__}", test, *args)
+    return record.passed
+
+def run_sync():
+    """顺序执行所有测试"""
+    # 整个会话共用一个浏览器进程，每个测试借出独立的 context
+    with BrowserPool(context_hooks=[e2e_vitals.install, e2e_replay.install, e2e_console.install]) as pool:
+        results = {
+            "首页": run(test_homepage, pool),
+            "登录页面": run(test_login_page, pool),
+            "店铺列表": run(test_shops_page, pool),
+            "技能详情页": run(test_skill_detail_page, pool),
+            # 回放模式下没有后端，直接发 HTTP 请求的 API 端点检查记为跳过
+            "API 端点": run(test_api_endpoints) if e2e_replay.MODE != "replay" else None,
+            "导航功能": run(test_navigation, pool),
+            "响应式设计": run(test_responsive_design, pool),
+        }
+        print(f"\n🌐 浏览器启动 {pool.stats['launches']} 次, 借出 context {pool.stats['checkouts']} 次")
+    return results
+
+def main(argv=None):
+    """运行所有测试"""
+    parser = argparse.ArgumentParser(description="AI 掌柜 v2.0 E2E 测试")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="使用 asyncio 并发执行页面测试")
+    parser.add_argument("--concurrency", type=int, default=4,
+                        help="并发模式下同时运行的测试数 (默认 4)")
+    parser.add_argument("--vitals-report", default=e2e_vitals.REPORT_PATH,
+                        help=f"页面性能指标 JSON 报告路径 (默认 {e2e_vitals.REPORT_PATH})")
+    parser.add_argument("--screenshots", choices=e2e_screenshots.POLICIES, default="always",
+                        help="截图策略: always / on-failure / sampled (默认 always)")
+    parser.add_argument("--sample-rate", type=float, default=0.25,
+                        help="sampled 策略下普通截图的抽样比例 (默认 0.25)")
+    parser.add_argument("--visual-baseline", metavar="DIR",
+                        help="与该目录中的基线截图做视觉回归对比（需要 numpy / Pillow）")
+    parser.add_argument("--update-visual-baseline", action="store_true",
+                        help="把本次截图写入 --visual-baseline 目录作为新基线")
+    parser.add_argument("--network", choices=e2e_replay.MODES, default=e2e_replay.MODE,
+                        help="网络模式: live / record 录制 API 响应 / replay 用录制回放 (默认 live)")
+    parser.add_argument("--results-json", metavar="PATH",
+                        help="输出每个测试及其步骤耗时的 JSON 结果")
+    parser.add_argument("--junit", metavar="PATH",
+                        help="输出 JUnit XML 结果（每个步骤一个 testcase）")
+    parser.add_argument("--no-warmup", dest="warmup", action="store_false",
+                        help="测试前不预热路由（回放模式下总是跳过）")
+    parser.add_argument("--budgets", default=e2e_budgets.BUDGETS_PATH,
+                        help=f"页面性能预算文件，超出预算则本次运行失败 (默认 {e2e_budgets.BUDGETS_PATH})")
+    parser.add_argument("--budget-profile", help="预算 profile: dev / prod (默认取预算文件中的 profile)")
+    parser.add_argument("--no-budgets", dest="enforce_budgets", action="store_false",
+                        help="不检查性能预算")
+    parser.add_argument("--no-history", dest="history", action="store_false",
+                        help=f"不把本次结果写入历史结果库 ({e2e_history.DB_PATH})")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("AI 掌柜 v2.0 E2E 测试")
+    print("=" * 60)
 
-    # 列出截图文件
-    print("\n📸 截图文件:")
-    import os
-    for f in os.listdir("/tmp"):
-        if f.startswith("e2e_") and f.endswith(".png"):
-            print(f"  /tmp/{f}")
+    e2e_replay.configure(args.network)
+    e2e_screenshots.start_run(args.screenshots, args.sample_rate)
+    e2e_console.start()
+
+    # 先让 next dev 编译所有路由，测试中已预热的页面使用紧超时
+    if args.warmup and e2e_replay.MODE != "replay":
+        e2e_warmup.run(BASE_URL)
+
+    started = time.monotonic()
+    if args.use_async:
+        from e2e_async_runner import run_async
+        results = asyncio.run(run_async(concurrency=args.concurrency))
+    else:
+        results = run_sync()
+
+    # 等待截图后台写盘完成，视觉对比需要读取这些文件
+    shots, manifest_path = e2e_screenshots.finish_run()
+
+    if args.visual_baseline:
+        import e2e_visual_diff
+        if args.update_visual_baseline:
+            copied = e2e_visual_diff.update_baseline(shots.run_dir, args.visual_baseline)
+            print(f"\n🖼️  已更新 {len(copied)} 张基线截图到 {args.visual_baseline}")
+        else:
+            diffs = e2e_visual_diff.compare_dirs(args.visual_baseline, shots.run_dir,
+                                                 masks=e2e_visual_diff.load_masks(),
+                                                 require_current=shots.policy == "always")
+            e2e_visual_diff.print_results(diffs)
+            results["视觉回归"] = e2e_visual_diff.passed(diffs)
+
+    # 性能预算作为运行门禁，和测试结果一起计入汇总
+    if args.enforce_budgets and e2e_vitals.SAMPLES and os.path.exists(args.budgets):
+        results["性能预算"] = e2e_budgets.gate(e2e_vitals.build_report(), args.budgets, args.budget_profile)
+
+    passed, failed = print_summary(results)
+    elapsed = time.monotonic() - started
+    print(f"耗时: {elapsed:.1f}s")
+
+    if args.history:
+        run_id = e2e_history.record_run(e2e_steps.to_dicts(), "e2e_test", elapsed)
+        print(f"\n🗄️  已记入历史结果库 (运行 #{run_id})，趋势: python e2e_history.py report")
+
+    if args.results_json:
+        e2e_steps.write_json(args.results_json)
+        print(f"\n📄 测试结果已写入 {args.results_json}")
+    if args.junit:
+        e2e_steps.write_junit(args.junit)
+        print(f"\n📄 JUnit 报告已写入 {args.junit}")
+
+    if e2e_replay.MODE != "live":
+        e2e_replay.print_report()
+
+    e2e_console.print_summary(e2e_console.finish())
+
+    # 页面性能指标，可用 python e2e_vitals.py compare 与基线对比
+    if e2e_vitals.SAMPLES:
+        e2e_vitals.print_report(e2e_vitals.write_report(args.vitals_report))
+        print(f"\n📄 性能指标已写入 {args.vitals_report}")
+
+    # 列出本次运行的截图
+    print(f"\n📸 截图文件 (策略 {shots.policy}, 截图 {shots.stats['captured']} 张, "
+          f"跳过 {shots.stats['skipped']}, 去重 {shots.stats['deduplicated']}):")
+    for f in shots.files():
+        print(f"  {f}")
+    print(f"  清单: {manifest_path}")
 
     return 0 if failed == 0 else 1
 
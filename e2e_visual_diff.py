@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+"""
+E2E 视觉回归对比
+把基线截图和本次截图读成 NumPy 数组，向量化计算:
+  - 逐像素差异: 任一通道差值超过 pixel_tolerance 的像素占比
+  - 感知差异: YIQ 色彩空间加权色差（pixelmatch 同款公式）超过阈值的像素占比
+  - 结构相似度: 亮度通道 8x8 窗口的平均 SSIM（积分图实现，无逐像素 Python 循环）
+尺寸不一致时按较大尺寸补齐，多出的区域计为差异；支持按截图名配置忽略区域（动态内容），
+并为每对截图输出差异热力图。多对截图在进程池中并行对比。
+
+依赖 numpy 和 Pillow（pip install numpy pillow）。
+
+用法:
+    python e2e_visual_diff.py BASELINE_DIR CURRENT_DIR [--masks e2e_visual_masks.json] [--out DIR]
+    python e2e_test.py --visual-baseline BASELINE_DIR
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy as np
+    from PIL import Image
+except ImportError:  # pragma: no cover - 仅在缺少可选依赖时触发
+    np = None
+    Image = None
+
+MASKS_PATH = "e2e_visual_masks.json"
+
+# YIQ 最大色差，用于把阈值归一化到 0~1（与 pixelmatch 一致）
+MAX_YIQ_DELTA = 35215.0
+SSIM_WINDOW = 8
+
+
+def _require_deps():
+    if np is None or Image is None:
+        raise RuntimeError("视觉对比需要 numpy 和 Pillow: pip install numpy pillow")
+
+
+def load_image(path):
+    """读取为 HxWx3 的 uint8 RGB 数组"""
+    with Image.open(path) as img:
+        return np.asarray(img.convert("RGB"))
+
+
+def pad_to(img, height, width):
+    """补齐到指定尺寸，返回 (补齐后的数组, 有效区域掩码)"""
+    h, w = img.shape[:2]
+    padded = np.zeros((height, width, 3), dtype=img.dtype)
+    padded[:h, :w] = img
+    valid = np.zeros((height, width), dtype=bool)
+    valid[:h, :w] = True
+    return padded, valid
+
+
+def build_mask(shape, regions):
+    """根据 [{x, y, width, height}] 生成忽略区域布尔掩码"""
+    mask = np.zeros(shape, dtype=bool)
+    for r in regions or []:
+        y0 = max(0, int(r.get("y", 0)))
+        x0 = max(0, int(r.get("x", 0)))
+        y1 = shape[0] if r.get("height") is None else min(shape[0], y0 + int(r["height"]))
+        x1 = shape[1] if r.get("width") is None else min(shape[1], x0 + int(r["width"]))
+        mask[y0:y1, x0:x1] = True
+    return mask
+
+
+def yiq_delta(a, b):
+    """逐像素 YIQ 加权色差平方 (HxW float32)"""
+    a = a.astype(np.float32)
+    b = b.astype(np.float32)
+    d = a - b
+    dr, dg, db = d[..., 0], d[..., 1], d[..., 2]
+    y = dr * 0.29889531 + dg * 0.58662247 + db * 0.11448223
+    i = dr * 0.59597799 - dg * 0.27417610 - db * 0.32180189
+    q = dr * 0.21147017 - dg * 0.52261711 + db * 0.31114694
+    return 0.5053 * y * y + 0.299 * i * i + 0.1957 * q * q
+
+
+def _luma(img):
+    img = img.astype(np.float64)
+    return img[..., 0] * 0.299 + img[..., 1] * 0.587 + img[..., 2] * 0.114
+
+
+def _window_sums(x, k):
+    """用积分图计算所有 k x k 窗口（步长 k）的和"""
+    h = (x.shape[0] // k) * k
+    w = (x.shape[1] // k) * k
+    if h == 0 or w == 0:
+        return np.zeros((0, 0))
+    integral = np.pad(x[:h, :w].cumsum(0).cumsum(1), ((1, 0), (1, 0)))
+    return (integral[k::k, k::k] - integral[:-k:k, k::k]
+            - integral[k::k, :-k:k] + integral[:-k:k, :-k:k])
+
+
+def mean_ssim(a, b, window=SSIM_WINDOW):
+    """亮度通道的平均 SSIM，窗口不重叠"""
+    x = _luma(a)
+    y = _luma(b)
+    n = float(window * window)
+    sx = _window_sums(x, window)
+    if sx.size == 0:
+        return 1.0
+    sy = _window_sums(y, window)
+    sxx = _window_sums(x * x, window)
+    syy = _window_sums(y * y, window)
+    sxy = _window_sums(x * y, window)
+    mx = sx / n
+    my = sy / n
+    vx = sxx / n - mx * mx
+    vy = syy / n - my * my
+    cov = sxy / n - mx * my
+    c1 = (0.01 * 255) ** 2
+    c2 = (0.03 * 255) ** 2
+    ssim = ((2 * mx * my + c1) * (2 * cov + c2)) / ((mx * mx + my * my + c1) * (vx + vy + c2))
+    return float(ssim.mean())
+
+
+def write_heatmap(path, current, delta, differing, ignored):
+    """淡化的当前截图作底，差异按强度标红，忽略区域标蓝"""
+    base = (_luma(current) * 0.3 + 255 * 0.7).astype(np.uint8)
+    heat = np.stack([base, base, base], axis=-1)
+    intensity = np.clip(np.sqrt(delta / MAX_YIQ_DELTA) * 4, 0, 1)
+    red = differing & ~ignored
+    heat[red, 0] = 255
+    heat[red, 1] = (base[red] * (1 - intensity[red])).astype(np.uint8)
+    heat[red, 2] = (base[red] * (1 - intensity[red])).astype(np.uint8)
+    heat[ignored, 2] = 255
+    Image.fromarray(heat).save(path)
+
+
+def compare_images(baseline, current, regions=None, threshold=0.1, pixel_tolerance=0):
+    """对比两张 RGB 数组，返回 (指标字典, yiq 色差, 感知差异掩码, 忽略掩码)"""
+    height = max(baseline.shape[0], current.shape[0])
+    width = max(baseline.shape[1], current.shape[1])
+    a, valid_a = pad_to(baseline, height, width)
+    b, valid_b = pad_to(current, height, width)
+    ignored = build_mask((height, width), regions)
+    # 只存在于一侧的区域视为差异
+    size_diff = valid_a ^ valid_b
+
+    delta = yiq_delta(a, b)
+    perceptual = (delta > MAX_YIQ_DELTA * threshold * threshold) | size_diff
+    pixel = (np.abs(a.astype(np.int16) - b.astype(np.int16)).max(axis=-1) > pixel_tolerance) | size_diff
+
+    considered = ~ignored
+    total = int(considered.sum()) or 1
+    both = valid_a & valid_b & considered
+    if both.any():
+        rows = np.where(both.any(axis=1))[0]
+        cols = np.where(both.any(axis=0))[0]
+        # 忽略区域不参与 SSIM：两侧都填成相同内容
+        a_cmp = np.where(ignored[..., None], 0, a)
+        b_cmp = np.where(ignored[..., None], 0, b)
+        ssim = mean_ssim(a_cmp[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1],
+                         b_cmp[rows[0]:rows[-1] + 1, cols[0]:cols[-1] + 1])
+    else:
+        ssim = 0.0
+
+    metrics = {
+        "baseline_size": [int(baseline.shape[1]), int(baseline.shape[0])],
+        "current_size": [int(current.shape[1]), int(current.shape[0])],
+        "size_mismatch": baseline.shape != current.shape,
+        "pixel_diff_ratio": float((pixel & considered).sum()) / total,
+        "perceptual_diff_ratio": float((perceptual & considered).sum()) / total,
+        "perceptual_diff_pixels": int((perceptual & considered).sum()),
+        "ssim": ssim,
+    }
+    return metrics, delta, perceptual, ignored
+
+
+def compare_pair(job):
+    """进程池任务：对比一对截图文件并写热力图"""
+    name, baseline_path, current_path, heatmap_path, regions, threshold, max_diff = job
+    baseline = load_image(baseline_path)
+    current = load_image(current_path)
+    metrics, delta, differing, ignored = compare_images(baseline, current, regions, threshold)
+    metrics["name"] = name
+    metrics["baseline"] = baseline_path
+    metrics["current"] = current_path
+    metrics["passed"] = metrics["perceptual_diff_ratio"] <= max_diff
+    if heatmap_path and metrics["perceptual_diff_pixels"]:
+        write_heatmap(heatmap_path, np.pad(current, ((0, delta.shape[0] - current.shape[0]),
+                                                     (0, delta.shape[1] - current.shape[1]), (0, 0))),
+                      delta, differing, ignored)
+        metrics["heatmap"] = heatmap_path
+    return metrics
+
+
+def load_masks(path=MASKS_PATH):
+    """忽略区域配置: {"截图名": [{x, y, width, height}], "*": [...]}"""
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def current_shots(current_dir):
+    """本次运行的普通截图 {截图 id: 文件}
+
+    有 manifest.json 时以它为准：去重的截图在目录里没有自己的文件，指向先前保存的同内容文件；
+    失败截图不参与对比。没有 manifest 时直接列出目录中的 PNG。
+    """
+    manifest_path = os.path.join(current_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            entries = json.load(f)["screenshots"]
+        return {e["id"]: e["file"] for e in entries if e.get("kind") != "failure" and "id" in e}
+    return {os.path.splitext(filename)[0]: os.path.join(current_dir, filename)
+            for filename in sorted(os.listdir(current_dir)) if filename.endswith(".png")}
+
+
+def missing_pair(name, baseline_path, current_path):
+    """基线或本次截图缺失的一对，计为失败"""
+    return {"name": name, "baseline": baseline_path, "current": current_path, "passed": False,
+            "missing": "baseline" if current_path else "current"}
+
+
+def compare_dirs(baseline_dir, current_dir, out_dir=None, masks=None, threshold=0.1,
+                 max_diff=0.001, workers=None, names=None, require_current=True):
+    """对比两个目录中同名的 PNG，返回每对的指标列表
+
+    只有一边存在的截图也作为失败结果返回（missing 为缺失的一边）；
+    require_current=False 时不检查基线中有、本次没有的截图（on-failure / sampled 策略会跳过普通截图）。
+    """
+    _require_deps()
+    masks = masks or {}
+    out_dir = out_dir or os.path.join(current_dir, "visual-diff")
+    os.makedirs(out_dir, exist_ok=True)
+
+    current = {name: path for name, path in current_shots(current_dir).items() if not names or name in names}
+    baseline = {os.path.splitext(filename)[0]: os.path.join(baseline_dir, filename)
+                for filename in sorted(os.listdir(baseline_dir)) if filename.endswith(".png")}
+    baseline = {name: path for name, path in baseline.items() if not names or name in names}
+
+    jobs, missing = [], []
+    for name in sorted(current):
+        if name not in baseline:
+            missing.append(missing_pair(name, None, current[name]))
+            continue
+        regions = masks.get("*", []) + masks.get(name, [])
+        jobs.append((name, baseline[name], current[name],
+                     os.path.join(out_dir, f"{name}.diff.png"), regions, threshold, max_diff))
+    if require_current:
+        missing += [missing_pair(name, path, None) for name, path in sorted(baseline.items()) if name not in current]
+
+    if len(jobs) <= 1 or workers == 1:
+        return [compare_pair(job) for job in jobs] + missing
+    with ProcessPoolExecutor(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as executor:
+        return list(executor.map(compare_pair, jobs)) + missing
+
+
+def update_baseline(current_dir, baseline_dir, names=None):
+    os.makedirs(baseline_dir, exist_ok=True)
+    copied = []
+    for name, path in sorted(current_shots(current_dir).items()):
+        if not names or name in names:
+            filename = f"{name}.png"
+            shutil.copyfile(path, os.path.join(baseline_dir, filename))
+            copied.append(filename)
+    return copied
+
+
+def passed(results):
+    """没有任何可对比的截图也算失败，避免 all([]) 放行"""
+    return bool(results) and all(r["passed"] for r in results)
+
+
+def print_results(results):
+    print("\n🖼️  视觉回归对比:")
+    if not results:
+        print("   ❌ 无可对比的截图（基线和本次运行都没有截图）")
+        return
+    for r in results:
+        if r.get("missing") == "baseline":
+            print(f"   ❌ {r['name']:<24} 基线中没有该截图: {r['current']}")
+            continue
+        if r.get("missing") == "current":
+            print(f"   ❌ {r['name']:<24} 本次运行缺少该截图 (基线 {r['baseline']})")
+            continue
+        mark = "✅" if r["passed"] else "❌"
+        size = " 尺寸变化 {}x{} → {}x{}".format(*r["baseline_size"], *r["current_size"]) if r["size_mismatch"] else ""
+        print(f"   {mark} {r['name']:<24} 感知差异 {r['perceptual_diff_ratio'] * 100:6.3f}%  "
+              f"像素差异 {r['pixel_diff_ratio'] * 100:6.3f}%  SSIM {r['ssim']:.4f}{size}")
+        if r.get("heatmap"):
+            print(f"      热力图: {r['heatmap']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 截图视觉回归对比")
+    parser.add_argument("baseline_dir")
+    parser.add_argument("current_dir")
+    parser.add_argument("--out", help="热力图输出目录 (默认 CURRENT_DIR/visual-diff)")
+    parser.add_argument("--masks", default=MASKS_PATH, help=f"忽略区域配置 (默认 {MASKS_PATH})")
+    parser.add_argument("--threshold", type=float, default=0.1, help="YIQ 感知差异阈值 0~1 (默认 0.1)")
+    parser.add_argument("--max-diff", type=float, default=0.001, help="允许的感知差异像素占比 (默认 0.001)")
+    parser.add_argument("--workers", type=int, help="进程数 (默认 CPU 核数)")
+    parser.add_argument("--update-baseline", action="store_true", help="把 CURRENT_DIR 的截图复制为新基线")
+    args = parser.parse_args(argv)
+
+    if args.update_baseline:
+        copied = update_baseline(args.current_dir, args.baseline_dir)
+        print(f"✅ 已更新 {len(copied)} 张基线截图到 {args.baseline_dir}")
+        return 0
+
+    results = compare_dirs(args.baseline_dir, args.current_dir, args.out, load_masks(args.masks),
+                           args.threshold, args.max_diff, args.workers)
+    print_results(results)
+    return 0 if passed(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+E2E Web Vitals 采集与基线对比
+每个 context 注入 PerformanceObserver（LCP / CLS / long task），页面访问后通过 Performance API
+一次性读取 Navigation Timing、LCP、CLS、TBT、JS 传输字节数和 performance.memory，
+按 "路径@宽x高" 汇总写入 JSON 报告，并可与保存的基线对比找出回归。
+
+用法:
+    python e2e_test.py                                    # 报告写入 /tmp/e2e_vitals.json
+    python e2e_vitals.py compare                          # 与基线对比，有回归时返回 1
+    python e2e_vitals.py update-baseline                  # 用当前报告覆盖基线
+"""
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+REPORT_PATH = os.environ.get("E2E_VITALS_REPORT", "/tmp/e2e_vitals.json")
+BASELINE_PATH = os.environ.get("E2E_VITALS_BASELINE", "e2e_vitals_baseline.json")
+
+# 在页面脚本执行前注入，buffered 观察保证早于注入发生的条目也能拿到
+VITALS_INIT_JS = """(() => {
+  if (window.__e2eVitals) return
+  const v = window.__e2eVitals = { lcp: 0, cls: 0, clsWindow: 0, clsWindowStart: 0, clsLast: 0, longTasks: [] }
+  const observe = (type, cb) => {
+    try { new PerformanceObserver(list => list.getEntries().forEach(cb)).observe({ type, buffered: true }) } catch (e) {}
+  }
+  observe('largest-contentful-paint', e => { v.lcp = e.renderTime || e.loadTime || e.startTime })
+  // CLS 取最大的会话窗口（间隔 < 1s 且窗口总长 < 5s）
+  observe('layout-shift', e => {
+    if (e.hadRecentInput) return
+    if (e.startTime - v.clsLast > 1000 || e.startTime - v.clsWindowStart > 5000) {
+      v.clsWindow = 0
+      v.clsWindowStart = e.startTime
+    }
+    v.clsWindow += e.value
+    v.clsLast = e.startTime
+    v.cls = Math.max(v.cls, v.clsWindow)
+  })
+  observe('longtask', e => { v.longTasks.push([e.startTime, e.duration]) })
+  // 登录页: 记录表单 hydration 完成且可交互的时刻
+  if (location.pathname === '/login') {
+    v.loginReady = -1
+    const timer = setInterval(() => {
+      const fields = ['input#username', 'input#password', 'button[type="submit"]'].map(s => document.querySelector(s))
+      if (fields.every(el => el && !el.disabled && Object.keys(el).some(k => k.startsWith('__reactProps$')))) {
+        v.loginReady = performance.now()
+        clearInterval(timer)
+      }
+    }, 50)
+    setTimeout(() => clearInterval(timer), 60000)
+  }
+})()"""
+
+COLLECT_JS = """() => {
+  const v = window.__e2eVitals || { lcp: 0, cls: 0, longTasks: [] }
+  const nav = performance.getEntriesByType('navigation')[0] || {}
+  const fcpEntry = performance.getEntriesByName('first-contentful-paint')[0]
+  const fcp = fcpEntry ? fcpEntry.startTime : 0
+  // TBT: FCP 之后每个 long task 超出 50ms 的部分之和
+  const tbt = v.longTasks
+    .filter(([start]) => start >= fcp)
+    .reduce((sum, [, duration]) => sum + Math.max(0, duration - 50), 0)
+  const resources = performance.getEntriesByType('resource')
+  const scripts = resources.filter(r => r.initiatorType === 'script' || /\\.m?js(\\?|$)/.test(r.name))
+  const styles = resources.filter(r => /\\.css(\\?|$)/.test(r.name))
+  const api = resources
+    .map(r => new URL(r.name))
+    .filter(u => u.origin === location.origin && u.pathname.startsWith('/api/'))
+    .map(u => u.pathname)
+  const mem = performance.memory || {}
+  return {
+    ttfb: nav.responseStart || 0,
+    dom_interactive: nav.domInteractive || 0,
+    dom_content_loaded: nav.domContentLoadedEventEnd || 0,
+    load: nav.loadEventEnd || 0,
+    fcp,
+    lcp: v.lcp,
+    cls: v.cls,
+    tbt,
+    long_tasks: v.longTasks.length,
+    requests: resources.length + 1,
+    js_requests: scripts.length,
+    js_bytes: scripts.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    css_bytes: styles.reduce((sum, r) => sum + (r.transferSize || 0), 0),
+    api_calls: api.length,
+    api_paths: api,
+    // 0: 不是登录页; -1: 采集时登录表单仍未可交互
+    login_form_ready: v.loginReady || 0,
+    transfer_bytes: resources.reduce((sum, r) => sum + (r.transferSize || 0), nav.transferSize || 0),
+    js_heap_used: mem.usedJSHeapSize || 0,
+    js_heap_total: mem.totalJSHeapSize || 0,
+  }
+}"""
+
+# 对比时每个指标的回归阈值: (相对涨幅, 最小绝对涨幅)，两者都超过才算回归，过滤抖动
+THRESHOLDS = {
+    "ttfb": (0.25, 50),
+    "fcp": (0.20, 100),
+    "lcp": (0.20, 150),
+    "dom_content_loaded": (0.25, 150),
+    "load": (0.25, 200),
+    "cls": (0.25, 0.02),
+    "tbt": (0.30, 50),
+    "js_bytes": (0.05, 10 * 1024),
+    "css_bytes": (0.05, 5 * 1024),
+    "api_calls": (0.0, 0.5),
+    "login_form_ready": (0.25, 200),
+    "login_form_not_ready": (0.0, 0.5),
+    "requests": (0.10, 3),
+    "js_heap_used": (0.25, 2 * 1024 * 1024),
+}
+
+# 本进程内采集的样本: [{"key", "url", "viewport", "metrics", "api_paths"}]
+SAMPLES = []
+
+
+def install(context):
+    """BrowserPool context_hooks 使用：为新 context 注入观察脚本"""
+    return context.add_init_script(VITALS_INIT_JS)
+
+
+def page_key(url, viewport):
+    path = urlsplit(url).path or "/"
+    if not viewport:
+        return path
+    return f"{path}@{viewport['width']}x{viewport['height']}"
+
+
+def _store(url, viewport, metrics):
+    key = page_key(url, viewport)
+    api_paths = metrics.pop("api_paths", [])
+    SAMPLES.append({"key": key, "url": url, "viewport": viewport, "metrics": metrics, "api_paths": api_paths})
+    return metrics
+
+
+def capture(page):
+    """采集当前页面的性能指标并记入本次运行"""
+    return _store(page.url, page.viewport_size, page.evaluate(COLLECT_JS))
+
+
+async def capture_async(page):
+    return _store(page.url, page.viewport_size, await page.evaluate(COLLECT_JS))
+
+
+def build_report(samples=None):
+    """同一页面+视口多次访问取中位数"""
+    grouped = {}
+    api_paths = {}
+    for sample in samples if samples is not None else SAMPLES:
+        grouped.setdefault(sample["key"], []).append(sample["metrics"])
+        api_paths[sample["key"]] = sample.get("api_paths", [])
+
+    pages = {}
+    for key, runs in sorted(grouped.items()):
+        pages[key] = {
+            metric: statistics.median(run[metric] for run in runs)
+            for metric in runs[0]
+        }
+        # login_form_ready 为 -1 的样本（表单未就绪）不参与中位数，单独计数；全部未就绪时保留 -1
+        ready = [run["login_form_ready"] for run in runs if run.get("login_form_ready", 0) >= 0]
+        pages[key]["login_form_ready"] = statistics.median(ready) if ready else -1
+        pages[key]["login_form_not_ready"] = len(runs) - len(ready)
+        pages[key]["samples"] = len(runs)
+        # 最近一次访问加载期间请求的 API 路径，用于解释 api_calls
+        pages[key]["api_paths"] = api_paths[key]
+    return {"generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "pages": pages}
+
+
+def write_report(path=REPORT_PATH, samples=None):
+    report = build_report(samples)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+def compare(current, baseline, thresholds=THRESHOLDS):
+    """返回回归列表 [(页面, 指标, 基线值, 当前值)]"""
+    regressions = []
+    for key, metrics in current["pages"].items():
+        base = baseline["pages"].get(key)
+        if not base:
+            continue
+        for metric, (ratio, minimum) in thresholds.items():
+            if metric not in metrics or metric not in base:
+                continue
+            delta = metrics[metric] - base[metric]
+            if delta > minimum and delta > base[metric] * ratio:
+                regressions.append((key, metric, base[metric], metrics[metric]))
+    return regressions
+
+
+def format_metric(metric, value):
+    if metric == "cls":
+        return f"{value:.3f}"
+    if metric.startswith("js_heap"):
+        return f"{value / 1024 / 1024:.1f}MB"
+    if metric.endswith("bytes"):
+        return f"{value / 1024:.1f}KB"
+    if metric in ("requests", "js_requests", "long_tasks", "api_calls", "login_form_not_ready"):
+        return f"{value:.0f}"
+    return f"{value:.0f}ms"
+
+
+def print_report(report):
+    print("\n📈 页面性能指标:")
+    for key, m in report["pages"].items():
+        print(f"   {key}")
+        print(f"      TTFB {format_metric('ttfb', m['ttfb'])}  FCP {format_metric('fcp', m['fcp'])}  "
+              f"LCP {format_metric('lcp', m['lcp'])}  CLS {format_metric('cls', m['cls'])}  TBT {format_metric('tbt', m['tbt'])}")
+        print(f"      JS {format_metric('js_bytes', m['js_bytes'])} / {m['js_requests']:.0f} 个  "
+              f"CSS {format_metric('css_bytes', m.get('css_bytes', 0))}  "
+              f"请求 {m['requests']:.0f}  API {m.get('api_calls', 0):.0f}  JS 堆 {format_metric('js_heap_used', m['js_heap_used'])}")
+        not_ready = m.get("login_form_not_ready", 0)
+        if m.get("login_form_ready", 0) > 0:
+            print(f"      登录表单可交互 {format_metric('login_form_ready', m['login_form_ready'])}"
+                  + (f"  (另有 {not_ready}/{m['samples']} 次未就绪)" if not_ready else ""))
+        elif not_ready:
+            print(f"      登录表单未就绪 ({not_ready}/{m['samples']} 次)")
+
+
+def _load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="E2E 页面性能指标对比")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cmp_parser = sub.add_parser("compare", help="对比当前报告与基线")
+    cmp_parser.add_argument("--report", default=REPORT_PATH)
+    cmp_parser.add_argument("--baseline", default=BASELINE_PATH)
+    upd_parser = sub.add_parser("update-baseline", help="用当前报告覆盖基线")
+    upd_parser.add_argument("--report", default=REPORT_PATH)
+    upd_parser.add_argument("--baseline", default=BASELINE_PATH)
+    show_parser = sub.add_parser("show", help="打印报告")
+    show_parser.add_argument("--report", default=REPORT_PATH)
+    args = parser.parse_args(argv)
+
+    if args.command == "show":
+        print_report(_load(args.report))
+        return 0
+
+    if args.command == "update-baseline":
+        shutil.copyfile(args.report, args.baseline)
+        print(f"✅ 基线已更新: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"⚠️  基线不存在: {args.baseline}，可先运行 update-baseline")
+        return 0
+
+    current = _load(args.report)
+    baseline = _load(args.baseline)
+    regressions = compare(current, baseline)
+
+    missing = sorted(set(baseline["pages"]) - set(current["pages"]))
+    for key in missing:
+        print(f"  ⚠️  本次未采集: {key}")
+
+    if not regressions:
+        print(f"✅ {len(current['pages'])} 个页面/视口均未超过基线阈值")
+        return 0
+
+    print(f"❌ 发现 {len(regressions)} 项性能回归:")
+    for key, metric, before, after in regressions:
+        change = (after - before) / before * 100 if before else float("inf")
+        print(f"   {key:<28} {metric:<20} {format_metric(metric, before):>10} → {format_metric(metric, after):>10}  (+{change:.0f}%)")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
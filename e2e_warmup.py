@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+E2E 路由预热
+next dev 在路由第一次被请求时才编译，测试里的 goto 因此不得不放宽到 30~60 秒。
+预热阶段扫描 app/ 下的 page.tsx 和 route.ts，在测试开始前并发请求每个路由:
+  冷请求  第一次请求的耗时，包含按需编译
+  热请求  之后 --samples 次请求的中位数
+报告按编译开销（冷 - 热）排序，标出编译昂贵的路由。预热成功的路由在测试中使用 WARM_TIMEOUT
+这样的紧超时（见 nav_timeout），未预热或预热失败的路由保持原来的宽超时。
+
+API 路由只发 GET：没有导出 GET 的处理器返回 405，但模块同样会被编译，不会触发任何写操作。
+动态段用 SAMPLE_PARAMS 中的示例值填充，返回 404 / 401 不影响编译。
+
+用法:
+    python e2e_warmup.py                       # 预热并打印报告
+    python e2e_warmup.py --list                # 只列出发现的路由
+    python e2e_test.py                         # 默认先预热，--no-warmup 跳过
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import re
+import statistics
+import sys
+import time
+from urllib.parse import urlsplit
+
+from e2e_http import BASE_URL, HttpClient
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(ROOT, "app")
+REPORT_PATH = os.environ.get("E2E_WARMUP_REPORT", "/tmp/e2e_warmup.json")
+
+# 预热成功的路由使用的导航超时 (ms)
+WARM_TIMEOUT = int(os.environ.get("E2E_WARM_TIMEOUT", "10000"))
+# 热请求耗时的倍数，慢页面的紧超时不低于 warm_ms × 该值
+WARM_TIMEOUT_FACTOR = 5
+# 冷请求超过该值标记为编译昂贵 (ms)
+EXPENSIVE_MS = 5000
+
+# 动态段示例值，未列出的参数用 "warmup"
+SAMPLE_PARAMS = {
+    "id": "moments-copywriter",
+    "shopId": "warmup",
+}
+
+# 本进程内的预热结果: 路由模式 -> Route
+WARMED = {}
+
+
+class Route:
+    """app/ 下的一个页面或 API 路由"""
+
+    def __init__(self, pattern, kind, source):
+        self.pattern = pattern
+        self.kind = kind
+        self.source = source
+        self.regex = pattern_regex(pattern)
+        self.cold_ms = None
+        self.warm_ms = None
+        self.status = None
+        self.error = None
+
+    @property
+    def ok(self):
+        return self.error is None and self.status is not None and self.status < 500
+
+    @property
+    def compile_ms(self):
+        if self.cold_ms is None or self.warm_ms is None:
+            return None
+        return max(0.0, self.cold_ms - self.warm_ms)
+
+    def sample_path(self, params=None):
+        values = {**SAMPLE_PARAMS, **(params or {})}
+        return re.sub(r"\[\[?(?:\.\.\.)?(\w+)\]?\]", lambda m: values.get(m.group(1), "warmup"), self.pattern)
+
+    def to_dict(self):
+        return {"pattern": self.pattern, "kind": self.kind, "source": self.source, "status": self.status,
+                "cold_ms": self.cold_ms, "warm_ms": self.warm_ms, "compile_ms": self.compile_ms,
+                "error": self.error}
+
+
+def pattern_regex(pattern):
+    """/shops/[shopId] -> ^/shops/[^/]+$；支持 [...slug] 和 [[...slug]]"""
+    parts = []
+    for segment in pattern.strip("/").split("/"):
+        if not segment:
+            continue
+        if segment.startswith("[[..."):
+            parts.append("(?:/.+)?")
+        elif segment.startswith("[..."):
+            parts.append("/.+")
+        elif segment.startswith("["):
+            parts.append("/[^/]+")
+        else:
+            parts.append("/" + re.escape(segment))
+    return re.compile("^" + ("".join(parts) or "/") + "/?$")
+
+
+def discover_routes(app_dir=APP_DIR):
+    """扫描 app/，返回按模式排序的 Route 列表；忽略 (group) 路由组、@slot 和 _private 目录"""
+    routes = []
+    for dirpath, dirnames, filenames in os.walk(app_dir):
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(("_", "@")) and d != "node_modules")
+        rel = os.path.relpath(dirpath, app_dir)
+        segments = [s for s in rel.split(os.sep) if s != "." and not (s.startswith("(") and s.endswith(")"))]
+        pattern = "/" + "/".join(segments)
+        for name in ("page.tsx", "page.ts", "page.jsx", "page.js"):
+            if name in filenames:
+                routes.append(Route(pattern, "page", os.path.relpath(os.path.join(dirpath, name), ROOT)))
+                break
+        for name in ("route.ts", "route.js"):
+            if name in filenames:
+                routes.append(Route(pattern, "api", os.path.relpath(os.path.join(dirpath, name), ROOT)))
+                break
+    return sorted(routes, key=lambda r: (r.kind != "page", r.pattern))
+
+
+async def warm_up(base_url=BASE_URL, routes=None, concurrency=8, samples=3, params=None, timeout=180):
+    """冷请求并发打一遍所有路由，再逐个测热请求耗时；结果写入 WARMED 并返回路由列表"""
+    routes = discover_routes() if routes is None else routes
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def hit(client, route):
+        accept = "text/html" if route.kind == "page" else "application/json"
+        started = time.monotonic()
+        response = await client.request("GET", route.sample_path(params), headers={"Accept": accept})
+        return (time.monotonic() - started) * 1000, response.status
+
+    async def cold(client, route):
+        async with semaphore:
+            try:
+                route.cold_ms, route.status = await hit(client, route)
+            except Exception as e:
+                route.error = f"{type(e).__name__}: {e}"
+
+    async def warm(client, route):
+        if route.error is not None:
+            return
+        timings = []
+        async with semaphore:
+            for _ in range(samples):
+                try:
+                    ms, route.status = await hit(client, route)
+                except Exception as e:
+                    route.error = f"{type(e).__name__}: {e}"
+                    return
+                timings.append(ms)
+        route.warm_ms = statistics.median(timings) if timings else None
+
+    async with HttpClient(base_url, max_connections=concurrency, timeout=timeout) as client:
+        await asyncio.gather(*(cold(client, r) for r in routes))
+        if samples:
+            await asyncio.gather(*(warm(client, r) for r in routes))
+
+    for route in routes:
+        if route.ok:
+            WARMED[route.pattern] = route
+    return routes
+
+
+def run(base_url=BASE_URL, path=REPORT_PATH, **options):
+    """同步入口，供 e2e_test.py / e2e_runner.py 在测试开始前调用；服务不可用时只打印警告"""
+    started = time.monotonic()
+    try:
+        routes = asyncio.run(warm_up(base_url, **options))
+    except Exception as e:
+        print(f"\n⚠️  路由预热失败，沿用原有超时: {type(e).__name__}: {e}")
+        return []
+    print_report(routes, time.monotonic() - started)
+    write_report(routes, base_url, path)
+    return routes
+
+
+def write_report(routes, base_url=BASE_URL, path=REPORT_PATH):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"base_url": base_url, "finished_at": time.time(),
+                   "routes": [r.to_dict() for r in routes]}, f, ensure_ascii=False, indent=2)
+    return path
+
+
+def load(path=REPORT_PATH):
+    """读入其他进程的预热结果（e2e_runner.py 多进程分片时由父进程预热一次）"""
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    for item in report["routes"]:
+        route = Route(item["pattern"], item["kind"], item["source"])
+        route.cold_ms, route.warm_ms = item["cold_ms"], item["warm_ms"]
+        route.status, route.error = item["status"], item["error"]
+        if route.ok:
+            WARMED[route.pattern] = route
+    return len(WARMED)
+
+
+def nav_timeout(url, default=30000):
+    """url 对应的页面已预热则返回紧超时，否则返回 default"""
+    path = urlsplit(url).path or "/"
+    for route in WARMED.values():
+        if route.kind == "page" and route.regex.match(path):
+            slow = (route.warm_ms or 0) * WARM_TIMEOUT_FACTOR
+            return int(min(default, max(WARM_TIMEOUT, slow)))
+    return default
+
+
+def print_report(routes, elapsed=None):
+    print("\n" + "=" * 60)
+    print("路由预热" + (f" ({elapsed:.1f}s)" if elapsed is not None else ""))
+    print("=" * 60)
+    ordered = sorted(routes, key=lambda r: -(r.compile_ms if r.compile_ms is not None else r.cold_ms or 0))
+    for route in ordered:
+        if route.error is not None:
+            print(f"  ❌ {route.kind:<4} {route.pattern:<40} {route.error}")
+            continue
+        mark = "❌" if not route.ok else "🐢" if (route.cold_ms or 0) > EXPENSIVE_MS else "✅"
+        warm = f"{route.warm_ms:>7.0f}ms" if route.warm_ms is not None else "      -"
+        print(f"  {mark} {route.kind:<4} {route.pattern:<40} 冷 {route.cold_ms:>7.0f}ms  热 {warm}  "
+              f"HTTP {route.status}")
+    warmed = [r for r in routes if r.ok]
+    cold_total = sum(r.cold_ms or 0 for r in warmed)
+    expensive = sum(1 for r in warmed if (r.cold_ms or 0) > EXPENSIVE_MS)
+    print("-" * 60)
+    print(f"预热 {len(warmed)}/{len(routes)} 个路由，冷请求合计 {cold_total / 1000:.1f}s，"
+          f"编译昂贵 (>{EXPENSIVE_MS / 1000:g}s) {expensive} 个；已预热页面导航超时收紧到 {WARM_TIMEOUT / 1000:g}s")
+
+
+def _parse_param(text):
+    name, _, value = text.partition("=")
+    if not value:
+        raise argparse.ArgumentTypeError(f"参数格式应为 name=value: {text}")
+    return name, value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="AI 掌柜 v2.0 路由预热与编译耗时报告")
+    parser.add_argument("--base-url", default=BASE_URL, help=f"被测服务地址 (默认 {BASE_URL})")
+    parser.add_argument("--concurrency", type=int, default=8, help="并发请求数 (默认 8)")
+    parser.add_argument("--samples", type=int, default=3, help="每个路由的热请求次数 (默认 3)")
+    parser.add_argument("--param", type=_parse_param, action="append", default=[],
+                        help="动态段示例值 name=value，可重复，如 --param shopId=xxx")
+    parser.add_argument("-k", dest="select", action="append", help="只预热模式中包含该子串的路由，可重复")
+    parser.add_argument("--output", default=REPORT_PATH, help=f"报告 JSON 路径 (默认 {REPORT_PATH})")
+    parser.add_argument("--list", action="store_true", help="只列出发现的路由")
+    args = parser.parse_args(argv)
+
+    routes = discover_routes()
+    if args.select:
+        routes = [r for r in routes if any(p in r.pattern for p in args.select)]
+    if args.list:
+        for route in routes:
+            print(f"  {route.kind:<4} {route.pattern:<40} {route.source}")
+        print(f"\n共 {len(routes)} 个路由")
+        return 0
+
+    started = time.monotonic()
+    routes = asyncio.run(warm_up(args.base_url, routes, args.concurrency, args.samples, dict(args.param)))
+    print_report(routes, time.monotonic() - started)
+    write_report(routes, args.base_url, args.output)
+    print(f"\n📄 预热报告已写入 {args.output}")
+    return 0 if all(r.ok for r in routes) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
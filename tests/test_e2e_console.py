@@ -0,0 +1,37 @@
+"""e2e_console.ConsoleLog 的内存上限"""
+
+import json
+
+import e2e_console
+
+
+def test_structures_stay_bounded_past_max_groups(tmp_path):
+    path = tmp_path / "console.jsonl"
+    log = e2e_console.ConsoleLog(str(path), ring_size=10, max_groups=5, max_overflow=8)
+    # 每条消息的指纹都不同（字母不会被归一化）
+    texts = [f"error {''.join(chr(97 + int(d)) for d in str(i))}" for i in range(100)]
+    for text in texts:
+        log.record("error", text)
+    log.close()
+
+    assert len(log.groups) == 5
+    assert len(log._overflow_counts) == 8
+    assert len(log.recent) == 10
+    assert log.total == 100
+    assert log.overflow == 95
+    # 超出指纹表的事件仍然写入日志
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 100
+
+
+def test_repeat_limit_applies_to_overflow_fingerprints(tmp_path):
+    path = tmp_path / "console.jsonl"
+    log = e2e_console.ConsoleLog(str(path), max_groups=1)
+    for _ in range(e2e_console.REPEAT_LIMIT + 10):
+        log.record("error", "first")
+        log.record("warning", "second")
+    log.close()
+
+    events = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+    assert sum(e["text"] == "first" for e in events) == e2e_console.REPEAT_LIMIT
+    assert sum(e["text"] == "second" for e in events) == e2e_console.REPEAT_LIMIT
+    assert log.groups.keys() == {e2e_console.fingerprint("error", "first")}
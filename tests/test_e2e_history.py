@@ -0,0 +1,72 @@
+"""e2e_history 的不稳定评分、接近超时判定和结果导入"""
+
+import contextlib
+import json
+
+import pytest
+
+import e2e_history
+
+
+def rows(*outcomes, near=()):
+    return [{"passed": p, "near_timeout": int(i in near)} for i, p in enumerate(outcomes)]
+
+
+def test_flakiness_needs_two_runs():
+    assert e2e_history.flakiness(rows(False)) == (0.0, 0.0, 0.0)
+
+
+def test_flakiness_stable_runs():
+    assert e2e_history.flakiness(rows(True, True, True)) == (0.0, 0.0, 0.0)
+    # 一直失败不算不稳定
+    assert e2e_history.flakiness(rows(False, False, False))[1] == 0.0
+
+
+def test_flakiness_flips_and_timeouts():
+    score, flips, timeouts = e2e_history.flakiness(rows(True, False, True, True, True, near=(1, 2)))
+    assert flips == pytest.approx(2 / 4)
+    assert timeouts == pytest.approx(2 / 5)
+    assert score == pytest.approx(0.7 * 0.5 + 0.3 * 0.4)
+
+
+def test_near_timeout():
+    assert not e2e_history.near_timeout(5)
+    assert e2e_history.near_timeout(28)       # 30s 超时的 90% 以上
+    assert e2e_history.near_timeout(31)
+    assert not e2e_history.near_timeout(40)   # 介于两个超时之间
+    assert e2e_history.near_timeout(55)
+    assert not e2e_history.near_timeout(120)
+    assert e2e_history.near_timeout(1, "TimeoutError: page.goto: Timeout 30000ms exceeded")
+    assert e2e_history.near_timeout(1, "等待超时")
+
+
+def test_result_near_timeout_uses_steps_and_calls_not_total():
+    # 整个测试跑了 70s，但每一步都很快
+    result = {"duration": 70, "error": None,
+              "steps": [{"duration_ms": 20000, "calls": [{"duration_ms": 5000}]},
+                        {"duration_ms": 50000, "calls": []}]}
+    assert not e2e_history.result_near_timeout(result)
+
+    result["steps"][0]["calls"][0]["duration_ms"] = 29000
+    assert e2e_history.result_near_timeout(result)
+
+    assert e2e_history.result_near_timeout({"calls": [{"duration_ms": 58000}]})
+    assert e2e_history.result_near_timeout({"error": "Timeout 30000ms exceeded"})
+    assert e2e_history.result_near_timeout({"steps": [{"duration_ms": 100, "error": "超时"}]})
+
+
+def test_import_skips_cached_results(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(e2e_history, "git_revision", lambda: ("abc123", 0))
+    db = str(tmp_path / "history.sqlite")
+    report = tmp_path / "report.json"
+    report.write_text(json.dumps({"elapsed": 12.0, "results": [
+        {"id": "e2e_test.py::test_homepage", "passed": True, "duration": 3.0, "steps": []},
+        {"id": "e2e_test.py::test_shops_page", "passed": True, "duration": 40.0, "steps": [], "cached": True},
+    ]}), encoding="utf-8")
+
+    assert e2e_history.main(["--db", db, "import", str(report)]) == 0
+    assert "跳过 1 个复用缓存的结果" in capsys.readouterr().out
+    with contextlib.closing(e2e_history.connect(db)) as conn:
+        assert [tuple(r) for r in conn.execute("SELECT test_id, duration FROM results")] == [
+            ("e2e_test.py::test_homepage", 3.0)]
+        assert conn.execute("SELECT total FROM runs").fetchone()[0] == 1
@@ -0,0 +1,30 @@
+"""e2e_replay.schema_diff 的响应结构漂移检测"""
+
+from e2e_replay import schema_diff, schema_of
+
+
+def test_same_shape():
+    assert schema_diff(schema_of({"id": 1, "tags": ["a"]}), schema_of({"id": 2, "tags": ["b", "c"]})) == []
+
+
+def test_null_compatible_with_any_type():
+    assert schema_diff(schema_of({"shop": None}), schema_of({"shop": {"id": 1}})) == []
+    assert schema_diff(schema_of({"shop": {"id": 1}}), schema_of({"shop": None})) == []
+
+
+def test_added_and_removed_fields():
+    old = schema_of({"id": 1, "name": "店铺"})
+    new = schema_of({"id": 1, "title": "店铺"})
+    assert sorted(schema_diff(old, new)) == ["$.name: 字段消失", "$.title: 新增字段"]
+
+
+def test_nested_type_change():
+    old = schema_of({"data": {"items": [{"price": 1}]}})
+    new = schema_of({"data": {"items": [{"price": "1.00"}]}})
+    assert schema_diff(old, new) == ["$.data.items[].price: int → str"]
+
+
+def test_object_array_mismatch():
+    assert schema_diff(schema_of({"data": []}), schema_of({"data": {}})) == ["$.data: array → object"]
+    # 空数组不知道元素结构，不报差异
+    assert schema_diff(schema_of([]), schema_of([{"id": 1}])) == []
@@ -0,0 +1,45 @@
+"""e2e_runner.partition 的 LPT 分片"""
+
+import e2e_runner
+
+
+def scenario(name):
+    def func(pool):
+        pass
+    return e2e_runner.Scenario("e2e_demo_test", name, func)
+
+
+def ids(bucket):
+    return sorted(s.id for s in bucket)
+
+
+def test_partition_balances_by_duration():
+    scenarios = [scenario(f"test_{n}") for n in "abcde"]
+    durations = {s.id: d for s, d in zip(scenarios, (8, 7, 6, 5, 4))}
+    buckets, loads = e2e_runner.partition(scenarios, 2, durations)
+    assert loads == [17, 13]
+    assert ids(buckets[0]) == ["e2e_demo_test.py::test_a", "e2e_demo_test.py::test_d", "e2e_demo_test.py::test_e"]
+    assert ids(buckets[1]) == ["e2e_demo_test.py::test_b", "e2e_demo_test.py::test_c"]
+
+
+def test_partition_is_independent_of_input_order():
+    scenarios = [scenario(f"test_{n}") for n in "abcdefg"]
+    durations = {scenarios[0].id: 30, scenarios[3].id: 12}
+    forward, _ = e2e_runner.partition(scenarios, 3, durations)
+    backward, _ = e2e_runner.partition(list(reversed(scenarios)), 3, durations)
+    assert [ids(b) for b in forward] == [ids(b) for b in backward]
+
+
+def test_partition_unknown_durations_use_median():
+    scenarios = [scenario(f"test_{n}") for n in "abc"]
+    durations = {scenarios[0].id: 1, scenarios[1].id: 3, "e2e_other_test.py::test_x": 5}
+    _, loads = e2e_runner.partition(scenarios, 1, durations)
+    assert loads == [1 + 3 + 3]
+    _, loads = e2e_runner.partition(scenarios, 1, {})
+    assert loads == [3 * e2e_runner.DEFAULT_DURATION]
+
+
+def test_partition_more_shards_than_scenarios():
+    buckets, loads = e2e_runner.partition([scenario("test_a")], 3, {})
+    assert [len(b) for b in buckets] == [1, 0, 0]
+    assert loads[1:] == [0.0, 0.0]
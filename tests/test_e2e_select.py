@@ -0,0 +1,88 @@
+"""e2e_select 依赖推导、受影响判定和缓存键，在临时目录构造的小仓库上验证"""
+
+import pytest
+
+import e2e_select
+import e2e_warmup
+
+
+def write(root, path, text=""):
+    target = root / path
+    target.parent.mkdir(parents=True, exist_ok=True)
+    target.write_text(text, encoding="utf-8")
+
+
+@pytest.fixture
+def tree(tmp_path, monkeypatch):
+    write(tmp_path, "app/layout.tsx", "import '@/components/Shell'\n")
+    write(tmp_path, "app/shops/page.tsx", "import { list } from '@/lib/shops'\nimport Card from './Card'\n")
+    write(tmp_path, "app/shops/Card.tsx", "export default function Card() {}\n")
+    write(tmp_path, "app/api/skills/route.ts", "import { loadSkills } from '../../../lib/skills/loader'\n")
+    write(tmp_path, "components/Shell.tsx", "export default function Shell() {}\n")
+    write(tmp_path, "lib/shops.ts", "export const list = []\n")
+    write(tmp_path, "lib/skills/loader.ts", "export function loadSkills() {}\n")
+    write(tmp_path, "skills/moments/SKILL.md", "# 朋友圈文案\n")
+    write(tmp_path, "e2e_demo_test.py", "import e2e_demo_helper\n\ndef test_shops(pool):\n    pass\n")
+    write(tmp_path, "e2e_demo_helper.py", "import json\n")
+    write(tmp_path, "package.json", "{}\n")
+
+    monkeypatch.setattr(e2e_warmup, "ROOT", str(tmp_path))
+    monkeypatch.setattr(e2e_select, "ROOT", str(tmp_path))
+    monkeypatch.setattr(e2e_select, "_routes", None)
+    monkeypatch.setattr(e2e_select, "_file_hashes", {})
+    monkeypatch.setattr(e2e_select, "discover_routes",
+                        lambda: e2e_warmup.discover_routes(str(tmp_path / "app")))
+    return tmp_path
+
+
+def test_dependencies_none_without_coverage(tree):
+    assert e2e_select.dependencies("e2e_demo_test.py::test_shops", None) is None
+
+
+def test_dependencies_follow_imports_and_layouts(tree):
+    deps = e2e_select.dependencies("e2e_demo_test.py::test_shops", {"routes": ["/shops"], "assets": []})
+    assert deps["files"] == sorted([
+        "app/layout.tsx", "app/shops/page.tsx", "app/shops/Card.tsx", "components/Shell.tsx",
+        "lib/shops.ts", "e2e_demo_test.py", "e2e_demo_helper.py",
+    ])
+    assert deps["prefixes"] == []
+
+
+def test_dependencies_include_runtime_reads(tree):
+    deps = e2e_select.dependencies("e2e_demo_test.py::test_shops", {"routes": ["/api/skills"], "assets": []})
+    assert "lib/skills/loader.ts" in deps["files"]
+    assert "app/layout.tsx" not in deps["files"]
+    assert deps["prefixes"] == ["skills/"]
+
+
+def test_affected(tree):
+    deps = e2e_select.dependencies("e2e_demo_test.py::test_shops", {"routes": ["/api/skills"], "assets": []})
+    assert e2e_select.affected(deps, {"README.md"}) == []
+    assert e2e_select.affected(deps, {"lib/skills/loader.ts", "README.md"}) == ["lib/skills/loader.ts"]
+    assert e2e_select.affected(deps, {"skills/moments/SKILL.md"}) == ["skills/moments/SKILL.md"]
+    # 全局文件影响所有场景，依赖未知时也一样
+    assert e2e_select.affected(deps, {"package.json"}) == ["package.json"]
+    assert e2e_select.affected(None, {"package.json", "lib/shops.ts"}) == ["package.json"]
+
+
+def test_content_key(tree):
+    deps = e2e_select.dependencies("e2e_demo_test.py::test_shops", {"routes": ["/api/skills"], "assets": []})
+    key = e2e_select.content_key(deps)
+    assert e2e_select.content_key(deps) == key
+    assert e2e_select.content_key(deps, "replay") != key
+
+    # 数据目录下的文件和全局文件都参与缓存键
+    write(tree, "skills/moments/SKILL.md", "# 朋友圈文案 v2\n")
+    e2e_select._file_hashes.clear()
+    changed = e2e_select.content_key(deps)
+    assert changed != key
+
+    write(tree, "package.json", '{"private": true}\n')
+    e2e_select._file_hashes.clear()
+    assert e2e_select.content_key(deps) != changed
+
+    # 不在依赖中的文件不影响缓存键
+    before = e2e_select.content_key(deps)
+    write(tree, "lib/shops.ts", "export const list = [1]\n")
+    e2e_select._file_hashes.clear()
+    assert e2e_select.content_key(deps) == before
@@ -0,0 +1,58 @@
+"""e2e_steps.retry 的重试记录，以及它在历史结果库中的计数"""
+
+import pytest
+
+import e2e_history
+import e2e_steps
+
+
+def flaky(failures):
+    calls = []
+
+    def func():
+        calls.append(None)
+        if len(calls) <= failures:
+            raise TimeoutError(f"第 {len(calls)} 次超时")
+        return "ok"
+    return func
+
+
+def test_retry_records_failed_attempts():
+    with e2e_steps.test_case("e2e_demo_test.py::test_retry") as record:
+        assert e2e_steps.retry("提交", flaky(1), attempts=3, delay=0) == "ok"
+        record.passed = True
+
+    (entry,) = record.to_dict()["steps"]
+    assert entry["attempts"] == 2
+    assert [r["attempt"] for r in entry["retries"]] == [1]
+    assert entry["retries"][0]["error"] == "TimeoutError: 第 1 次超时"
+
+
+def test_retry_gives_up_and_reraises():
+    with pytest.raises(TimeoutError):
+        with e2e_steps.test_case("e2e_demo_test.py::test_retry_fails"):
+            e2e_steps.retry("提交", flaky(5), attempts=2, delay=0)
+    record = e2e_steps.RESULTS[-1]
+    assert not record.passed
+    assert len(record.steps[0]["retries"]) == 2
+
+
+def test_retry_only_catches_listed_exceptions():
+    with pytest.raises(TimeoutError):
+        with e2e_steps.test_case("e2e_demo_test.py::test_retry_other"):
+            e2e_steps.retry("提交", flaky(1), attempts=3, delay=0, exceptions=(ValueError,))
+    assert e2e_steps.RESULTS[-1].steps[0]["retries"] == []
+
+
+def test_retries_reach_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(e2e_history, "git_revision", lambda: ("abc123", 0))
+    with e2e_steps.test_case("e2e_demo_test.py::test_retry_history") as record:
+        e2e_steps.retry("提交", flaky(2), attempts=3, delay=0)
+        record.passed = True
+    db = str(tmp_path / "history.sqlite")
+    e2e_history.record_run([record.to_dict()], "e2e_test", path=db)
+    conn = e2e_history.connect(db)
+    try:
+        assert conn.execute("SELECT retries FROM results").fetchone()[0] == 2
+    finally:
+        conn.close()